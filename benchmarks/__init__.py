@@ -0,0 +1,11 @@
+"""
+Benchmarks for photo_sorter on synthetic photo corpora.
+
+Run from the repository root:
+
+    python -m benchmarks                      # all benchmarks at 1k and 10k items
+    python -m benchmarks --sizes 100000 --only exif,run --json results.json
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
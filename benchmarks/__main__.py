@@ -0,0 +1,110 @@
+"""
+Command line for the benchmarks: python -m benchmarks --help
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import shutil
+import sys
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Optional
+
+from .bench import bench_cluster, bench_exif, bench_geocode, bench_match, bench_resolve, bench_run
+from .corpus import CorpusSpec, write_corpus
+from .nominatim_stub import ADDRESS_SHAPES, StubConfig
+
+BENCHMARKS = ("exif", "match", "cluster", "geocode", "resolve", "run")
+DEFAULT_SIZES = "1000,10000"
+
+
+def _sizes(text: str) -> list[int]:
+    try:
+        sizes = [int(s.replace("_", "").replace("k", "000")) for s in text.split(",") if s.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"sizes must be comma-separated integers, got {text!r}")
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("sizes must be positive")
+    return sizes
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark photo_sorter's hot paths on synthetic photo corpora.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--sizes", type=_sizes, default=_sizes(DEFAULT_SIZES), help="Items per benchmark, e.g. 1k,10k,100k.")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the best time is reported.")
+    parser.add_argument("--workers", type=int, default=1, help="--workers for the end-to-end run.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data.")
+    parser.add_argument("--file-bytes", type=int, default=CorpusSpec.file_bytes, help="Approximate size of each synthetic file.")
+    parser.add_argument("--thumbnail-bytes", type=int, default=0, help="EXIF thumbnail size in each file (0 = none).")
+    parser.add_argument("--geocode-workers", type=int, default=4, help="Threads resolving clusters (resolve benchmark).")
+    parser.add_argument("--geocode-rate", type=float, default=0.0, help="Client rate limit in requests/s (0 = none).")
+    parser.add_argument("--geocode-burst", type=int, default=1, help="Client burst size.")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0, help="Latency of the Nominatim stub (resolve benchmark).")
+    parser.add_argument("--stub-error-rate", type=float, default=0.02, help="Fraction of stub replies that are 429/503.")
+    parser.add_argument("--stub-shape", choices=ADDRESS_SHAPES, default="mixed", help="Address layout of stub replies.")
+    parser.add_argument("--json", default=None, metavar="PATH", help="Also write the results to this JSON file.")
+    parser.add_argument("--keep", default=None, metavar="DIR", help="Write corpora under DIR and keep them.")
+    args = parser.parse_args(argv)
+
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    logging.basicConfig(level=logging.ERROR)  # keep run()'s progress lines out of the table
+
+    print(f"Python {platform.python_version()} on {platform.platform()}")
+    print(f"{'benchmark':<32} {'items':>9} {'seconds':>10} {'items/s':>12}")
+    results = []
+
+    def report(batch):
+        for result in batch:
+            results.append({"size": size, **result.to_dict()})
+            print(f"{result.name:<32} {result.items:>9} {result.seconds:>10.4f} {result.rate:>12.1f}")
+
+    spec = CorpusSpec(file_bytes=args.file_bytes, thumbnail_bytes=args.thumbnail_bytes, seed=args.seed)
+    root = Path(args.keep) if args.keep else None
+    for size in args.sizes:
+        if "exif" in selected:
+            tmp = root if root is not None else Path(tempfile.mkdtemp(prefix="photo_sorter_bench_"))
+            try:
+                paths = write_corpus(tmp / f"exif_{size}", replace(spec, count=size))
+                report(bench_exif(paths, args.repeat))
+            finally:
+                if root is None:
+                    shutil.rmtree(tmp, ignore_errors=True)
+        if "match" in selected:
+            report(bench_match(size, repeat=args.repeat, seed=args.seed))
+        if "cluster" in selected:
+            report(bench_cluster(size, repeat=args.repeat, seed=args.seed))
+        if "geocode" in selected:
+            report(bench_geocode(size, repeat=args.repeat, seed=args.seed))
+        if "resolve" in selected:
+            stub_config = StubConfig(
+                latency_ms=args.stub_latency_ms, error_rate=args.stub_error_rate, shape=args.stub_shape, seed=args.seed
+            )
+            report(bench_resolve(
+                size, args.geocode_workers, args.geocode_rate, args.geocode_burst, stub_config, seed=args.seed
+            ))
+        if "run" in selected:
+            report(bench_run(size, workers=args.workers, repeat=args.repeat, spec=spec, root=root))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
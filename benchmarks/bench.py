@@ -0,0 +1,210 @@
+"""
+Benchmarks for the hot paths: GPS extraction, location matching,
+clustering, geocoding (against the local stub server) and whole runs.
+Each returns Result objects with the best time over `repeat` runs.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import shutil
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Optional
+
+from photo_sorter.cli import run
+from photo_sorter.clustering import cluster_points
+from photo_sorter.config import PointLocation, SorterConfig
+from photo_sorter.exif_reader import get_gps_from_image
+from photo_sorter.geocode import cluster_key, get_place_name
+from photo_sorter.geocode_cache import open_geocode_cache
+from photo_sorter.geocode_client import NominatimClient
+from photo_sorter.location_matcher import LocationIndex, match_location
+
+from .corpus import CorpusSpec, random_points, write_corpus
+from .nominatim_stub import NominatimStub, StubConfig
+
+# Per-item loops that are linear in the number of locations or hit the
+# network are capped at this many items per repeat
+SLOW_LOOP_LIMIT = 10_000
+
+
+@dataclass
+class Result:
+    """Best time for one benchmark at one size."""
+    name: str
+    items: int
+    seconds: float
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "items": self.items, "seconds": self.seconds, "items_per_second": self.rate, **self.extra}
+
+
+def best_of(repeat: int, func: Callable[[], None]) -> float:
+    """Smallest wall time of repeat calls to func."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_exif(paths: list[Path], repeat: int = 3) -> list[Result]:
+    """get_gps_from_image over a corpus (errors from corrupt files are part of the cost)."""
+    found = 0
+
+    def read_all():
+        nonlocal found
+        found = 0
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # Pillow warns about the corrupt files
+            for path in paths:
+                try:
+                    found += get_gps_from_image(path) is not None
+                except Exception:
+                    pass
+
+    seconds = best_of(repeat, read_all)
+    return [Result("get_gps_from_image", len(paths), seconds, {"with_gps": found})]
+
+
+def bench_match(count: int, locations: int = 200, repeat: int = 3, seed: int = 0) -> list[Result]:
+    """match_location per point, and LocationIndex.match_batch, against `locations` point locations."""
+    places = random_points(locations, locations, 0.0, seed)
+    config = SorterConfig(
+        locations=[PointLocation(f"Place{i}", lat, lon, radius_km=5.0) for i, (lat, lon) in enumerate(places)]
+    )
+    points = random_points(count, locations, 3.0, seed + 1)
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    loop = points[:SLOW_LOOP_LIMIT]
+    per_point = best_of(repeat, lambda: [match_location(lat, lon, config) for lat, lon in loop])
+    index = LocationIndex(config)
+    batch = best_of(repeat, lambda: index.match_batch(lats, lons))
+    return [
+        Result("match_location", len(loop), per_point, {"locations": locations}),
+        Result("LocationIndex.match_batch", count, batch, {"locations": locations}),
+    ]
+
+
+def bench_cluster(count: int, radius_km: float = 10.0, repeat: int = 3, seed: int = 0) -> list[Result]:
+    """cluster_key per point and cluster_points over all points."""
+    points = random_points(count, max(1, count // 100), 3.0, seed)
+    per_point = best_of(repeat, lambda: [cluster_key(lat, lon, radius_km) for lat, lon in points])
+    grouped = best_of(repeat, lambda: cluster_points(points, radius_km))
+    return [
+        Result("cluster_key", count, per_point),
+        Result("cluster_points", count, grouped, {"radius_km": radius_km}),
+    ]
+
+
+def bench_geocode(count: int, repeat: int = 3, seed: int = 0) -> list[Result]:
+    """get_place_name against the local stub: every lookup a miss, then every lookup a cache hit."""
+    points = random_points(min(count, SLOW_LOOP_LIMIT), 50, 50.0, seed)
+    tmp = Path(tempfile.mkdtemp(prefix="photo_sorter_bench_"))
+    try:
+        with NominatimStub() as stub, NominatimClient(stub.url, rate=0) as client:
+            def lookups(cache):
+                for lat, lon in points:
+                    get_place_name(lat, lon, cache=cache, single_word_english=True, client=client)
+
+            misses = best_of(repeat, lambda: lookups(None))
+            with open_geocode_cache(tmp / "cache.json") as cache:
+                lookups(cache)  # fill the cache
+                hits = best_of(repeat, lambda: lookups(cache))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return [
+        Result("get_place_name (stub server)", len(points), misses),
+        Result("get_place_name (cache hits)", len(points), hits),
+    ]
+
+
+def bench_resolve(
+    count: int,
+    workers: int = 1,
+    rate: float = 0.0,
+    burst: int = 1,
+    stub_config: Optional[StubConfig] = None,
+    seed: int = 0,
+) -> list[Result]:
+    """
+    Name `count` distinct places (up to SLOW_LOOP_LIMIT) the way run()
+    resolves clusters: get_place_name on `workers` threads sharing one
+    NominatimClient (rate limit rate/s, bursts of burst, retries) against a
+    stub with the given latency, errors and address shapes. Runs once, since
+    the rate limiter and the stub's seeded errors make the time deterministic.
+    """
+    points = random_points(min(count, SLOW_LOOP_LIMIT), min(count, SLOW_LOOP_LIMIT), 0.0, seed)
+    stub_config = stub_config or StubConfig()
+    with NominatimStub(config=stub_config) as stub, NominatimClient(stub.url, rate=rate, burst=burst) as client:
+        def resolve(point):
+            return get_place_name(point[0], point[1], single_word_english=True, client=client)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            names = list(pool.map(resolve, points))
+        seconds = time.perf_counter() - start
+    extra = {
+        "workers": workers,
+        "rate": rate,
+        "burst": burst,
+        "latency_ms": stub_config.latency_ms,
+        "error_rate": stub_config.error_rate,
+        "shape": stub_config.shape,
+        "requests": stub.requests,
+        "errors": stub.errors,
+        "coordinate_names": sum(name.startswith("Lat") for name in names),
+    }
+    return [Result("resolve clusters (stub)", len(points), seconds, extra)]
+
+
+def bench_run(
+    count: int,
+    workers: int = 1,
+    repeat: int = 3,
+    spec: Optional[CorpusSpec] = None,
+    root: Optional[Path] = None,
+) -> list[Result]:
+    """
+    cli.run end to end (copy, coordinate folder names, no network) over a
+    synthetic corpus of count files. The corpus is written once under root
+    (default: a temporary directory, removed afterwards).
+    """
+    spec = replace(spec or CorpusSpec(), count=count)
+    tmp = Path(root) if root is not None else Path(tempfile.mkdtemp(prefix="photo_sorter_bench_"))
+    try:
+        corpus = tmp / f"corpus_{count}"
+        start = time.perf_counter()
+        paths = write_corpus(corpus, spec)
+        written = time.perf_counter() - start
+        total_bytes = sum(p.stat().st_size for p in paths)
+        best, best_stats = float("inf"), None
+        for _ in range(max(1, repeat)):
+            output = tmp / f"out_{count}"
+            shutil.rmtree(output, ignore_errors=True)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                start = time.perf_counter()
+                summary = run(corpus, output, SorterConfig(), workers=workers, collect_stats=True)
+                seconds = time.perf_counter() - start
+            if seconds < best:
+                best, best_stats = seconds, summary["stats"]
+        shutil.rmtree(tmp / f"out_{count}", ignore_errors=True)
+    finally:
+        if root is None:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return [
+        Result("write_corpus", count, written, {"bytes": total_bytes}),
+        Result("cli.run", count, best, {"workers": workers, "mb_per_second": total_bytes / best / 1e6, "stats": best_stats}),
+    ]
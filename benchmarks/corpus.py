@@ -0,0 +1,248 @@
+"""
+Synthetic photo corpora for benchmarks: JPEG, HEIC, TIFF and PNG files with EXIF
+GPS written byte by byte (no image encoder per file), so 100k files can be
+generated in seconds. The layout is controlled by CorpusSpec: file sizes,
+thumbnails, byte order, photos without GPS, corrupt headers and duplicates.
+The same spec and seed always give the same files.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import io
+import math
+import random
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+# Files per folder, like a camera's DCIM/100CANON folders
+FILES_PER_FOLDER = 1000
+# Recent files that duplicates are copied from (bounds memory for big corpora)
+_DUPLICATE_POOL = 256
+
+_EARTH_RADIUS_KM = 6371.0
+_TYPE_ASCII = 2
+_TYPE_LONG = 4
+_TYPE_RATIONAL = 5
+_GPS_IFD_TAG = 0x8825
+_THUMBNAIL_OFFSET_TAG = 0x0201
+_THUMBNAIL_LENGTH_TAG = 0x0202
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@dataclass
+class CorpusSpec:
+    """What a synthetic corpus looks like. Fractions are of count."""
+    count: int = 1000
+    # Relative weights of the file formats
+    formats: dict[str, float] = field(default_factory=lambda: {"jpeg": 0.6, "heif": 0.2, "tiff": 0.1, "png": 0.1})
+    file_bytes: int = 32 * 1024  # approximate size of each file
+    thumbnail_bytes: int = 0  # EXIF thumbnail (IFD1) size; 0 = none
+    big_endian: float = 0.5  # "MM" instead of "II" TIFF headers
+    no_gps: float = 0.1
+    corrupt: float = 0.02
+    duplicates: float = 0.05  # byte-for-byte copies of earlier files
+    clusters: int = 50  # places photos are taken at
+    spread_km: float = 2.0  # how far photos scatter around their place
+    seed: int = 0
+
+
+def _rational_dms(value: float) -> list[tuple[int, int]]:
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round(((value - degrees) * 60 - minutes) * 60 * 100)
+    return [(degrees, 1), (minutes, 1), (seconds, 100)]
+
+
+def exif_tiff(
+    lat: Optional[float],
+    lon: Optional[float],
+    big_endian: bool = False,
+    thumbnail: bytes = b"",
+    make: str = "Benchmark",
+) -> bytes:
+    """
+    A TIFF/EXIF block: IFD0 (Make, GPS pointer), the GPS IFD (latitude and
+    longitude with their refs) unless lat is None, and IFD1 pointing at
+    thumbnail if given. Offsets are relative to the start of the block.
+    """
+    endian = ">" if big_endian else "<"
+
+    def entry(tag: int, typ: int, count: int, value: bytes) -> bytes:
+        return struct.pack(endian + "HHI", tag, typ, count) + value.ljust(4, b"\x00")
+
+    def long(value: int) -> bytes:
+        return struct.pack(endian + "I", value)
+
+    make_bytes = make.encode("ascii") + b"\x00"
+    ifd0_count = 1 + (lat is not None)
+    ifd0_offset = 8
+    ifd0_size = 2 + 12 * ifd0_count + 4
+    gps_offset = ifd0_offset + ifd0_size
+    gps_size = 2 + 12 * 4 + 4 if lat is not None else 0
+    data_offset = gps_offset + gps_size
+    # Out-of-line values: Make, then latitude and longitude rationals
+    make_offset = data_offset
+    lat_offset = make_offset + len(make_bytes)
+    lon_offset = lat_offset + 24
+    ifd1_offset = lon_offset + 24 if lat is not None else lat_offset
+    ifd1_size = 2 + 12 * 2 + 4
+    thumb_offset = ifd1_offset + ifd1_size
+
+    out = io.BytesIO()
+    out.write((b"MM" if big_endian else b"II") + struct.pack(endian + "H", 42) + long(ifd0_offset))
+    out.write(struct.pack(endian + "H", ifd0_count))
+    out.write(entry(0x010F, _TYPE_ASCII, len(make_bytes), long(make_offset)))
+    if lat is not None:
+        out.write(entry(_GPS_IFD_TAG, _TYPE_LONG, 1, long(gps_offset)))
+    out.write(long(ifd1_offset if thumbnail else 0))
+    if lat is not None:
+        out.write(struct.pack(endian + "H", 4))
+        out.write(entry(1, _TYPE_ASCII, 2, b"N" if lat >= 0 else b"S"))
+        out.write(entry(2, _TYPE_RATIONAL, 3, long(lat_offset)))
+        out.write(entry(3, _TYPE_ASCII, 2, b"E" if lon >= 0 else b"W"))
+        out.write(entry(4, _TYPE_RATIONAL, 3, long(lon_offset)))
+        out.write(long(0))
+    out.write(make_bytes)
+    if lat is not None:
+        for num, den in _rational_dms(lat) + _rational_dms(lon):
+            out.write(struct.pack(endian + "II", num, den))
+    if thumbnail:
+        out.write(struct.pack(endian + "H", 2))
+        out.write(entry(_THUMBNAIL_OFFSET_TAG, _TYPE_LONG, 1, long(thumb_offset)))
+        out.write(entry(_THUMBNAIL_LENGTH_TAG, _TYPE_LONG, 1, long(len(thumbnail))))
+        out.write(long(0))
+        out.write(thumbnail)
+    return out.getvalue()
+
+
+def _base_jpeg() -> bytes:
+    """A small real JPEG (SOI ... EOI) to wrap EXIF around."""
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (16, 16), (90, 120, 150)).save(buf, "JPEG", quality=50)
+    return buf.getvalue()
+
+
+def _base_png() -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (16, 16), (90, 120, 150)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _box(kind: bytes, payload: bytes, version: Optional[int] = None) -> bytes:
+    """An ISO-BMFF box (a full box, with version and zero flags, if version is given)."""
+    if version is not None:
+        payload = struct.pack(">I", version << 24) + payload
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def _heif_meta(exif_offset: int, exif_length: int) -> bytes:
+    """meta box with one image item and an Exif item at exif_offset in the file (iloc version 1)."""
+    infe = _box(b"infe", struct.pack(">HH4s", 1, 0, b"hvc1") + b"\x00", version=2)
+    infe += _box(b"infe", struct.pack(">HH4s", 2, 0, b"Exif") + b"\x00", version=2)
+    iinf = _box(b"iinf", struct.pack(">H", 2) + infe, version=0)
+    iloc = _box(b"iloc", b"\x44\x00" + struct.pack(">HHHHHII", 1, 2, 0, 0, 1, exif_offset, exif_length), version=1)
+    hdlr = _box(b"hdlr", b"\x00" * 4 + b"pict" + b"\x00" * 13, version=0)
+    return _box(b"meta", hdlr + _box(b"pitm", struct.pack(">H", 1), version=0) + iinf + iloc, version=0)
+
+
+class CorpusBuilder:
+    """Builds file contents for a spec; the base images are encoded once."""
+
+    def __init__(self, spec: CorpusSpec):
+        self.spec = spec
+        self._jpeg = _base_jpeg()
+        self._png = _base_png()
+        self._thumbnail = self._jpeg.ljust(spec.thumbnail_bytes, b"\x00") if spec.thumbnail_bytes else b""
+
+    def jpeg(self, tiff: bytes, size: int) -> bytes:
+        app1 = b"Exif\x00\x00" + tiff
+        data = self._jpeg[:2] + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + self._jpeg[2:]
+        return data + b"\x00" * max(0, size - len(data))  # trailing bytes after EOI are ignored
+
+    def png(self, tiff: bytes, size: int) -> bytes:
+        ihdr_end = len(_PNG_SIGNATURE) + 25  # signature + IHDR chunk
+        head, tail = self._png[:ihdr_end], self._png[ihdr_end:]
+        data = head + _png_chunk(b"eXIf", tiff)
+        padding = max(0, size - len(data) - len(tail) - 12)
+        if padding:
+            data += _png_chunk(b"ppAd", b"\x00" * padding)  # private ancillary chunk
+        return data + tail
+
+    def heif(self, tiff: bytes, size: int) -> bytes:
+        # ftyp, meta, then mdat holding the Exif item followed by padding for the "image"
+        ftyp = _box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+        exif = struct.pack(">I", 6) + b"Exif\x00\x00" + tiff
+        head = ftyp + _heif_meta(0, len(exif))
+        exif_offset = len(head) + 8  # after the mdat header
+        head = ftyp + _heif_meta(exif_offset, len(exif))
+        payload = exif + b"\x00" * max(0, size - exif_offset - len(exif))
+        return head + _box(b"mdat", payload)
+
+    def tiff(self, tiff: bytes, size: int) -> bytes:
+        return tiff + b"\x00" * max(0, size - len(tiff))
+
+    def build(self, fmt: str, gps: Optional[tuple[float, float]], big_endian: bool) -> bytes:
+        lat, lon = gps if gps is not None else (None, None)
+        tiff = exif_tiff(lat, lon, big_endian=big_endian, thumbnail=self._thumbnail)
+        return getattr(self, fmt)(tiff, self.spec.file_bytes)
+
+
+_SUFFIXES = {"jpeg": ".jpg", "heif": ".heic", "tiff": ".tif", "png": ".png"}
+
+
+def _scatter(rng: random.Random, lat: float, lon: float, spread_km: float) -> tuple[float, float]:
+    d_lat = rng.gauss(0, spread_km) / _EARTH_RADIUS_KM
+    d_lon = rng.gauss(0, spread_km) / (_EARTH_RADIUS_KM * max(0.01, math.cos(math.radians(lat))))
+    return max(-89.9, min(89.9, lat + math.degrees(d_lat))), (lon + math.degrees(d_lon) + 180) % 360 - 180
+
+
+def random_points(count: int, clusters: int, spread_km: float, seed: int = 0) -> list[tuple[float, float]]:
+    """count (lat, lon) points scattered around `clusters` random places."""
+    rng = random.Random(seed)
+    centers = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(max(1, clusters))]
+    return [_scatter(rng, *rng.choice(centers), spread_km) for _ in range(count)]
+
+
+def write_corpus(root: str | Path, spec: CorpusSpec) -> list[Path]:
+    """Write spec.count files under root (in folders of FILES_PER_FOLDER) and return their paths."""
+    root = Path(root)
+    rng = random.Random(spec.seed)
+    builder = CorpusBuilder(spec)
+    points = random_points(spec.count, spec.clusters, spec.spread_km, spec.seed)
+    formats, weights = zip(*spec.formats.items())
+    recent: list[tuple[str, bytes]] = []
+    paths: list[Path] = []
+    for i in range(spec.count):
+        fmt = rng.choices(formats, weights)[0]
+        roll = rng.random()
+        if recent and roll < spec.duplicates:
+            fmt, data = rng.choice(recent)
+        else:
+            gps = None if roll < spec.duplicates + spec.no_gps else points[i]
+            data = builder.build(fmt, gps, rng.random() < spec.big_endian)
+            if roll >= 1 - spec.corrupt:
+                data = data[: rng.randint(4, 40)]  # header cut short
+            if len(recent) < _DUPLICATE_POOL:
+                recent.append((fmt, data))
+            else:
+                recent[i % _DUPLICATE_POOL] = (fmt, data)
+        folder = root / f"{100 + i // FILES_PER_FOLDER}BENCH"
+        if i % FILES_PER_FOLDER == 0:
+            folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"IMG_{i:06d}{_SUFFIXES[fmt]}"
+        path.write_bytes(data)
+        paths.append(path)
+    return paths
@@ -0,0 +1,236 @@
+"""
+Local stand-in for a Nominatim server: answers /reverse with a Nominatim-
+shaped JSON object whose place name depends only on the coordinates, so
+geocoding can be benchmarked offline and repeatably. Latency, error
+responses (429/503 with Retry-After) and the shape of the address can be
+configured to exercise the client's rate limiter, retries and name parsing.
+
+Run it on its own and point photo-sorter at it:
+
+    python -m benchmarks.nominatim_stub --port 8080 --latency-ms 20 --error-rate 0.05
+    PHOTO_SORTER_NOMINATIM_URL=http://127.0.0.1:8080 photo-sorter -i ... -o ... --geocode-rate 0
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from photo_sorter.geocode_client import URL_ENV_VAR
+
+_SYLLABLES = ("ka", "lo", "ma", "ri", "ta", "ne", "su", "vi", "do", "pa", "len", "gor")
+_CJK_SYLLABLES = ("山", "川", "田", "中", "大", "北", "南", "東", "西", "新", "台", "港")
+
+# Address layouts the stub can answer with:
+#   suburb, village, town, city  - the name in that address field
+#   tourism      - a landmark plus its city ("Name, City" folder names)
+#   chinese      - a CJK suburb with a Latin village as the usable fallback
+#   postcode     - only a numeric postcode and a county (postcode must be skipped)
+#   display_only - no address, only display_name
+#   empty        - Nominatim's "Unable to geocode" error object
+#   mixed        - one of the above per ~1 km cell
+ADDRESS_SHAPES = ("suburb", "village", "town", "city", "tourism", "chinese", "postcode", "display_only", "empty", "mixed")
+
+
+def _cell(lat: float, lon: float) -> int:
+    return (int(round(lat * 100)) * 73856093) ^ (int(round(lon * 100)) * 19349663)
+
+
+def place_name(lat: float, lon: float, syllables: tuple[str, ...] = _SYLLABLES) -> str:
+    """A made-up name for the ~1 km cell around (lat, lon) (letters only, so it survives folder-name cleanup)."""
+    cell = _cell(lat, lon)
+    parts = []
+    for _ in range(3):
+        cell, i = divmod(abs(cell), len(syllables))
+        parts.append(syllables[i])
+    return "".join(parts).capitalize()
+
+
+def reverse_response(lat: float, lon: float, shape: str = "suburb") -> dict:
+    """The /reverse JSON the stub returns for (lat, lon) in the given address shape."""
+    if shape == "mixed":
+        shape = ADDRESS_SHAPES[abs(_cell(lat, lon)) % (len(ADDRESS_SHAPES) - 1)]
+    name = place_name(lat, lon)
+    county = place_name(round(lat), round(lon)) + " County"
+    if shape == "empty":
+        return {"error": "Unable to geocode"}
+    result = {"lat": str(lat), "lon": str(lon), "display_name": f"{name}, {county}"}
+    if shape == "display_only":
+        return result
+    if shape in ("suburb", "village", "town", "city"):
+        address = {shape: name}
+    elif shape == "tourism":
+        address = {"tourism": name + " Park", "city": county[: -len(" County")]}
+        result["display_name"] = f"{name} Park, {county}"
+    elif shape == "chinese":
+        address = {"suburb": place_name(lat, lon, _CJK_SYLLABLES), "village": name}
+    elif shape == "postcode":
+        address = {"postcode": f"{abs(_cell(lat, lon)) % 90000 + 10000}"}
+        result["display_name"] = f"{address['postcode']}, {county}"
+    else:
+        raise ValueError(f"address shape must be one of {', '.join(ADDRESS_SHAPES)}, got {shape!r}")
+    address.update({"county": county, "country_code": "xx"})
+    result["address"] = address
+    return result
+
+
+@dataclass
+class StubConfig:
+    """How the stub behaves."""
+    latency_ms: float = 0.0  # added to every response
+    jitter_ms: float = 0.0  # uniform extra latency in [0, jitter_ms]
+    error_rate: float = 0.0  # fraction of requests answered with an error status
+    error_statuses: tuple[int, ...] = (429, 503)
+    retry_after: Optional[float] = 0.0  # Retry-After header on errors (None = no header)
+    shape: str = "suburb"
+    seed: int = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+    # Headers and body are separate writes; without this, Nagle's algorithm
+    # and delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+    server: "_StubHTTPServer"
+
+    def do_GET(self):
+        stub = self.server.stub
+        parts = urlsplit(self.path)
+        if not parts.path.endswith("/reverse"):
+            self._send(404, {"error": "Unknown endpoint"})
+            return
+        query = parse_qs(parts.query)
+        try:
+            lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        except (KeyError, ValueError):
+            self._send(400, {"error": "Parameter lat/lon missing or invalid"})
+            return
+        delay, error_status = stub._next_reply()
+        if delay > 0:
+            time.sleep(delay)
+        if error_status is not None:
+            headers = {} if stub.config.retry_after is None else {"Retry-After": f"{stub.config.retry_after:g}"}
+            self._send(error_status, {"error": "Try again later"}, headers)
+            return
+        self._send(200, reverse_response(lat, lon, stub.config.shape))
+
+    def _send(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "NominatimStub"
+
+
+class NominatimStub:
+    """
+    Serves the stub on host:port (port 0 picks a free one) from a background
+    thread. Use as a context manager; url is the base URL to give a
+    NominatimClient (or to put in $PHOTO_SORTER_NOMINATIM_URL). requests
+    counts the /reverse queries received and errors those answered with an
+    error status. Errors and jitter come from a seeded generator, so a run
+    that sends requests in the same order gets the same replies.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None):
+        self.config = config or StubConfig()
+        if self.config.shape not in ADDRESS_SHAPES:
+            raise ValueError(f"address shape must be one of {', '.join(ADDRESS_SHAPES)}, got {self.config.shape!r}")
+        self._httpd = _StubHTTPServer((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def _next_reply(self) -> tuple[float, Optional[int]]:
+        # (seconds to wait, error status or None) for the next request
+        config = self.config
+        with self._lock:
+            self.requests += 1
+            delay = (config.latency_ms + self._rng.uniform(0, config.jitter_ms)) / 1000
+            error = None
+            if config.error_rate > 0 and self._rng.random() < config.error_rate:
+                error = self._rng.choice(config.error_statuses)
+                self.errors += 1
+        return delay, error
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "NominatimStub":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "NominatimStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.nominatim_stub",
+        description="Serve a local Nominatim /reverse stand-in for geocoding benchmarks.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every response.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency, up to this much.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/503.")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds sent with errors (negative = none).")
+    parser.add_argument("--shape", choices=ADDRESS_SHAPES, default="suburb", help="Address layout of the responses.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        shape=args.shape,
+        seed=args.seed,
+    )
+    with NominatimStub(args.host, args.port, config) as stub:
+        print(f"Nominatim stub on {stub.url} (Ctrl+C to stop)")
+        print(f"  {URL_ENV_VAR}={stub.url} photo-sorter -i ... -o ... --geocode-rate 0")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        print(f"{stub.requests} request(s), {stub.errors} answered with an error")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,12 +9,27 @@ Licensed under the MIT License.
 import argparse
 import logging
 import sys
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
+from .clustering import cluster_points
 from .config import load_config, SorterConfig
-from .exif_reader import get_gps_from_image, is_image_file
-from .file_ops import copy_image, move_image
+from .dedup import DEDUP_MODES, DuplicateFinder
+from .exif_reader import GPS_READER_VERSION, iter_gps_from_images
+from .file_ops import (
+    LINK_MODES,
+    CopyStats,
+    DestinationRegistry,
+    copy_image,
+    ensure_directory,
+    move_file,
+    move_image,
+    place_file,
+)
+from .geocode_cache import open_geocode_cache
+from .gazetteer import Gazetteer
+from .geocode_client import NOMINATIM_DELAY_SEC, URL_ENV_VAR, NominatimClient
 from .geocode import (
     cluster_key,
     cluster_precision_from_radius_km,
@@ -23,7 +38,18 @@ from .geocode import (
     sanitize_folder_name,
     to_single_word_english,
 )
-from .location_matcher import match_location
+from .location_matcher import LocationIndex
+from .journal import Journal
+from .metadata_index import FileSignature, IndexEntry, MetadataIndex, file_signature
+from .pipeline import DEFAULT_QUEUE_SIZE, Pipeline, Stage, batched
+from .plan import PlanEntry, PlanWriter, apply_plan
+from .scanner import ImageScan
+from .stats import RunStats, TimedGeocoder
+
+# Log a progress line after this many files have been read
+PROGRESS_EVERY = 1000
+# Photos matched to config locations per batch (config mode)
+MATCH_BATCH_SIZE = 1024
 
 
 def setup_logging(verbose: bool) -> None:
@@ -46,6 +72,21 @@ def run(
     geocode_cache_path: Optional[Path] = None,
     cluster_radius_km: float = 10.0,
     single_word_english: bool = True,
+    workers: int = 1,
+    use_processes: bool = False,
+    index_path: Optional[Path] = None,
+    geocode_url: Optional[str] = None,
+    geocode_rate: Optional[float] = None,
+    geocode_burst: int = 1,
+    geocode_workers: int = 1,
+    gazetteer_path: Optional[Path] = None,
+    link_mode: str = "copy",
+    dedup: str = "off",
+    plan_path: Optional[Path] = None,
+    journal_path: Optional[Path] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    collect_stats: bool = False,
+    stats_path: Optional[Path] = None,
 ) -> dict:
     """
     Run the photo sorter: scan input_dir for images, match by GPS, copy or move
@@ -55,10 +96,58 @@ def run(
     (cluster_radius_km) and folder names are single-word English (e.g. SJDMBulacan,
     QuezonCityUP) unless single_word_english=False.
 
+    GPS extraction runs on `workers` threads (or processes if use_processes)
+    when workers > 1; results are handled in scan order either way. Scanning
+    and extraction, location matching, geocoding and writing run as pipeline
+    stages on their own threads, with at most queue_size items waiting
+    between two stages (see pipeline.Pipeline). Files are written by a single
+    writer. In auto mode, clustering waits for extraction to finish; each
+    cluster is written as soon as its name is resolved.
+
+    Place names are looked up on geocode_workers threads against the Nominatim
+    server at geocode_url (default: $PHOTO_SORTER_NOMINATIM_URL, else the
+    public server), at most geocode_rate
+    requests per second (bursts of geocode_burst). The default rate follows
+    the public server's 1 request/second policy. With gazetteer_path, names
+    come from that local place file instead (no network).
+
+    When copying, link_mode (copy, hardlink, symlink, reflink or auto) can
+    link or clone files instead of duplicating their data; see file_ops.place_file.
+
+    dedup="skip" leaves out duplicates within this run: files with the same
+    content as one sorted earlier in the run, or one the index or journal
+    skips as already sorted (moved runs leave them in the input folder).
+    dedup="hardlink" puts a hard link to the earlier copy in their folder
+    instead of a second copy. Other files already in the output are not compared.
+
+    With plan_path, nothing is copied or moved: each operation (source,
+    destination folder, final filename) is written to that JSONL file for
+    apply_plan to execute later.
+
+    With journal_path, every copy/move is recorded in a write-ahead journal.
+    Operations are journaled and run in batches, with one fsync per batch
+    before any of its files is written. Re-running the same command after a crash first finishes the operations
+    that were in flight, then skips files the journal lists as done (their
+    GPS comes from the journal, so EXIF is not read again).
+
     Returns a summary dict: total, sorted, skipped_no_gps, skipped_no_match_left,
-    skipped_other, errors (list of (path, error_message)).
+    skipped_other, unchanged, duplicates, resumed, planned, bytes_copied, errors (list of (path, error_message)).
+
+    With collect_stats (or stats_path), the dict also has "stats": wall and
+    CPU time, items, items/s and bytes per stage (scan, exif, match, geocode,
+    geocode_network or geocode_gazetteer, write) plus counters such as geocode
+    cache hits and misses; see stats.RunStats. With stats_path they are also
+    written there as JSON. The scan reads directory entries only, so its
+    bytes_read is 0; exif counts the bytes its readers read.
+
+    With index_path, a metadata index remembers each file's GPS and
+    destination: unchanged files are not re-read, and in copy mode files
+    already copied to the same folder by an earlier run are not copied again
+    (counted as unchanged). In auto mode, a cluster holding photos copied by
+    an earlier run keeps that run's folder, even if new photos joined it.
     """
     log = logging.getLogger(__name__)
+    run_stats = RunStats(enabled=collect_stats or stats_path is not None)
     input_path = Path(input_dir)
     base_output = Path(output_dir)
 
@@ -70,34 +159,21 @@ def run(
     base_output = base_output.resolve()
     base_output.mkdir(parents=True, exist_ok=True)
 
-    total = 0
     sorted_count = 0
     skipped_no_gps = 0
     skipped_no_match = 0
     skipped_left_in_place = 0
     errors: list[tuple[Path, str]] = []
 
-    # Gather image files (one level or recursive? — common to do recursive for "many images")
-    image_paths = [
-        p for p in input_path.rglob("*")
-        if p.is_file() and is_image_file(p)
-    ]
-    total = len(image_paths)
-
-    if total == 0:
-        log.info("No image files found in %s", input_path)
-        return {
-            "total": 0,
-            "sorted": 0,
-            "skipped_no_gps": 0,
-            "skipped_no_match_left": 0,
-            "skipped_other": 0,
-            "errors": [],
-        }
+    # Stream image files from the input tree; extraction starts while the walk
+    # continues. If the output folder is inside the input tree, skip it.
+    scan = ImageScan(input_path, exclude=[base_output] if base_output != input_path.resolve() else [])
 
     auto_mode = len(config.locations) == 0
     if auto_mode:
-        if geocode:
+        if geocode and gazetteer_path is not None:
+            log.info("Geocoding: ON (offline gazetteer %s). Folder names will be place names.", gazetteer_path)
+        elif geocode:
             log.info(
                 "Geocoding: ON (Nominatim/OpenStreetMap — no API key required). Folder names will be place names."
             )
@@ -114,179 +190,542 @@ def run(
             cluster_radius_km,
             "single-word English" + (" (geocoded)" if geocode else " (coordinates)") if single_word_english else "as-is",
         )
-    log.info("Processing %d image(s) from %s", total, input_path)
+    log.info("Processing images from %s", input_path)
     do_move = move
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"link_mode must be one of {', '.join(LINK_MODES)}, got {link_mode!r}")
+    if do_move and link_mode != "copy":
+        log.warning("--link-mode %s has no effect with --move (files are moved).", link_mode)
+    copy_stats = CopyStats()
+    # Free names per destination folder, listed once instead of probed per file;
+    # a plan only reserves them in memory
+    registry = DestinationRegistry(reserve_on_disk=plan_path is None)
+    planner: Optional[PlanWriter] = None
+    # Planned (or batched, with a journal) destination of each source, to link
+    # duplicates to with dedup=hardlink
+    planned: dict[Path, Path] = {}
+    if dedup not in DEDUP_MODES:
+        raise ValueError(f"dedup must be one of {', '.join(DEDUP_MODES)}, got {dedup!r}")
+    duplicates = DuplicateFinder() if dedup != "off" else None
+    duplicate_count = 0
     uncategorized_behavior = config.uncategorized_behavior
     uncategorized_name = config.uncategorized_folder_name
 
-    if auto_mode:
-        # Two-phase: collect (path, lat, lon), group by cluster, then resolve folder names and copy/move
-        from collections import defaultdict
-        cluster_precision = cluster_precision_from_radius_km(cluster_radius_km)
-        cluster_to_paths: dict[tuple[float, float], list[tuple[Path, float, float]]] = defaultdict(list)
-        no_gps_paths: list[Path] = []  # Collect images without GPS
-        
-        for path in image_paths:
+    index: Optional[MetadataIndex] = None
+    # Signature and previous entry of files looked up in the index, until placed
+    index_state: dict[Path, tuple[FileSignature, Optional[IndexEntry]]] = {}
+    unchanged = 0
+    journal: Optional[Journal] = None
+    resumed = 0
+    # Destination folders created so far, so each is made once, not once per file
+    created_dirs: set[Path] = {base_output}
+    # Journaled writes claimed but not started: (source, gps, destination, write)
+    batch: list[tuple[Path, object, Path, Callable[[], None]]] = []
+
+    def lookup(path: Path):
+        # Skip EXIF for files a previous (interrupted) run already sorted
+        if journal is not None:
+            op = journal.completed(path)
+            if op is not None:
+                run_stats.count("journal_hits")
+                return (path, op.gps, None)
+        return index_lookup(path) if index is not None else None
+
+    def index_lookup(path: Path):
+        # Reuse GPS from the index when the file is unchanged since the last run
+        try:
+            signature = file_signature(path)
+        except OSError:
+            return None
+        entry = index.lookup(path, signature)
+        index_state[path] = (signature, entry)
+        if entry is None:
+            return None
+        run_stats.count("index_hits")
+        return (path, entry.gps, None)
+
+    def remember(path: Path, gps, dest_path: Optional[Path]) -> None:
+        state = index_state.pop(path, None)
+        if state is not None and not do_move:
+            index.record(path, state[0], gps, dest_path)
+
+    def prepare(dest_dir: Path) -> None:
+        if dest_dir not in created_dirs:
+            ensure_directory(dest_dir)
+            created_dirs.add(dest_dir)
+
+    def place(path: Path, dest_dir: Path, gps) -> Path:
+        # place_one, timed as the write stage
+        with run_stats.timed("write") as timing:
+            copied = copy_stats.bytes
+            dest_path = place_one(path, dest_dir, gps)
+            timing.bytes_read = timing.bytes_written = copy_stats.bytes - copied
+        if batch and len(batch) >= journal.fsync_every:
+            run_batch()  # journaled writes run in batches, one fsync each
+        return dest_path
+
+    def place_one(path: Path, dest_dir: Path, gps) -> Path:
+        # Copy or move one file; never scan a folder we are writing into
+        nonlocal unchanged, duplicate_count, resumed
+        scan.exclude(dest_dir)
+        done = journal.completed(path) if journal is not None else None
+        if done is not None:
+            resumed += 1
+            if duplicates is not None:
+                duplicates.add(path, Path(done.dest))
+            return Path(done.dest)
+        state = index_state.get(path)
+        if state is not None and state[1] is not None and not do_move:
+            previous = state[1].destination
+            if previous and Path(previous).parent == dest_dir and Path(previous).is_file():
+                # Already copied there by an earlier run
+                index_state.pop(path)
+                unchanged += 1
+                if duplicates is not None:
+                    duplicates.add(path, Path(previous))
+                return Path(previous)
+        if planner is not None:
+            return plan(path, dest_dir)
+        prepare(dest_dir)
+        original = duplicates.find(path) if duplicates is not None else None
+        if original is not None:
+            original = planned.get(original, original)
+            duplicate_count += 1
+            duplicates.forget(path)
+            if dedup == "skip":
+                remember(path, gps, original)
+                return original
+            if journal is not None:
+                return enqueue(path, dest_dir, gps, "link", original)
+            # Same content already sorted: link to it instead of writing another copy
+            dest_path = copy_image(
+                original, dest_dir, dest_filename=path.name, link_mode="hardlink",
+                stats=copy_stats, registry=registry, dest_exists=True,
+            )
+            if do_move:
+                path.unlink()
+            remember(path, gps, dest_path)
+            return dest_path
+        if journal is not None:
+            return enqueue(path, dest_dir, gps, "move" if do_move else "copy")
+        try:
+            if do_move:
+                dest_path = move_image(path, dest_dir, registry=registry, dest_exists=True)
+            else:
+                dest_path = copy_image(
+                    path, dest_dir, link_mode=link_mode, stats=copy_stats, registry=registry, dest_exists=True,
+                )
+        except BaseException:
+            if duplicates is not None:
+                duplicates.forget(path)
+            raise
+        if duplicates is not None:
+            duplicates.add(path, dest_path)
+        remember(path, gps, dest_path)
+        return dest_path
+
+    def enqueue(path: Path, dest_dir: Path, gps, action: str, original: Optional[Path] = None) -> Path:
+        # Claim the destination and journal the operation; it runs with its batch
+        dest_path = registry.claim(dest_dir, path.name)
+        op = journal.begin(
+            path, dest_path, action, gps, link_mode=link_mode,
+            original=original, remove_source=action == "link" and do_move,
+        )
+
+        def write() -> None:
+            if action == "link":
+                place_file(original, dest_path, "hardlink", copy_stats, replace=True)
+                if do_move:
+                    path.unlink()
+            elif action == "move":
+                move_file(path, dest_path)
+            else:
+                place_file(path, dest_path, link_mode, copy_stats, replace=True)
+            journal.finish(op)
+            if duplicates is not None and action == "move":
+                duplicates.relocate(path, dest_path)
+            remember(path, gps, dest_path)
+
+        if duplicates is not None and action != "link":
+            duplicates.add(path)  # readable at its source until the batch runs
+            planned[path] = dest_path
+        batch.append((path, gps, dest_path, write))
+        return dest_path
+
+    def run_batch() -> None:
+        # One fsync makes the batch's plan records durable, then its writes run in order
+        nonlocal sorted_count, skipped_no_gps
+        if not batch:
+            return
+        journal.sync()
+        ops = batch[:]
+        batch.clear()
+        for path, gps, dest_path, write in ops:
             try:
-                gps = get_gps_from_image(path)
-                if gps is None:
-                    no_gps_paths.append(path)
-                    if verbose:
-                        log.debug("No GPS: %s", path.name)
-                    continue
-                lat, lon = gps
-                if verbose:
-                    log.debug("GPS extracted from %s: lat=%.6f, lon=%.6f", path.name, lat, lon)
-                center = cluster_key(lat, lon, cluster_radius_km)
-                cluster_to_paths[center].append((path, lat, lon))
+                # The file was counted when it was queued
+                with run_stats.timed("write", items=0) as timing:
+                    copied = copy_stats.bytes
+                    write()
+                    timing.bytes_read = timing.bytes_written = copy_stats.bytes - copied
             except Exception as e:
+                registry.release(dest_path)
                 errors.append((path, str(e)))
-                if verbose:
-                    log.debug("Error extracting GPS from %s: %s", path.name, e)
-        
-        # Move images without GPS to "Skipped" folder
-        if no_gps_paths:
+                sorted_count -= 1
+                if gps is None:
+                    skipped_no_gps -= 1
+
+    def plan(path: Path, dest_dir: Path) -> Path:
+        # Dry run: decide the final name and record the operation instead of doing it
+        nonlocal duplicate_count
+        original = duplicates.find(path) if duplicates is not None else None
+        if original is not None:
+            duplicate_count += 1
+            duplicates.forget(path)
+            if dedup == "skip":
+                return original
+        dest_path = registry.claim(dest_dir, path.name)
+        if original is not None:
+            entry = PlanEntry(
+                str(path), str(dest_dir), dest_path.name, action="link",
+                original=str(planned.get(original, original)), remove_source=do_move,
+            )
+        else:
+            entry = PlanEntry(
+                str(path), str(dest_dir), dest_path.name,
+                action="move" if do_move else "copy", link_mode=link_mode,
+            )
+            if duplicates is not None:
+                duplicates.add(path)  # still readable at its source
+                if dedup == "hardlink":
+                    planned[path] = dest_path
+        planner.write(entry)
+        return dest_path
+
+    def extracted():
+        # GPS results in scan order, with a progress line every PROGRESS_EVERY files
+        results = iter_gps_from_images(
+            run_stats.timed_iter("scan", scan),
+            workers,
+            use_processes,
+            lookup=lookup if index is not None or journal is not None else None,
+            stats=run_stats.stage("exif"),
+        )
+        for processed, result in enumerate(results, start=1):
+            if processed % PROGRESS_EVERY == 0:
+                log.info(
+                    "Read GPS from %d of %s image(s)...",
+                    processed,
+                    scan.found if scan.complete else f"{scan.found}+",
+                )
+            yield result
+
+    with ExitStack() as resources:
+        if index_path is not None:
+            index = resources.enter_context(MetadataIndex(index_path, reader_version=GPS_READER_VERSION))
+            log.info("Metadata index: %s (unchanged files are not re-read)", index_path)
+        if plan_path is not None:
+            planner = resources.enter_context(PlanWriter(plan_path))
+            log.info("Dry run: writing plan to %s (no files are copied or moved)", plan_path)
+            if journal_path is not None:
+                log.warning("--journal has no effect with --plan (nothing is copied or moved).")
+        elif journal_path is not None:
+            journal = resources.enter_context(Journal(journal_path))
+            finished = journal.recover()
+            # Empty files no journaled operation wrote are names claimed before a crash
+            registry.reusable = lambda dest: not journal.owns(dest)
+            log.info("Journal: %s (%d operation(s) already done)", journal_path, len(journal))
+            if finished:
+                log.info("Journal: finished %d operation(s) interrupted by the previous run", finished)
+        geocode_client: Optional[NominatimClient | Gazetteer] = None
+        if auto_mode and geocode and gazetteer_path is not None:
+            geocode_client = Gazetteer.load(gazetteer_path)
+            log.info("Loaded %d place(s) from gazetteer", len(geocode_client))
+        elif auto_mode and geocode:
+            geocode_client = resources.enter_context(
+                NominatimClient(
+                    base_url=geocode_url,
+                    rate=1 / NOMINATIM_DELAY_SEC if geocode_rate is None else geocode_rate,
+                    burst=geocode_burst,
+                )
+            )
+        # Every reverse() call is a cache miss: time them separately from cache hits
+        lookup_stage = "geocode_gazetteer" if gazetteer_path is not None else "geocode_network"
+        if geocode_client is not None and run_stats.enabled:
+            geocode_client = TimedGeocoder(geocode_client, run_stats.stage(lookup_stage))
+
+        if auto_mode:
+            # Extraction runs ahead on the pipeline's threads while files without GPS
+            # are written; clustering needs every location, so it waits for the last one
+            from collections import defaultdict
+            cluster_precision = cluster_precision_from_radius_km(cluster_radius_km)
+            cluster_to_paths: dict[tuple[float, float], list[tuple[Path, float, float]]] = defaultdict(list)
+            located: list[tuple[Path, float, float]] = []
             skipped_folder_name = "Skipped" if single_word_english else "Skipped"
             skipped_dir = base_output / skipped_folder_name
-            for path in no_gps_paths:
-                try:
-                    if do_move:
-                        move_image(path, skipped_dir)
-                    else:
-                        copy_image(path, skipped_dir)
-                    skipped_no_gps += 1
-                    sorted_count += 1  # Count as sorted (moved to Skipped folder)
-                    if verbose:
-                        log.debug("No GPS: %s -> Skipped", path.name)
-                except Exception as e:
-                    errors.append((path, str(e)))
+
+            with Pipeline(extracted(), queue_size=queue_size) as results:
+                for path, gps, error in results:
+                    if error is not None:
+                        errors.append((path, error))
+                        if verbose:
+                            log.debug("Error extracting GPS from %s: %s", path.name, error)
+                        continue
+                    if gps is None:
+                        # Move images without GPS to "Skipped" folder
+                        try:
+                            place(path, skipped_dir, None)
+                            skipped_no_gps += 1
+                            sorted_count += 1  # Count as sorted (moved to Skipped folder)
+                            if verbose:
+                                log.debug("No GPS: %s -> Skipped", path.name)
+                        except Exception as e:
+                            errors.append((path, str(e)))
+                            if verbose:
+                                log.debug("Error moving no-GPS file %s: %s", path.name, e)
+                        continue
+                    lat, lon = gps
                     if verbose:
-                        log.debug("Error moving no-GPS file %s: %s", path.name, e)
-
-        # Resolve folder name per cluster: use ACTUAL photo coordinates for geocoding
-        # (not the rounded cluster center), so Nominatim returns the real place name.
-        cluster_to_folder: dict[tuple[float, float], str] = {}
-        geocode_failures = 0
-        if geocode and geocode_cache_path is not None and cluster_to_paths:
-            log.info("Resolving place names for %d location(s) from Nominatim (this may take a moment)...", len(cluster_to_paths))
-        for (lat_c, lon_c), paths in cluster_to_paths.items():
-            if verbose:
-                log.debug("Processing cluster (%.6f, %.6f) with %d photo(s)", lat_c, lon_c, len(paths))
-            # Use first photo's actual (lat, lon) for geocoding - real coordinates give real place names
-            lat_actual, lon_actual = paths[0][1], paths[0][2]
-            if geocode and geocode_cache_path is not None:
+                        log.debug("GPS extracted from %s: lat=%.6f, lon=%.6f", path.name, lat, lon)
+                    located.append((path, lat, lon))
+
+            # Photos within cluster_radius_km of each other (directly or via a chain) share a folder
+            centers = cluster_points([(lat, lon) for _path, lat, lon in located], cluster_radius_km)
+            for center, item in zip(centers, located):
+                cluster_to_paths[center].append(item)
+            del located
+
+            # Resolve folder name per cluster: use ACTUAL photo coordinates for geocoding
+            # (not the cluster center), so Nominatim returns the real place name.
+            geocode_failures = 0
+            if geocode and geocode_cache_path is not None and cluster_to_paths:
+                log.info(
+                    "Resolving place names for %d location(s) from %s...",
+                    len(cluster_to_paths),
+                    "the gazetteer" if gazetteer_path is not None else "Nominatim (this may take a moment)",
+                )
+            # Load the cache once for the whole run; flush it even if a lookup fails
+            geocode_cache = (
+                open_geocode_cache(geocode_cache_path)
+                if geocode and geocode_cache_path is not None
+                else None
+            )
+
+            def earlier_folder(paths) -> Optional[str]:
+                # Folder an earlier run (per the index) copied one of these photos into
+                for path, _lat, _lon in paths:
+                    state = index_state.get(path)
+                    if state is None or state[1] is None or not state[1].destination:
+                        continue
+                    folder = Path(state[1].destination).parent
+                    if folder.parent == base_output and folder != skipped_dir and folder.is_dir():
+                        return folder.name
+                return None
+
+            def resolve(cluster) -> tuple[list[tuple[Path, float, float]], str, bool]:
+                # (photos, folder name, geocoding failed) for one cluster; runs on geocode_workers threads
+                (lat_c, lon_c), paths = cluster
+                if verbose:
+                    log.debug("Processing cluster (%.6f, %.6f) with %d photo(s)", lat_c, lon_c, len(paths))
+                earlier = earlier_folder(paths)
+                if earlier is not None:
+                    # Photos added to a cluster sorted by an earlier run join its folder
+                    return paths, earlier, False
+                # Grid cell of the cluster's lowest member: new photos rarely move it
+                lat_cell, lon_cell = cluster_key(lat_c, lon_c, cluster_radius_km)
+                coords_name = rounded_coords_folder_name(lat_cell, lon_cell, single_word_english=single_word_english)
+                if geocode_cache is None:
+                    return paths, coords_name, False
+                # Use first photo's actual (lat, lon) for geocoding - real coordinates give real place names
+                lat_actual, lon_actual = paths[0][1], paths[0][2]
                 folder_name = get_place_name(
                     lat_actual,
                     lon_actual,
-                    cache_path=geocode_cache_path,
+                    cache=geocode_cache,
                     use_network=True,
                     single_word_english=single_word_english,
                     cache_precision=cluster_precision,  # cache key still by cluster to avoid duplicate API calls
+                    client=geocode_client,
                 )
                 if verbose:
                     log.debug("Geocoded (%.6f, %.6f) -> folder name: %s", lat_actual, lon_actual, folder_name)
                 # Check if geocoding failed (returned coordinate-based fallback or "Unknown")
                 if single_word_english and (folder_name.startswith("Lat") and "Lon" in folder_name or folder_name == "Unknown"):
-                    geocode_failures += 1
                     if verbose:
                         log.debug("Geocoding failed for (%.6f, %.6f), using coordinate name: %s", lat_actual, lon_actual, folder_name)
                     # Replace "Unknown" with coordinate fallback
                     if folder_name == "Unknown":
-                        folder_name = rounded_coords_folder_name(lat_c, lon_c, single_word_english=single_word_english)
+                        folder_name = coords_name
+                    return paths, folder_name, True
+                return paths, folder_name, False
+
+            def timed_resolve(cluster):
+                with run_stats.timed("geocode"):
+                    return resolve(cluster)
+
+            # Clusters are written as soon as their name is known, while later
+            # ones are still being looked up; network lookups overlap on
+            # geocode_workers threads and the client's rate limit decides the request rate
+            network = geocode_cache is not None and gazetteer_path is None
+            resolver = Stage("geocode", timed_resolve, workers=geocode_workers if network else 1)
+            try:
+                with Pipeline(cluster_to_paths.items(), [resolver], queue_size=queue_size) as clusters:
+                    for paths, folder_name, failed in clusters:
+                        geocode_failures += failed
                         safe_folder_name = sanitize_folder_name(folder_name)
-                        cluster_to_folder[(lat_c, lon_c)] = safe_folder_name
-            else:
-                folder_name = rounded_coords_folder_name(lat_c, lon_c, single_word_english=single_word_english)
-            safe_folder_name = sanitize_folder_name(folder_name)
-            cluster_to_folder[(lat_c, lon_c)] = safe_folder_name
-        
-        if geocode and geocode_failures > 0:
-            log.error(
-                "⚠️  Geocoding failed for %d location(s). Using coordinate-based folder names.\n"
-                "   Fix: 1) Delete the cache file shown at the start (in your output folder)\n"
-                "        2) Check your internet connection\n"
-                "        3) Run again: photo-sorter -i ... -o ... (geocoding is on by default)\n"
-                "        4) If it still fails, run with --verbose to see errors.",
-                geocode_failures
-            )
-        elif not geocode:
-            log.warning(
-                "⚠️  Geocoding is OFF. To get place names, run without --no-geocode: photo-sorter -i ... -o ..."
-            )
+                        dest_dir = base_output / safe_folder_name
+                        if planner is None:
+                            # Create the folder once, before any of its files is placed
+                            try:
+                                prepare(dest_dir)
+                            except OSError as e:
+                                log.warning("Could not create folder %s: %s", dest_dir, e)
+                        for path, lat, lon in paths:
+                            try:
+                                place(path, dest_dir, (lat, lon))
+                                sorted_count += 1
+                                if verbose:
+                                    log.debug("Sorted: %s -> %s", path.name, safe_folder_name)
+                            except Exception as e:
+                                errors.append((path, str(e)))
+            finally:
+                if geocode_cache is not None:
+                    geocode_cache.close()
+            if geocode_cache is not None and run_stats.enabled:
+                lookups = run_stats.stage("geocode").items
+                misses = run_stats.stage(lookup_stage).items
+                run_stats.count("geocode_cache_hits", lookups - misses)
+                run_stats.count("geocode_cache_misses", misses)
+
+            if geocode and geocode_failures > 0:
+                log.error(
+                    "⚠️  Geocoding failed for %d location(s). Using coordinate-based folder names.\n"
+                    "   Fix: 1) Delete the cache file shown at the start (in your output folder)\n"
+                    "        2) Check your internet connection\n"
+                    "        3) Run again: photo-sorter -i ... -o ... (geocoding is on by default)\n"
+                    "        4) If it still fails, run with --verbose to see errors.",
+                    geocode_failures
+                )
+            elif not geocode:
+                log.warning(
+                    "⚠️  Geocoding is OFF. To get place names, run without --no-geocode: photo-sorter -i ... -o ..."
+                )
 
-        for (lat_c, lon_c), paths in cluster_to_paths.items():
-            safe_folder_name = cluster_to_folder[(lat_c, lon_c)]
-            dest_dir = base_output / safe_folder_name
-            for path, _lat, _lon in paths:
+        else:
+            # Config mode: match each photo to a location, apply single-word naming to config names if requested
+            skipped_folder_name = "Skipped" if single_word_english else "Skipped"
+            skipped_dir = base_output / skipped_folder_name
+            # Built once; each lookup only checks locations near the photo
+            matcher = LocationIndex(config)
+
+            def match_results(batch):
+                # (path, gps, error, location name) for a batch of extraction results
+                located = [gps for _path, gps, error in batch if error is None and gps is not None]
+                with run_stats.timed("match", items=len(located)):
+                    names = iter(matcher.match_batch([g[0] for g in located], [g[1] for g in located]))
+                return [
+                    (path, gps, error, next(names) if error is None and gps is not None else None)
+                    for path, gps, error in batch
+                ]
+
+            def matched():
+                # Extraction, matching (in batches) and writing run on separate threads;
+                # queue_size counts photos, so the queues hold that many batches' worth at most
+                batches = Pipeline(
+                    batched(extracted(), MATCH_BATCH_SIZE),
+                    [Stage("match", match_results)],
+                    queue_size=max(1, queue_size // MATCH_BATCH_SIZE),
+                )
+                with batches:
+                    for batch in batches:
+                        yield from batch
+
+            for path, gps, error, folder_name in matched():
+                if error is not None:
+                    errors.append((path, error))
+                    continue
                 try:
-                    if do_move:
-                        move_image(path, dest_dir)
-                    else:
-                        copy_image(path, dest_dir)
+                    if gps is None:
+                        # Move to Skipped folder
+                        try:
+                            place(path, skipped_dir, None)
+                            skipped_no_gps += 1
+                            sorted_count += 1  # Count as sorted (moved to Skipped folder)
+                            if verbose:
+                                log.debug("No GPS: %s -> Skipped", path.name)
+                        except Exception as e:
+                            errors.append((path, str(e)))
+                            if verbose:
+                                log.debug("Error moving no-GPS file %s: %s", path.name, e)
+                        continue
+
+
+                    if folder_name is None:
+                        if uncategorized_behavior == "leave_in_place":
+                            skipped_left_in_place += 1
+                            remember(path, gps, None)
+                            if verbose:
+                                log.debug("No match, left in place: %s", path.name)
+                        else:
+                            dest_dir = base_output / sanitize_folder_name(uncategorized_name)
+                            place(path, dest_dir, gps)
+                            sorted_count += 1
+                            if verbose:
+                                log.debug("Uncategorized: %s -> %s", path.name, uncategorized_name)
+                        continue
+
+                    if single_word_english:
+                        folder_name = to_single_word_english(folder_name)
+                    safe_folder_name = sanitize_folder_name(folder_name) if not single_word_english else folder_name
+                    dest_dir = base_output / safe_folder_name
+                    place(path, dest_dir, gps)
                     sorted_count += 1
                     if verbose:
                         log.debug("Sorted: %s -> %s", path.name, safe_folder_name)
+
                 except Exception as e:
                     errors.append((path, str(e)))
 
-    else:
-        # Config mode: match each photo to a location, apply single-word naming to config names if requested
-        skipped_folder_name = "Skipped" if single_word_english else "Skipped"
-        skipped_dir = base_output / skipped_folder_name
-        
-        for path in image_paths:
-            try:
-                gps = get_gps_from_image(path)
-                if gps is None:
-                    # Move to Skipped folder
-                    try:
-                        if do_move:
-                            move_image(path, skipped_dir)
-                        else:
-                            copy_image(path, skipped_dir)
-                        skipped_no_gps += 1
-                        sorted_count += 1  # Count as sorted (moved to Skipped folder)
-                        if verbose:
-                            log.debug("No GPS: %s -> Skipped", path.name)
-                    except Exception as e:
-                        errors.append((path, str(e)))
-                        if verbose:
-                            log.debug("Error moving no-GPS file %s: %s", path.name, e)
-                    continue
-
-                lat, lon = gps
-                folder_name = match_location(lat, lon, config)
-
-                if folder_name is None:
-                    if uncategorized_behavior == "leave_in_place":
-                        skipped_left_in_place += 1
-                        if verbose:
-                            log.debug("No match, left in place: %s", path.name)
-                    else:
-                        dest_dir = base_output / sanitize_folder_name(uncategorized_name)
-                        if do_move:
-                            move_image(path, dest_dir)
-                        else:
-                            copy_image(path, dest_dir)
-                        sorted_count += 1
-                        if verbose:
-                            log.debug("Uncategorized: %s -> %s", path.name, uncategorized_name)
-                    continue
+        run_batch()  # the last, partial batch
 
-                if single_word_english:
-                    folder_name = to_single_word_english(folder_name)
-                safe_folder_name = sanitize_folder_name(folder_name) if not single_word_english else folder_name
-                dest_dir = base_output / safe_folder_name
-                if do_move:
-                    move_image(path, dest_dir)
-                else:
-                    copy_image(path, dest_dir)
-                sorted_count += 1
-                if verbose:
-                    log.debug("Sorted: %s -> %s", path.name, safe_folder_name)
+    def finish(summary: dict) -> dict:
+        # Attach stage statistics (if collected) and write them to stats_path
+        if not run_stats.enabled:
+            return summary
+        if duplicates is not None:
+            run_stats.count("dedup_hashed_bytes", duplicates.hashed_bytes)
+        run_stats.stop()
+        summary["stats"] = run_stats.to_dict()
+        for name, stage in summary["stats"]["stages"].items():
+            log.info(
+                "Stage %-15s %7d item(s)  %8.2f s wall  %8.2f s CPU  %9.1f item(s)/s  %9.1f MB written",
+                name,
+                stage["items"],
+                stage["wall_seconds"],
+                stage["cpu_seconds"],
+                stage["items_per_second"],
+                stage["bytes_written"] / 1e6,
+            )
+        if stats_path is not None:
+            run_stats.write_json(stats_path)
+            log.info("Stage statistics written to %s", stats_path)
+        return summary
 
-            except Exception as e:
-                errors.append((path, str(e)))
+    total = scan.found
+    if total == 0:
+        log.info("No image files found in %s", input_path)
+        return finish({
+            "total": 0,
+            "sorted": 0,
+            "skipped_no_gps": 0,
+            "skipped_no_match_left": 0,
+            "skipped_other": 0,
+            "unchanged": 0,
+            "duplicates": 0,
+            "resumed": 0,
+            "planned": 0,
+            "bytes_copied": 0,
+            "errors": [],
+        })
 
     skipped_other = total - sorted_count - skipped_no_gps - skipped_left_in_place - len(errors)
     if skipped_other < 0:
@@ -300,18 +739,62 @@ def run(
         log.info("No GPS (moved to 'Skipped' folder): %d", skipped_no_gps)
     if uncategorized_behavior == "leave_in_place":
         log.info("Skipped (no match, left in place): %d", skipped_left_in_place)
+    if index_path is not None:
+        log.info("Unchanged since last run (already sorted): %d", unchanged)
+    if duplicates is not None:
+        log.info(
+            "Duplicates (%s): %d",
+            "not copied" if dedup == "skip" else "hard-linked to the first copy",
+            duplicate_count,
+        )
+    if journal is not None:
+        log.info("Already done by an earlier run (from journal): %d", resumed)
+    if planner is not None:
+        log.info("Planned operations: %d (written to %s; run with --apply to execute)", planner.count, plan_path)
+    if copy_stats.files:
+        log.info(
+            "Copied %.1f MB in %.1f s (%.1f MB/s)",
+            copy_stats.bytes / 1e6,
+            copy_stats.seconds,
+            copy_stats.rate / 1e6,
+        )
     log.info("Errors: %d", len(errors))
     for p, err in errors:
         log.warning("  %s: %s", p.name, err)
 
-    return {
+    return finish({
         "total": total,
         "sorted": sorted_count,
         "skipped_no_gps": skipped_no_gps,
         "skipped_no_match_left": skipped_left_in_place,
         "skipped_other": skipped_other,
+        "unchanged": unchanged,
+        "duplicates": duplicate_count,
+        "resumed": resumed,
+        "planned": planner.count if planner is not None else 0,
+        "bytes_copied": copy_stats.bytes,
         "errors": errors,
-    }
+    })
+
+
+def _apply(plan_path: Path, workers: int) -> int:
+    """Execute a plan file and log a summary. Return exit code."""
+    log = logging.getLogger(__name__)
+    try:
+        summary = apply_plan(plan_path, workers=workers)
+    except FileNotFoundError as e:
+        logging.error("%s", e)
+        return 1
+    except ValueError as e:
+        logging.error("Invalid plan: %s", e)
+        return 1
+    log.info("--- Summary ---")
+    log.info("Planned operations: %d", summary["total"])
+    log.info("Applied: %d", summary["applied"])
+    log.info("Errors: %d", len(summary["errors"]))
+    for source, err in summary["errors"]:
+        log.warning("  %s: %s", Path(source).name, err)
+    return 0
 
 
 def main(argv: Optional[list[str]] = None) -> int:
@@ -322,13 +805,11 @@ def main(argv: Optional[list[str]] = None) -> int:
     )
     parser.add_argument(
         "--input", "-i",
-        required=True,
-        help="Source directory containing images.",
+        help="Source directory containing images. Required unless --apply is used.",
     )
     parser.add_argument(
         "--output", "-o",
-        required=True,
-        help="Base output directory for sorted folders.",
+        help="Base output directory for sorted folders. Required unless --apply is used.",
     )
     parser.add_argument(
         "--config", "-c",
@@ -351,7 +832,8 @@ def main(argv: Optional[list[str]] = None) -> int:
         "--geocode-cache",
         default=None,
         metavar="PATH",
-        help="Path to geocode cache file (default: photo_sorter_geocode_cache.json in output dir).",
+        help="Path to geocode cache file (default: photo_sorter_geocode_cache.json in output dir). "
+        "Use a .sqlite or .db path for an SQLite cache (fast startup for very large caches).",
     )
     parser.add_argument(
         "--cluster-radius-km",
@@ -370,6 +852,104 @@ def main(argv: Optional[list[str]] = None) -> int:
         action="store_true",
         help="Move files instead of copying (default: copy).",
     )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="copy",
+        help="How to copy: real copies, hard links, symlinks, copy-on-write reflinks, "
+        "or auto (reflink, else hardlink on the same filesystem, else copy).",
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=DEDUP_MODES,
+        default="off",
+        help="Handle duplicate photos within this run: skip them, or hard-link to the first copy.",
+    )
+    parser.add_argument(
+        "--plan",
+        default=None,
+        metavar="PATH",
+        help="Dry run: write every copy/move (source, folder, filename) to this JSONL file instead of doing it.",
+    )
+    parser.add_argument(
+        "--apply",
+        default=None,
+        metavar="PATH",
+        help="Execute a plan written by --plan (uses --workers threads). No scanning or geocoding.",
+    )
+    parser.add_argument(
+        "--journal",
+        default=None,
+        metavar="PATH",
+        help="Record every copy/move in this journal; re-running the same command after a crash resumes where it stopped.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Read EXIF from N files in parallel (default: 1).",
+    )
+    parser.add_argument(
+        "--worker-type",
+        choices=("thread", "process"),
+        default="thread",
+        help="Use threads (best for network shares) or processes (best for CPU-bound parsing) with --workers.",
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        metavar="PATH",
+        help="SQLite file remembering GPS and destinations per source file, so re-runs skip unchanged files.",
+    )
+    parser.add_argument(
+        "--geocode-url",
+        default=None,
+        metavar="URL",
+        help=f"Base URL of the Nominatim server (default: ${URL_ENV_VAR} if set, else https://nominatim.openstreetmap.org).",
+    )
+    parser.add_argument(
+        "--geocode-rate",
+        type=float,
+        default=None,
+        metavar="REQ_PER_SEC",
+        help="Maximum geocoding requests per second (default: 1/1.1, the public server's policy; 0 = no limit).",
+    )
+    parser.add_argument(
+        "--geocode-burst",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Requests allowed back to back before --geocode-rate applies (default: 1).",
+    )
+    parser.add_argument(
+        "--geocode-workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Geocoding requests in flight at once (default: 1). Raise together with --geocode-rate for your own server.",
+    )
+    parser.add_argument(
+        "--gazetteer",
+        default=None,
+        metavar="PATH",
+        help="Resolve place names offline from a local GeoNames dump (e.g. cities500.txt) or a name,lat,lon CSV.",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        metavar="N",
+        help="Photos waiting between pipeline stages (scan/read, match, geocode, write). "
+        "Bounds memory use; a slower stage holds back the ones before it.",
+    )
+    parser.add_argument(
+        "--stats-json",
+        default=None,
+        metavar="PATH",
+        help="Record wall/CPU time, items/s and bytes per stage (scan, EXIF, match, geocode, write) "
+        "and geocode cache hits/misses, and write them to this JSON file.",
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -377,9 +957,14 @@ def main(argv: Optional[list[str]] = None) -> int:
     )
 
     args = parser.parse_args(argv)
+    if args.apply is None and (not args.input or not args.output):
+        parser.error("--input and --output are required (unless --apply is used)")
 
     setup_logging(args.verbose)
 
+    if args.apply is not None:
+        return _apply(Path(args.apply), args.workers)
+
     if args.config is not None:
         try:
             config = load_config(args.config)
@@ -410,8 +995,22 @@ def main(argv: Optional[list[str]] = None) -> int:
             geocode_cache_path=geocode_cache_path,
             cluster_radius_km=args.cluster_radius_km,
             single_word_english=not args.no_single_word,
+            workers=args.workers,
+            use_processes=args.worker_type == "process",
+            index_path=Path(args.index) if args.index else None,
+            geocode_url=args.geocode_url,
+            geocode_rate=args.geocode_rate,
+            geocode_burst=args.geocode_burst,
+            geocode_workers=args.geocode_workers,
+            gazetteer_path=Path(args.gazetteer) if args.gazetteer else None,
+            link_mode=args.link_mode,
+            dedup=args.dedup,
+            plan_path=Path(args.plan) if args.plan else None,
+            journal_path=Path(args.journal) if args.journal else None,
+            queue_size=args.queue_size,
+            stats_path=Path(args.stats_json) if args.stats_json else None,
         )
-    except NotADirectoryError as e:
+    except (NotADirectoryError, FileNotFoundError) as e:
         logging.error("%s", e)
         return 1
     except Exception as e:
@@ -0,0 +1,164 @@
+"""
+Distance-based clustering of photo coordinates: photos within radius_km of
+each other (directly or through a chain of nearby photos) end up in the same
+cluster, regardless of where grid lines fall.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+from .location_matcher import haversine_km
+
+# Km per degree of latitude for the Earth radius used by haversine_km
+_KM_PER_DEG = 6371.0 * math.pi / 180.0
+# Radius used when a non-positive radius is given (same default as the CLI)
+DEFAULT_RADIUS_KM = 10.0
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: dict = {}
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:  # path compression
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+class _Grid:
+    """
+    Lat rows of height radius/2; each row is split into equal longitude
+    columns no wider than radius/2 km at the row's equator-side edge. Any two
+    points in one cell are therefore within ~0.71 * radius of each other, and
+    points within radius of each other are at most two rows apart.
+    """
+
+    def __init__(self, radius_km: float):
+        self.radius_km = radius_km
+        self.radius_deg = radius_km / _KM_PER_DEG
+        self.cell_lat = self.radius_deg / 2
+        self._ncols: dict[int, int] = {}
+
+    def row(self, lat: float) -> int:
+        return math.floor(lat / self.cell_lat)
+
+    def ncols(self, row: int) -> int:
+        n = self._ncols.get(row)
+        if n is None:
+            lo, hi = row * self.cell_lat, (row + 1) * self.cell_lat
+            equator_side = 0.0 if lo <= 0.0 <= hi else min(abs(lo), abs(hi))
+            cos_eq = math.cos(math.radians(min(90.0, equator_side)))
+            max_width = self.cell_lat / cos_eq if cos_eq > 0 else 360.0
+            n = max(1, math.ceil(360.0 / max_width))
+            self._ncols[row] = n
+        return n
+
+    def col(self, row: int, lon: float) -> int:
+        n = self.ncols(row)
+        return math.floor(((lon + 180.0) % 360.0) / 360.0 * n) % n
+
+    def poleward_lat(self, row: int) -> float:
+        """Largest |lat| inside the row."""
+        return min(90.0, max(abs(row * self.cell_lat), abs((row + 1) * self.cell_lat)))
+
+    def neighbor_cols(self, row: int, col: int, other_row: int) -> Sequence[int]:
+        """Columns of other_row that can hold points within radius of cell (row, col)."""
+        n_other = self.ncols(other_row)
+        phi = max(self.poleward_lat(r) for r in range(min(row, other_row), max(row, other_row) + 1))
+        delta = math.radians(self.radius_deg)
+        cos_phi = math.cos(math.radians(phi))
+        if cos_phi <= math.sin(delta):
+            return range(n_other)  # circle reaches the pole: any longitude
+        dlon = math.degrees(math.asin(math.sin(delta) / cos_phi)) * (1 + 1e-9) + 1e-9
+        width = 360.0 / self.ncols(row)
+        lon_lo = col * width - 180.0 - dlon
+        lon_hi = (col + 1) * width - 180.0 + dlon
+        if lon_hi - lon_lo >= 360.0:
+            return range(n_other)
+        first = math.floor((lon_lo + 180.0) / 360.0 * n_other)
+        last = math.floor((lon_hi + 180.0) / 360.0 * n_other)
+        if last - first + 1 >= n_other:
+            return range(n_other)
+        return [c % n_other for c in range(first, last + 1)]
+
+
+def _cells_linked(a: list[tuple[float, float]], b: list[tuple[float, float]], grid: _Grid) -> bool:
+    """True if some point of cell a is within radius of some point of cell b (both sorted by lat)."""
+    if len(a) > len(b):
+        a, b = b, a
+    b_lats = [p[0] for p in b]
+    for lat, lon in a:
+        lo = bisect_left(b_lats, lat - grid.radius_deg)
+        hi = bisect_right(b_lats, lat + grid.radius_deg)
+        for k in range(lo, hi):
+            if haversine_km(lat, lon, b[k][0], b[k][1]) <= grid.radius_km:
+                return True
+    return False
+
+
+def cluster_points(
+    points: Sequence[tuple[float, float]], radius_km: float
+) -> list[tuple[float, float]]:
+    """
+    Cluster (lat, lon) points by distance and return a cluster key for each
+    point (same order as the input).
+
+    Two points are in the same cluster when they are within radius_km of
+    each other, directly or through a chain of points that are (single
+    linkage, i.e. DBSCAN with one point per core). A grid with cells of
+    half the radius makes this O(n log n): points sharing a cell are linked
+    without distance checks and only neighbouring cells are compared.
+
+    The key is the cluster's lowest member (smallest (lat, lon)). It does not
+    depend on the order of the points, and unlike a mean position it stays
+    the same when photos north of it join the cluster on a later run.
+    """
+    if radius_km <= 0:
+        radius_km = DEFAULT_RADIUS_KM
+    grid = _Grid(radius_km)
+
+    # Unique coordinates per cell, sorted by latitude
+    cells: dict[tuple[int, int], set[tuple[float, float]]] = {}
+    point_cells: list[tuple[int, int]] = []
+    for lat, lon in points:
+        row = grid.row(lat)
+        cell = (row, grid.col(row, lon))
+        cells.setdefault(cell, set()).add((lat, lon))
+        point_cells.append(cell)
+    sorted_cells = {cell: sorted(pts) for cell, pts in cells.items()}
+
+    uf = _UnionFind()
+    for cell in sorted_cells:
+        uf.parent[cell] = cell
+    for cell in sorted(sorted_cells):
+        row, col = cell
+        for other_row in range(row - 2, row + 3):
+            for other_col in grid.neighbor_cols(row, col, other_row):
+                other = (other_row, other_col)
+                if other <= cell or other not in sorted_cells:
+                    continue  # each pair is checked once
+                if uf.find(cell) == uf.find(other):
+                    continue
+                if _cells_linked(sorted_cells[cell], sorted_cells[other], grid):
+                    uf.union(cell, other)
+
+    members: dict[tuple[int, int], list[tuple[float, float]]] = {}
+    for (lat, lon), cell in zip(points, point_cells):
+        members.setdefault(uf.find(cell), []).append((lat, lon))
+    keys = {root: min(pts) for root, pts in members.items()}
+    return [keys[uf.find(cell)] for cell in point_cells]
@@ -11,13 +11,6 @@ from typing import Any
 
 import json
 
-# Optional YAML support
-try:
-    import yaml
-    _HAS_YAML = True
-except ImportError:
-    _HAS_YAML = False
-
 
 @dataclass
 class PointLocation:
@@ -109,8 +102,10 @@ def load_config(path: str | Path) -> SorterConfig:
     if suffix in (".json",):
         data = json.loads(text)
     elif suffix in (".yaml", ".yml"):
-        if not _HAS_YAML:
-            raise ImportError("YAML config requires PyYAML. Install with: pip install PyYAML")
+        try:
+            import yaml  # optional, and slow to import: only for YAML configs
+        except ImportError:
+            raise ImportError("YAML config requires PyYAML. Install with: pip install PyYAML") from None
         data = yaml.safe_load(text)
     else:
         raise ValueError(f"Unsupported config format: {suffix}. Use .json or .yaml")
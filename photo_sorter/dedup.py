@@ -0,0 +1,131 @@
+"""
+Find files whose content was already sorted earlier in the run, without
+hashing every file: candidates are grouped by size, then by a hash of their
+first and last 64 KB, and only fully hashed when those match.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+# What to do with a file whose content is already in the output
+DEDUP_MODES = ("off", "skip", "hardlink")
+# Bytes hashed from each end of a file for the partial hash
+PARTIAL_BYTES = 64 * 1024
+# Read size for full hashes
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _digest() -> "hashlib.blake2b":
+    return hashlib.blake2b(digest_size=16)
+
+
+def partial_hash(path: str | Path, size: int) -> bytes:
+    """Hash of the first and last PARTIAL_BYTES of a file of the given size."""
+    h = _digest()
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            f.seek(size - PARTIAL_BYTES)
+        h.update(f.read(PARTIAL_BYTES))
+    return h.digest()
+
+
+def full_hash(path: str | Path) -> bytes:
+    """Hash of the whole file."""
+    h = _digest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+class _Entry:
+    __slots__ = ("location", "partial", "full")
+
+    def __init__(self, location: Path, partial: Optional[bytes] = None, full: Optional[bytes] = None):
+        self.location = location
+        self.partial = partial
+        self.full = full
+
+
+class DuplicateFinder:
+    """
+    Remembers the files sorted so far and spots later files with the same
+    content. The first file seen with some content is the canonical one.
+
+    Call find(path) before sorting a file and add(path, location) once it is
+    in place (location is where it can be read from now, e.g. its
+    destination after a move). Hashes are computed only when two files have
+    the same size, and full hashes only when partial hashes also match, so
+    most files are never read. Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_size: dict[int, list[_Entry]] = {}
+        # Size and hashes computed by find() for a file not added yet
+        self._pending: dict[Path, _Entry] = {}
+        self.hashed_bytes = 0
+
+    def _partial(self, entry: _Entry, size: int) -> bytes:
+        if entry.partial is None:
+            entry.partial = partial_hash(entry.location, size)
+            self.hashed_bytes += min(size, 2 * PARTIAL_BYTES)
+        return entry.partial
+
+    def _full(self, entry: _Entry, size: int) -> bytes:
+        if entry.full is None:
+            if size <= 2 * PARTIAL_BYTES:
+                entry.full = self._partial(entry, size)  # partial hash covered the whole file
+            else:
+                entry.full = full_hash(entry.location)
+                self.hashed_bytes += size
+        return entry.full
+
+    def find(self, path: Path) -> Optional[Path]:
+        """Return the location of an earlier file with the same content as path, or None."""
+        size = os.stat(path).st_size
+        entry = _Entry(Path(path))
+        with self._lock:
+            self._pending[Path(path)] = entry
+            candidates = self._by_size.get(size)
+            if not candidates:
+                return None
+            for other in candidates:
+                try:
+                    if self._partial(other, size) != self._partial(entry, size):
+                        continue
+                    if self._full(other, size) == self._full(entry, size):
+                        return other.location
+                except OSError:
+                    continue  # earlier file gone or unreadable: not a usable original
+        return None
+
+    def add(self, path: Path, location: Optional[Path] = None) -> None:
+        """Record path (now readable at location, default path) as sorted."""
+        location = Path(location if location is not None else path)
+        with self._lock:
+            entry = self._pending.pop(Path(path), None) or _Entry(location)
+            entry.location = location
+            size = os.stat(location).st_size
+            self._by_size.setdefault(size, []).append(entry)
+
+    def relocate(self, location: Path, new_location: Path) -> None:
+        """Note that a file recorded at location has been moved to new_location."""
+        new_location = Path(new_location)
+        with self._lock:
+            for entry in self._by_size.get(os.stat(new_location).st_size, ()):
+                if entry.location == Path(location):
+                    entry.location = new_location
+                    return
+
+    def forget(self, path: Path) -> None:
+        """Drop state kept by find() for a file that was not sorted after all."""
+        with self._lock:
+            self._pending.pop(Path(path), None)
@@ -0,0 +1,392 @@
+"""
+Minimal EXIF structure walker that reads only the GPS tags.
+
+Instead of loading the whole EXIF block (thumbnails, maker notes, ...) this
+seeks through the JPEG markers to the APP1 "Exif" segment, reads the TIFF
+header and IFD0, jumps to the GPS IFD (tag 34853) and decodes only the
+latitude/longitude tags. Typically only the first few KB of a file are read.
+
+HEIC/HEIF files (ISO-BMFF) are handled the same way without an image
+decoder: the top-level "meta" box is read, its "iinf" box names the Exif
+item and its "iloc" box says where that item's bytes are. PNG files are
+scanned chunk by chunk (skipping image data) for the "eXIf" chunk.
+sniff_format names the walker to use from a file's magic bytes.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import io
+import struct
+from typing import BinaryIO, Optional
+
+# IFD0 tag pointing to the GPS IFD
+GPS_IFD_TAG = 0x8825
+# GPS IFD tags we need (same numbers as piexif.GPSIFD)
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+_WANTED_GPS_TAGS = (GPS_LATITUDE_REF, GPS_LATITUDE, GPS_LONGITUDE_REF, GPS_LONGITUDE)
+
+# TIFF field types
+_TYPE_ASCII = 2
+_TYPE_LONG = 4
+_TYPE_RATIONAL = 5
+_TYPE_SRATIONAL = 10
+
+# Sanity limit on entries per IFD; real files have a few dozen
+_MAX_IFD_ENTRIES = 1000
+
+# JPEG markers without a length field
+_STANDALONE_MARKERS = {0x01, 0xD8} | set(range(0xD0, 0xD8))
+_APP1 = 0xE1
+_SOS = 0xDA
+_EOI = 0xD9
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Sanity limit on a PNG chunk's declared length (the format allows up to 2**31 - 1)
+_MAX_PNG_CHUNK = 1 << 31
+# Text chunks that may hold hex-encoded Exif under this keyword
+_PNG_TEXT_CHUNKS = {b"tEXt", b"zTXt", b"iTXt"}
+_PNG_RAW_EXIF_KEY = b"Raw profile type exif\x00"
+
+# ISO-BMFF: "meta" is normally within the first few KB; a larger box is not a real HEIF
+_MAX_META_BYTES = 4 * 1024 * 1024
+# iloc construction methods: offset into the file / into the meta box's idat
+_ILOC_FILE_OFFSET = 0
+_ILOC_IDAT_OFFSET = 1
+
+
+class ExifFormatError(ValueError):
+    """The file is not laid out the way the walker expects (caller may fall back to a full parser)."""
+
+
+def _read_exact(fp: BinaryIO, n: int) -> bytes:
+    data = fp.read(n)
+    if len(data) != n:
+        raise ExifFormatError("unexpected end of file")
+    return data
+
+
+def _read_ifd(fp: BinaryIO, base: int, offset: int, endian: str) -> dict[int, tuple[int, int, bytes]]:
+    """Read one IFD at base+offset. Return {tag: (type, count, 4-byte value/offset field)}."""
+    fp.seek(base + offset)
+    (count,) = struct.unpack(endian + "H", _read_exact(fp, 2))
+    if count > _MAX_IFD_ENTRIES:
+        raise ExifFormatError(f"implausible IFD entry count {count}")
+    raw = _read_exact(fp, 12 * count)
+    entries = {}
+    for i in range(count):
+        tag, typ, n = struct.unpack(endian + "HHI", raw[i * 12:i * 12 + 8])
+        entries[tag] = (typ, n, raw[i * 12 + 8:i * 12 + 12])
+    return entries
+
+
+def _decode_value(fp: BinaryIO, base: int, endian: str, typ: int, count: int, field: bytes):
+    """Decode the ASCII or RATIONAL value of a GPS entry in piexif's representation."""
+    if typ == _TYPE_ASCII:
+        data = field[:count] if count <= 4 else None
+        if data is None:
+            (off,) = struct.unpack(endian + "I", field)
+            fp.seek(base + off)
+            data = _read_exact(fp, count)
+        return data.split(b"\x00", 1)[0]
+    if typ in (_TYPE_RATIONAL, _TYPE_SRATIONAL):
+        if count > 3:
+            count = 3
+        (off,) = struct.unpack(endian + "I", field)
+        fp.seek(base + off)
+        fmt = endian + ("I" if typ == _TYPE_RATIONAL else "i") * (2 * count)
+        nums = struct.unpack(fmt, _read_exact(fp, 8 * count))
+        return tuple((nums[2 * i], nums[2 * i + 1]) for i in range(count))
+    return None
+
+
+def read_tiff_gps(fp: BinaryIO, base: int = 0) -> Optional[dict[int, object]]:
+    """
+    Read the GPS latitude/longitude tags from a TIFF structure starting at
+    byte offset base (0 for a .tif file, the APP1 payload for a JPEG).
+
+    Returns a dict keyed by GPS tag number (values as piexif returns them:
+    refs as bytes, coordinates as ((num, den), ...)), or None if there is no
+    GPS IFD. Raises ExifFormatError on malformed data.
+    """
+    fp.seek(base)
+    header = _read_exact(fp, 8)
+    if header[:2] == b"II":
+        endian = "<"
+    elif header[:2] == b"MM":
+        endian = ">"
+    else:
+        raise ExifFormatError("bad TIFF byte order")
+    magic, ifd0_offset = struct.unpack(endian + "HI", header[2:8])
+    if magic != 42:
+        raise ExifFormatError("bad TIFF magic")
+
+    ifd0 = _read_ifd(fp, base, ifd0_offset, endian)
+    gps_entry = ifd0.get(GPS_IFD_TAG)
+    if gps_entry is None:
+        return None
+    (gps_offset,) = struct.unpack(endian + "I", gps_entry[2])
+
+    gps_ifd = _read_ifd(fp, base, gps_offset, endian)
+    gps: dict[int, object] = {}
+    for tag in _WANTED_GPS_TAGS:
+        if tag in gps_ifd:
+            typ, count, field = gps_ifd[tag]
+            value = _decode_value(fp, base, endian, typ, count, field)
+            if value is not None:
+                gps[tag] = value
+    return gps
+
+
+def read_jpeg_gps(fp: BinaryIO) -> Optional[dict[int, object]]:
+    """
+    Walk JPEG markers to the APP1 Exif segment and read its GPS tags.
+
+    Returns the GPS dict (see read_tiff_gps) or None if the file has no EXIF
+    or no GPS. Raises ExifFormatError if the file is not a well-formed JPEG.
+    """
+    fp.seek(0)
+    if _read_exact(fp, 2) != b"\xff\xd8":
+        raise ExifFormatError("not a JPEG (missing SOI)")
+    while True:
+        byte = _read_exact(fp, 1)
+        if byte != b"\xff":
+            raise ExifFormatError("bad JPEG marker")
+        marker = _read_exact(fp, 1)[0]
+        while marker == 0xFF:  # fill bytes
+            marker = _read_exact(fp, 1)[0]
+        if marker in _STANDALONE_MARKERS:
+            continue
+        if marker in (_SOS, _EOI):
+            return None  # image data starts; metadata segments come before it
+        (length,) = struct.unpack(">H", _read_exact(fp, 2))
+        if length < 2:
+            raise ExifFormatError("bad JPEG segment length")
+        segment_start = fp.tell()
+        if marker == _APP1 and length >= 8 and _read_exact(fp, 6) == b"Exif\x00\x00":
+            return read_tiff_gps(fp, segment_start + 6)
+        fp.seek(segment_start + length - 2)
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield (type, payload start, payload end) for the ISO-BMFF boxes in data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise ExifFormatError("truncated box header")
+            (size,) = struct.unpack(">Q", data[pos + 8:pos + 16])
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ExifFormatError(f"bad size for box {kind!r}")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _read_meta_box(fp: BinaryIO) -> bytes:
+    """Return the payload of the top-level meta box (mdat and other boxes are skipped, not read)."""
+    fp.seek(0)
+    header = _read_exact(fp, 8)
+    if header[4:8] != b"ftyp":
+        raise ExifFormatError("not an ISO-BMFF file (missing ftyp)")
+    pos = 0
+    while True:
+        fp.seek(pos)
+        header = fp.read(16)
+        if len(header) < 8:
+            raise ExifFormatError("no meta box")
+        size, kind = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                raise ExifFormatError("truncated box header")
+            (size,) = struct.unpack(">Q", header[8:16])
+            header_size = 16
+        elif size == 0:
+            if kind != b"meta":
+                raise ExifFormatError("no meta box")
+            size = _MAX_META_BYTES + header_size
+        if size < header_size:
+            raise ExifFormatError(f"bad size for box {kind!r}")
+        if kind == b"meta":
+            if size - header_size > _MAX_META_BYTES:
+                raise ExifFormatError("implausibly large meta box")
+            fp.seek(pos + header_size)
+            data = fp.read(size - header_size)
+            if len(data) < 4:
+                raise ExifFormatError("truncated meta box")
+            return data
+        pos += size
+
+
+def _exif_item_id(iinf: bytes) -> Optional[int]:
+    """The item ID of the first item of type "Exif" in an iinf payload (None if there is none)."""
+    version = iinf[0]
+    start = 4 + (2 if version == 0 else 4)
+    for kind, begin, end in _iter_boxes(iinf, start):
+        if kind != b"infe" or end - begin < 12:
+            continue
+        infe_version = iinf[begin]
+        if infe_version == 2:
+            item_id, item_type = struct.unpack(">H2x4s", iinf[begin + 4:begin + 12])
+        elif infe_version == 3 and end - begin >= 14:
+            item_id, item_type = struct.unpack(">I2x4s", iinf[begin + 4:begin + 14])
+        else:
+            continue  # versions 0/1 predate item types
+        if item_type == b"Exif":
+            return item_id
+    return None
+
+
+def _uint(data: bytes, pos: int, size: int) -> tuple[int, int]:
+    """Read a big-endian unsigned integer of size 0, 4 or 8 bytes; return (value, next pos)."""
+    if size == 0:
+        return 0, pos
+    if size not in (4, 8) or pos + size > len(data):
+        raise ExifFormatError("bad iloc field")
+    return int.from_bytes(data[pos:pos + size], "big"), pos + size
+
+
+def _item_extents(iloc: bytes, wanted: int) -> Optional[tuple[int, list[tuple[int, int]]]]:
+    """Return (construction method, [(offset, length), ...]) for item wanted from an iloc payload."""
+    version = iloc[0]
+    if version > 2 or len(iloc) < 8:
+        raise ExifFormatError(f"unsupported iloc version {version}")
+    offset_size, length_size = iloc[4] >> 4, iloc[4] & 0x0F
+    base_offset_size = iloc[5] >> 4
+    index_size = iloc[5] & 0x0F if version in (1, 2) else 0
+    if version < 2:
+        (count,), pos = struct.unpack(">H", iloc[6:8]), 8
+    else:
+        (count,), pos = struct.unpack(">I", iloc[6:10]), 10
+    id_format, id_size = (">H", 2) if version < 2 else (">I", 4)
+    for _ in range(count):
+        if pos + id_size > len(iloc):
+            raise ExifFormatError("truncated iloc box")
+        (item_id,) = struct.unpack(id_format, iloc[pos:pos + id_size])
+        pos += id_size
+        method = 0
+        if version in (1, 2):
+            (method,) = struct.unpack(">H", iloc[pos:pos + 2])
+            method &= 0x0F
+            pos += 2
+        pos += 2  # data_reference_index
+        base_offset, pos = _uint(iloc, pos, base_offset_size)
+        if pos + 2 > len(iloc):
+            raise ExifFormatError("truncated iloc box")
+        (extent_count,) = struct.unpack(">H", iloc[pos:pos + 2])
+        pos += 2
+        extents = []
+        for _ in range(extent_count):
+            _, pos = _uint(iloc, pos, index_size)
+            offset, pos = _uint(iloc, pos, offset_size)
+            length, pos = _uint(iloc, pos, length_size)
+            extents.append((base_offset + offset, length))
+        if item_id == wanted:
+            return method, extents
+    return None
+
+
+def read_heif_gps(fp: BinaryIO) -> Optional[dict[int, object]]:
+    """
+    Find the Exif item of a HEIC/HEIF file through meta/iinf/iloc and read
+    its GPS tags, without decoding the image.
+
+    Returns the GPS dict (see read_tiff_gps) or None if the file has no Exif
+    item or no GPS. Raises ExifFormatError if the boxes are not laid out as
+    expected (e.g. an item stored in a way this walker does not follow).
+    """
+    meta = _read_meta_box(fp)
+    try:
+        boxes = {kind: (begin, end) for kind, begin, end in _iter_boxes(meta, 4)}  # meta is a full box
+        if b"iinf" not in boxes or b"iloc" not in boxes:
+            return None
+        item_id = _exif_item_id(meta[slice(*boxes[b"iinf"])])
+        if item_id is None:
+            return None
+        located = _item_extents(meta[slice(*boxes[b"iloc"])], item_id)
+    except (struct.error, IndexError) as e:
+        raise ExifFormatError(f"truncated HEIF box: {e}") from e
+    if not located or not located[1]:
+        raise ExifFormatError("Exif item has no location")
+    method, extents = located
+    if method == _ILOC_FILE_OFFSET and len(extents) == 1:
+        item_start = extents[0][0]  # read the TIFF straight from the file, like a JPEG
+    elif method in (_ILOC_FILE_OFFSET, _ILOC_IDAT_OFFSET):
+        if method == _ILOC_IDAT_OFFSET:
+            if b"idat" not in boxes:
+                raise ExifFormatError("Exif item in idat, but no idat box")
+            idat_start, idat_end = boxes[b"idat"]
+            source = io.BytesIO(meta[idat_start:idat_end])
+        else:
+            source = fp
+        parts = []
+        for offset, length in extents:
+            if length == 0 or length > _MAX_META_BYTES:
+                raise ExifFormatError("unsupported Exif extent length")
+            source.seek(offset)
+            parts.append(_read_exact(source, length))
+        fp, item_start = io.BytesIO(b"".join(parts)), 0
+    else:
+        raise ExifFormatError(f"unsupported iloc construction method {method}")
+    # The item starts with the offset of the TIFF header (after "Exif\0\0") within the rest
+    fp.seek(item_start)
+    (tiff_offset,) = struct.unpack(">I", _read_exact(fp, 4))
+    return read_tiff_gps(fp, item_start + 4 + tiff_offset)
+
+
+def read_png_gps(fp: BinaryIO) -> Optional[dict[int, object]]:
+    """
+    Scan PNG chunks for eXIf and read its GPS tags. Chunk payloads other
+    than eXIf (image data included) are skipped with a seek, not read.
+
+    Returns the GPS dict (see read_tiff_gps) or None if the file has no eXIf
+    chunk or no GPS. Raises ExifFormatError if the file is not a PNG, and
+    for Exif kept hex-encoded in a text chunk (ImageMagick's "Raw profile
+    type exif"), which is left to Pillow.
+    """
+    fp.seek(0)
+    if _read_exact(fp, 8) != _PNG_SIGNATURE:
+        raise ExifFormatError("not a PNG (bad signature)")
+    pos = 8
+    while True:
+        fp.seek(pos)
+        header = fp.read(8)
+        if len(header) < 8:
+            return None  # ended without IEND; treat like a file without eXIf
+        length, kind = struct.unpack(">I4s", header)
+        if length >= _MAX_PNG_CHUNK:
+            raise ExifFormatError("bad PNG chunk length")
+        if kind == b"eXIf":
+            return read_tiff_gps(fp, pos + 8)
+        if kind == b"IEND":
+            return None
+        if kind in _PNG_TEXT_CHUNKS and fp.read(len(_PNG_RAW_EXIF_KEY)) == _PNG_RAW_EXIF_KEY:
+            raise ExifFormatError("Exif in a PNG text chunk")
+        pos += 12 + length  # length, type, data, CRC
+
+
+# Readers by file format, as named by sniff_format
+GPS_READERS = {"jpeg": read_jpeg_gps, "tiff": read_tiff_gps, "png": read_png_gps, "heif": read_heif_gps}
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """Name the format ("jpeg", "tiff", "png" or "heif") from a file's first 12 bytes, or None."""
+    if head[:2] == b"\xff\xd8":
+        return "jpeg"
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    if head[:8] == _PNG_SIGNATURE:
+        return "png"
+    if head[4:8] == b"ftyp":
+        return "heif"
+    return None
+
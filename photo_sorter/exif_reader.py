@@ -6,27 +6,61 @@ Copyright (c) 2026 Benjoe Vidal
 Licensed under the MIT License.
 """
 
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
 
-try:
-    import piexif
-except ImportError:
-    piexif = None
-
-# Optional HEIC support
-try:
-    import pillow_heif
-    pillow_heif.register_heif_opener()
-    _HEIC_AVAILABLE = True
-except ImportError:
-    _HEIC_AVAILABLE = False
-
-from PIL import Image
+from .exif_gps import (
+    GPS_IFD_TAG,
+    GPS_LATITUDE,
+    GPS_LATITUDE_REF,
+    GPS_LONGITUDE,
+    GPS_LONGITUDE_REF,
+    GPS_READERS,
+    ExifFormatError,
+    sniff_format,
+)
+from .stats import StageStats
 
 
 # Supported image extensions (lowercase)
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".heic", ".heif", ".tiff", ".tif"}
+# Raised whenever files that used to give "no GPS" become readable, so
+# metadata indexes written by older versions re-read those files
+# (1: HEIC/HEIF read without pillow-heif, 2: PNG eXIf and Pillow fallback)
+GPS_READER_VERSION = 2
+# Paths per task when extracting in worker processes (amortises pickling/IPC)
+_PROCESS_CHUNK_SIZE = 32
+
+
+# Pillow, piexif and pillow-heif are imported on first use: most files are
+# read by the header walkers and never need them, and importing Pillow
+# alone costs more than the rest of the CLI's startup
+
+
+@functools.cache
+def _piexif():
+    """The piexif module, or None if it is not installed."""
+    try:
+        import piexif
+    except ImportError:
+        return None
+    return piexif
+
+
+@functools.cache
+def _heic_available() -> bool:
+    """True if pillow-heif is installed (its HEIF opener is registered with Pillow on the first call)."""
+    try:
+        import pillow_heif
+    except ImportError:
+        return False
+    pillow_heif.register_heif_opener()
+    return True
 
 
 def _convert_to_degrees(value) -> float:
@@ -74,28 +108,17 @@ def _convert_to_degrees(value) -> float:
         return 0.0
 
 
-def _gps_from_piexif(file_path: Path) -> Optional[tuple[float, float]]:
+def _coords_from_gps_ifd(gps: dict) -> Optional[tuple[float, float]]:
     """
-    Use piexif to load EXIF and extract GPS lat/lon.
-    Returns (latitude, longitude) or None if not available.
+    Convert a GPS IFD dict (keyed by GPS tag number, as piexif returns it)
+    to (latitude, longitude). Returns None if tags are missing or invalid.
     """
-    if piexif is None:
-        return None
-    try:
-        exif_dict = piexif.load(str(file_path))
-    except Exception:
-        return None
-
-    gps = exif_dict.get("GPS")
-    if not gps:
-        return None
-
-    # piexif.GPSIFD: LatitudeRef, Latitude, LongitudeRef, Longitude
+    # GPS tags: 1 LatitudeRef, 2 Latitude, 3 LongitudeRef, 4 Longitude
     # Latitude: 1 = N, 2 = S; Longitude: 1 = E, 2 = W
-    lat_ref = gps.get(piexif.GPSIFD.GPSLatitudeRef)
-    lat_val = gps.get(piexif.GPSIFD.GPSLatitude)
-    lon_ref = gps.get(piexif.GPSIFD.GPSLongitudeRef)
-    lon_val = gps.get(piexif.GPSIFD.GPSLongitude)
+    lat_ref = gps.get(GPS_LATITUDE_REF)
+    lat_val = gps.get(GPS_LATITUDE)
+    lon_ref = gps.get(GPS_LONGITUDE_REF)
+    lon_val = gps.get(GPS_LONGITUDE)
 
     if not all([lat_ref, lat_val, lon_ref, lon_val]):
         return None
@@ -123,24 +146,87 @@ def _gps_from_piexif(file_path: Path) -> Optional[tuple[float, float]]:
     return (lat, lon)
 
 
-def _gps_from_pillow(file_path: Path) -> Optional[tuple[float, float]]:
+def _gps_from_piexif(fp: BinaryIO) -> Optional[tuple[float, float]]:
     """
-    Fallback: use Pillow's getexif() to read GPS if piexif failed or not installed.
+    Use piexif to load EXIF from the open file and extract GPS lat/lon.
+    Returns (latitude, longitude) or None if not available.
     """
+    piexif = _piexif()
+    if piexif is None:
+        return None
     try:
-        img = Image.open(file_path)
-        exif = img.getexif() if hasattr(img, "getexif") else None
-        img.close()
+        fp.seek(0)
+        exif_dict = piexif.load(fp.read())
     except Exception:
         return None
 
-    if exif is None:
+    gps = exif_dict.get("GPS")
+    if not gps:
         return None
 
-    # EXIF GPS tag 34853 is the GPS IFD; we'd need to parse it manually.
-    # Pillow doesn't expose GPS as a simple (lat, lon). So we rely on piexif
-    # as primary. This fallback is minimal and can be extended.
-    return None
+    return _coords_from_gps_ifd(gps)
+
+
+def _gps_from_pillow(fp: BinaryIO) -> Optional[tuple[float, float]]:
+    """
+    Last resort: let Pillow identify the open file and read its GPS IFD
+    (getexif().get_ifd(0x8825)). Only the header is parsed; no pixels are
+    decoded.
+    """
+    from PIL import Image
+
+    try:
+        fp.seek(0)
+        with Image.open(fp) as img:
+            gps = img.getexif().get_ifd(GPS_IFD_TAG)
+    except Exception:
+        return None
+    if not gps:
+        return None
+    return _coords_from_gps_ifd(gps)
+
+
+# Bytes handed to the GPS readers by this thread (see _timed_gps_results)
+_io = threading.local()
+
+
+class _CountingFile:
+    """Wraps an open file and adds every byte read from it to this thread's _io.bytes_read."""
+    __slots__ = ("_fp",)
+
+    def __init__(self, fp: BinaryIO):
+        self._fp = fp
+
+    def _count(self, n: int) -> None:
+        _io.bytes_read = getattr(_io, "bytes_read", 0) + n
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fp.read(size)
+        self._count(len(data))
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        data = self._fp.read1(size)
+        self._count(len(data))
+        return data
+
+    def readinto(self, buffer) -> int:
+        n = self._fp.readinto(buffer)
+        self._count(n or 0)
+        return n
+
+    def readline(self, size: int = -1) -> bytes:
+        data = self._fp.readline(size)
+        self._count(len(data))
+        return data
+
+    def __getattr__(self, name):
+        # seek, tell, fileno, ... go straight to the file
+        return getattr(self._fp, name)
+
+
+# Formats piexif can load (None: magic bytes not recognised, e.g. WebP)
+_PIEXIF_FORMATS = {"jpeg", "tiff", None}
 
 
 def get_gps_from_image(file_path: str | Path) -> Optional[tuple[float, float]]:
@@ -152,7 +238,11 @@ def get_gps_from_image(file_path: str | Path) -> Optional[tuple[float, float]]:
     - No GPS in EXIF: returns None
     - Corrupted or partial metadata: returns None (no exception)
 
-    Supported formats: JPEG, PNG, HEIC (if pillow-heif installed), TIFF.
+    Supported formats: JPEG, PNG, HEIC/HEIF, TIFF. The file is opened once
+    and its magic bytes pick the cheapest reader: a header walker that
+    reads only the metadata (see exif_gps). Only when the walker cannot
+    follow the file does it fall back to piexif (JPEG/TIFF) and then
+    Pillow (HEIC/HEIF needs pillow-heif for that).
 
     Args:
         file_path: Path to the image file.
@@ -161,24 +251,133 @@ def get_gps_from_image(file_path: str | Path) -> Optional[tuple[float, float]]:
         (latitude, longitude) as decimal degrees, or None if unavailable.
     """
     path = Path(file_path)
-    if not path.is_file():
-        return None
-
-    suffix = path.suffix.lower()
-    if suffix not in IMAGE_EXTENSIONS:
+    if path.suffix.lower() not in IMAGE_EXTENSIONS:
         return None
-
-    if suffix in (".heic", ".heif") and not _HEIC_AVAILABLE:
+    try:
+        raw = open(path, "rb")
+    except OSError:  # missing, a directory, unreadable
         return None
 
-    # Prefer piexif (more reliable for EXIF/GPS)
-    coords = _gps_from_piexif(path)
-    if coords is not None:
-        return coords
-
-    return _gps_from_pillow(path)
+    with raw:
+        fp = _CountingFile(raw)
+        fmt = None
+        try:
+            fmt = sniff_format(fp.read(12))
+            if fmt is not None:
+                gps = GPS_READERS[fmt](fp)
+                return _coords_from_gps_ifd(gps) if gps else None
+        except (ExifFormatError, OSError):
+            pass
+
+        # The walker could not follow the file: try the full parsers
+        if fmt in _PIEXIF_FORMATS:
+            coords = _gps_from_piexif(fp)
+            if coords is not None:
+                return coords
+        if fmt == "heif" and not _heic_available():
+            return None
+        return _gps_from_pillow(fp)
 
 
 def is_image_file(path: str | Path) -> bool:
     """Return True if the path has a supported image extension."""
     return Path(path).suffix.lower() in IMAGE_EXTENSIONS
+
+
+# Result of extracting GPS from one file: (path, (lat, lon) or None, error message or None)
+GpsResult = tuple[Path, Optional[tuple[float, float]], Optional[str]]
+
+
+def _gps_results(paths: list[Path]) -> list[GpsResult]:
+    """Extract GPS for a batch of paths, turning exceptions into error messages."""
+    results: list[GpsResult] = []
+    for path in paths:
+        try:
+            results.append((path, get_gps_from_image(path), None))
+        except Exception as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+def _timed_gps_results(paths: list[Path]) -> tuple[list[GpsResult], float, float, int]:
+    """
+    _gps_results plus the wall and CPU seconds it took and the bytes the
+    readers read from the files (measured where it ran).
+    """
+    _io.bytes_read = 0
+    wall, cpu = time.perf_counter(), time.thread_time()
+    results = _gps_results(paths)
+    return results, time.perf_counter() - wall, time.thread_time() - cpu, _io.bytes_read
+
+
+def iter_gps_from_images(
+    paths: Iterable[Path],
+    workers: int = 1,
+    use_processes: bool = False,
+    lookup: Optional[Callable[[Path], Optional[GpsResult]]] = None,
+    stats: Optional[StageStats] = None,
+) -> Iterator[GpsResult]:
+    """
+    Extract GPS from many images, yielding (path, gps, error) in input order.
+
+    With workers > 1 the work is spread over a thread pool (good for network
+    shares, where reads wait on I/O) or a process pool (use_processes=True, for
+    CPU-bound parsing). Only a bounded number of tasks is in flight, so paths
+    may be a lazy iterable and results are yielded as soon as they are ready.
+
+    lookup, if given, is called for each path first (in the calling thread);
+    when it returns a result (e.g. from a metadata index) the file is not read.
+
+    stats, if given, receives the wall and CPU time of every file read and
+    the bytes read from it.
+    """
+    read = _gps_results if stats is None else _timed_gps_results
+
+    def unpack(done) -> list[GpsResult]:
+        if stats is None:
+            return done
+        results, wall, cpu, nbytes = done
+        stats.add(len(results), wall, cpu, bytes_read=nbytes)
+        return results
+
+    if workers <= 1:
+        for path in paths:
+            known = lookup(path) if lookup is not None else None
+            if known is not None:
+                yield known
+            else:
+                yield from unpack(read([path]))
+        return
+
+    chunk_size = _PROCESS_CHUNK_SIZE if use_processes else 1
+    max_in_flight = workers * 4
+    if use_processes:
+        from concurrent.futures import ProcessPoolExecutor as executor_cls  # multiprocessing is slow to import
+    else:
+        executor_cls = ThreadPoolExecutor
+    with executor_cls(max_workers=workers) as executor:
+        # Futures for files being read, or plain result lists for known files
+        pending: deque[Future | list[GpsResult]] = deque()
+        chunk: list[Path] = []
+
+        def drain(limit: int) -> Iterator[GpsResult]:
+            while len(pending) > limit:
+                item = pending.popleft()
+                yield from (unpack(item.result()) if isinstance(item, Future) else item)
+
+        for path in paths:
+            known = lookup(path) if lookup is not None else None
+            if known is None:
+                chunk.append(path)
+                if len(chunk) < chunk_size:
+                    continue
+            # Submit the chunk before queueing a known result so order is kept
+            if chunk:
+                pending.append(executor.submit(read, chunk))
+                chunk = []
+            if known is not None:
+                pending.append([known])
+            yield from drain(max_in_flight)
+        if chunk:
+            pending.append(executor.submit(read, chunk))
+        yield from drain(0)
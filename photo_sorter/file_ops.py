@@ -5,9 +5,53 @@ Copyright (c) 2026 Benjoe Vidal
 Licensed under the MIT License.
 """
 
+import errno
+import os
 import shutil
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# How copy_image places a file: a real copy, a link to the source, or a
+# copy-on-write clone; "auto" picks the cheapest one the filesystem supports
+LINK_MODES = ("copy", "hardlink", "symlink", "reflink", "auto")
+# ioctl request for a copy-on-write clone of a whole file (Linux: btrfs, XFS, ...)
+_FICLONE = 0x40049409
+# (source device, destination device) pairs where reflinks already failed
+_no_reflink: set[tuple[int, int]] = set()
+# Bytes asked of the kernel per copy_file_range / sendfile call
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+# Buffer size for the user-space fallback copy
+_BUFFER_SIZE = 1024 * 1024
+# Errors meaning "this kernel copy call is not available here", not an I/O failure
+_KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+
+@dataclass
+class CopyStats:
+    """Totals for copied file data; safe to update from several threads."""
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, nbytes: int, seconds: float) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes += nbytes
+            self.seconds += seconds
+
+    @property
+    def rate(self) -> float:
+        """Bytes per second spent copying (0 if nothing was copied)."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
 
 
 def ensure_directory(path: str | Path) -> Path:
@@ -36,29 +80,324 @@ def unique_destination_path(dest_dir: Path, filename: str) -> Path:
         n += 1
 
 
-def copy_image(source: Path, dest_dir: Path, dest_filename: Optional[str] = None) -> Path:
+def _kernel_copy(call, src_fd: int, dst_fd: int) -> Optional[int]:
+    """
+    Copy src_fd to dst_fd with call(src_fd, dst_fd, count) until EOF. Returns
+    the byte count, or None if the call is not supported for these files.
+    A first call that copies nothing also counts as unsupported: overlayfs,
+    FUSE and some NFS/CIFS kernels return 0 for non-empty files.
+    """
+    copied = 0
+    while True:
+        try:
+            n = call(src_fd, dst_fd, COPY_CHUNK_SIZE)
+        except OSError as e:
+            if copied == 0 and e.errno in _KERNEL_COPY_UNSUPPORTED:
+                return None
+            raise
+        if n == 0:
+            return copied if copied else None
+        copied += n
+
+
+def copy_file(source: Path, dest_path: Path, stats: Optional[CopyStats] = None) -> int:
+    """
+    Copy file data and metadata like shutil.copy2, letting the kernel move the
+    data: os.copy_file_range (server-side copy on NFS 4.2/SMB, no user-space
+    buffers), else os.sendfile, else a buffered copy. Returns the bytes copied
+    and adds them to stats if given. A kernel copy that falls short of the
+    source size is redone with the buffered copy; OSError if that is short too.
+    """
+    start = time.perf_counter()
+    with open(source, "rb") as src, open(dest_path, "wb") as dst:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        size = os.fstat(src_fd).st_size
+        copied = None
+        if hasattr(os, "copy_file_range"):
+            copied = _kernel_copy(os.copy_file_range, src_fd, dst_fd)
+        if copied is None and hasattr(os, "sendfile") and os.name == "posix":
+            copied = _kernel_copy(
+                lambda i, o, count: os.sendfile(o, i, None, count), src_fd, dst_fd
+            )
+        if copied is not None and copied != size:
+            copied = None
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+        if copied is None:
+            shutil.copyfileobj(src, dst, _BUFFER_SIZE)
+            copied = dst.tell()
+        if copied != size:
+            raise OSError(errno.EIO, f"short copy: {copied} of {size} bytes", str(source))
+    shutil.copystat(source, dest_path)
+    if stats is not None:
+        stats.add(copied, time.perf_counter() - start)
+    return copied
+
+
+def reflink_file(source: Path, dest_path: Path) -> None:
+    """
+    Create dest_path as a copy-on-write clone of source (FICLONE): no data is
+    copied and no extra space is used until one side changes. Metadata is
+    copied like shutil.copy2. Raises OSError if the filesystem cannot do it.
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(source, "rb") as src, open(dest_path, "xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(dest_path)
+            raise
+    shutil.copystat(source, dest_path)
+
+
+def _try_reflink(source: Path, dest_path: Path) -> bool:
+    """Reflink if this pair of filesystems supports it; remember when it does not."""
+    try:
+        devices = (os.stat(source).st_dev, os.stat(dest_path.parent).st_dev)
+    except OSError:
+        return False
+    if devices in _no_reflink:
+        return False
+    try:
+        reflink_file(source, dest_path)
+        return True
+    except OSError as e:
+        if e.errno == errno.EEXIST:
+            raise
+        _no_reflink.add(devices)
+        return False
+
+
+def _link(source: Path, dest_path: Path, link_mode: str) -> Optional[str]:
+    """Create dest_path as a reflink/hardlink/symlink per link_mode; None if not possible."""
+    if link_mode in ("reflink", "auto") and _try_reflink(source, dest_path):
+        return "reflink"
+    if link_mode in ("hardlink", "auto"):
+        try:
+            os.link(source, dest_path)
+            return "hardlink"
+        except FileExistsError:
+            raise
+        except OSError:
+            pass  # other filesystem, or links not supported: copy instead
+    if link_mode == "symlink":
+        try:
+            os.symlink(Path(source).resolve(), dest_path)
+            return "symlink"
+        except FileExistsError:
+            raise
+        except OSError:
+            pass  # e.g. Windows without symlink privilege
+    return None
+
+
+def place_file(
+    source: Path,
+    dest_path: Path,
+    link_mode: str = "copy",
+    stats: Optional[CopyStats] = None,
+    replace: bool = False,
+) -> str:
+    """
+    Create dest_path from source using link_mode (see LINK_MODES) and return
+    the method actually used. hardlink, symlink and reflink fall back to a
+    copy when the filesystem or platform cannot do them; auto tries a
+    reflink, then a hardlink, then copies. Copies are added to stats.
+
+    Links never overwrite an existing dest_path unless replace is True (used
+    for placeholders claimed by DestinationRegistry); the link is then made
+    under a temporary name and renamed over dest_path.
+    """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"link_mode must be one of {', '.join(LINK_MODES)}, got {link_mode!r}")
+    if link_mode != "copy":
+        target = dest_path.with_name(f".{dest_path.name}.{os.getpid()}.{threading.get_ident()}.tmp") if replace else dest_path
+        try:
+            used = _link(source, target, link_mode)
+            if used is not None and replace:
+                os.replace(target, dest_path)
+        except BaseException:
+            if replace and os.path.lexists(target):
+                os.unlink(target)
+            raise
+        if used is not None:
+            return used
+    copy_file(source, dest_path, stats)
+    return "copy"
+
+
+class DestinationRegistry:
+    """
+    Hands out collision-free destination names without probing the disk.
+
+    Each destination folder is listed once with os.scandir; taken names are
+    then tracked in memory, with a per-name counter so the next "(n)" suffix
+    is found without retrying the ones before it. A claimed name is reserved
+    on disk by creating an empty placeholder with O_CREAT | O_EXCL, so other
+    threads or processes writing to the same folder never pick the same
+    name. Names are compared with os.path.normcase. Safe to share between threads.
+
+    With reserve_on_disk=False names are only reserved in memory, which is
+    how a dry run plans final filenames without touching the output.
+
+    If reusable is set, it is asked about each empty file found when a folder
+    is first listed; names it accepts (e.g. placeholders an interrupted run
+    claimed but never wrote) are handed out again instead of skipped.
+    """
+
+    def __init__(self, reserve_on_disk: bool = True, reusable: Optional[Callable[[Path], bool]] = None):
+        self.reserve_on_disk = reserve_on_disk
+        self.reusable = reusable
+        self._lock = threading.Lock()
+        self._taken: dict[str, set[str]] = {}  # folder -> normcased names
+        self._reusable: dict[str, set[str]] = {}  # folder -> normcased names of empty files to reuse
+        self._next: dict[tuple[str, str], int] = {}  # (folder, normcased name) -> next suffix to try
+
+    def _names(self, folder: str) -> set[str]:
+        names = self._taken.get(folder)
+        if names is None:
+            names, reusable = set(), set()
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        name = os.path.normcase(entry.name)
+                        if self.reusable is not None and self._is_reusable(entry):
+                            reusable.add(name)
+                        else:
+                            names.add(name)
+            except FileNotFoundError:
+                pass
+            self._taken[folder] = names
+            self._reusable[folder] = reusable
+        return names
+
+    def _is_reusable(self, entry: os.DirEntry) -> bool:
+        try:
+            if not entry.is_file(follow_symlinks=False) or entry.stat(follow_symlinks=False).st_size:
+                return False
+        except OSError:
+            return False
+        return self.reusable(Path(entry.path))
+
+    def claim(self, dest_dir: Path, filename: str) -> Path:
+        """
+        Reserve and return dest_dir/filename, or "stem (n).ext" with the
+        smallest free n, creating an empty placeholder file there (unless
+        reserve_on_disk is False).
+        """
+        folder = os.path.abspath(dest_dir)
+        stem, suffix = os.path.splitext(filename)
+        counter_key = (folder, os.path.normcase(filename))
+        with self._lock:
+            names = self._names(folder)
+            n = self._next.get(counter_key, 0)
+            while True:
+                candidate = filename if n == 0 else f"{stem} ({n}){suffix}"
+                n += 1
+                if os.path.normcase(candidate) in names:
+                    continue
+                path = Path(dest_dir) / candidate
+                if os.path.normcase(candidate) in self._reusable[folder]:
+                    self._reusable[folder].discard(os.path.normcase(candidate))  # already on disk
+                elif self.reserve_on_disk:
+                    try:
+                        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+                    except FileExistsError:
+                        names.add(os.path.normcase(candidate))  # created by someone else
+                        continue
+                names.add(os.path.normcase(candidate))
+                self._next[counter_key] = n
+                return path
+
+    def release(self, path: Path) -> None:
+        """Remove the placeholder at path (after a failed copy) and free its name."""
+        if self.reserve_on_disk:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        folder = os.path.abspath(path.parent)
+        with self._lock:
+            self._taken.get(folder, set()).discard(os.path.normcase(path.name))
+            # Restart this folder's counters so the freed name is handed out again
+            self._next = {key: n for key, n in self._next.items() if key[0] != folder}
+
+
+def move_file(source: Path, dest_path: Path) -> None:
+    """
+    Move source to dest_path, replacing a placeholder there: an atomic rename
+    on the same filesystem, else shutil.move.
+    """
+    try:
+        os.replace(source, dest_path)
+    except OSError:
+        shutil.move(str(source), str(dest_path))
+
+
+def copy_image(
+    source: Path,
+    dest_dir: Path,
+    dest_filename: Optional[str] = None,
+    link_mode: str = "copy",
+    stats: Optional[CopyStats] = None,
+    registry: Optional[DestinationRegistry] = None,
+    dest_exists: bool = False,
+) -> Path:
     """
     Copy the file at source into dest_dir. Use dest_filename if provided,
     otherwise source.name. Avoids overwriting by adding (1), (2), ... if needed.
+    link_mode can link or clone instead of copying (see place_file); bytes
+    actually copied are added to stats. With a registry, the name is claimed
+    from it instead of probing the folder. Pass dest_exists=True when the
+    caller has already created dest_dir, to skip the mkdir.
 
     Returns the path of the copied file.
     """
-    ensure_directory(dest_dir)
+    if not dest_exists:
+        ensure_directory(dest_dir)
     name = dest_filename if dest_filename is not None else source.name
-    dest_path = unique_destination_path(dest_dir, name)
-    shutil.copy2(source, dest_path)
+    if registry is None:
+        dest_path = unique_destination_path(dest_dir, name)
+        place_file(source, dest_path, link_mode, stats)
+        return dest_path
+    dest_path = registry.claim(dest_dir, name)
+    try:
+        place_file(source, dest_path, link_mode, stats, replace=True)
+    except BaseException:
+        registry.release(dest_path)
+        raise
     return dest_path
 
 
-def move_image(source: Path, dest_dir: Path, dest_filename: Optional[str] = None) -> Path:
+def move_image(
+    source: Path,
+    dest_dir: Path,
+    dest_filename: Optional[str] = None,
+    registry: Optional[DestinationRegistry] = None,
+    dest_exists: bool = False,
+) -> Path:
     """
     Move the file at source into dest_dir. Use dest_filename if provided,
     otherwise source.name. Avoids overwriting by adding (1), (2), ... if needed.
+    With a registry, the name is claimed from it instead of probing the folder.
+    Pass dest_exists=True when the caller has already created dest_dir.
 
     Returns the path of the moved file.
     """
-    ensure_directory(dest_dir)
+    if not dest_exists:
+        ensure_directory(dest_dir)
     name = dest_filename if dest_filename is not None else source.name
-    dest_path = unique_destination_path(dest_dir, name)
-    shutil.move(str(source), str(dest_path))
+    if registry is None:
+        dest_path = unique_destination_path(dest_dir, name)
+        shutil.move(str(source), str(dest_path))
+        return dest_path
+    dest_path = registry.claim(dest_dir, name)
+    try:
+        move_file(source, dest_path)
+    except BaseException:
+        registry.release(dest_path)
+        raise
     return dest_path
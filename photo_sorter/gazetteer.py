@@ -0,0 +1,200 @@
+"""
+Offline reverse geocoding from a local place table (GeoNames dump or a simple
+CSV), indexed in an array-backed KD-tree so nearest-place lookups need no
+network and take microseconds.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import csv
+import math
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .geocode_client import GeocodeError
+
+EARTH_RADIUS_KM = 6371.0
+# Places farther than this from a photo are not used (e.g. photos at sea)
+DEFAULT_MAX_DISTANCE_KM = 50.0
+# Population at or above which a place is reported as a city / town
+CITY_POPULATION = 100_000
+TOWN_POPULATION = 10_000
+
+# Column positions in GeoNames dumps (allCountries.txt, cities500.txt, ...)
+_GN_NAME, _GN_ASCIINAME, _GN_LAT, _GN_LON = 1, 2, 4, 5
+_GN_FEATURE_CLASS, _GN_FEATURE_CODE, _GN_COUNTRY, _GN_POPULATION = 6, 7, 8, 14
+
+
+def _unit_vector(lat: float, lon: float) -> tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def _address_key(feature_class: str, feature_code: str, population: int) -> str:
+    """Nominatim address field that best describes a place of this kind."""
+    if feature_class and feature_class != "P":
+        return "tourism"  # parks, landmarks, islands, ...
+    if feature_code == "PPLX":
+        return "suburb"
+    if population >= CITY_POPULATION:
+        return "city"
+    if population >= TOWN_POPULATION:
+        return "town"
+    return "village"
+
+
+def _read_geonames(path: Path) -> Iterator[tuple[str, float, float, str, str]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) <= _GN_POPULATION:
+                continue
+            try:
+                lat, lon = float(cols[_GN_LAT]), float(cols[_GN_LON])
+                population = int(cols[_GN_POPULATION] or 0)
+            except ValueError:
+                continue
+            name = cols[_GN_NAME] or cols[_GN_ASCIINAME]
+            if name:
+                kind = _address_key(cols[_GN_FEATURE_CLASS], cols[_GN_FEATURE_CODE], population)
+                yield name, lat, lon, kind, cols[_GN_COUNTRY]
+
+
+def _read_csv(path: Path) -> Iterator[tuple[str, float, float, str, str]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        fields = {name.lower(): name for name in reader.fieldnames or []}
+        if not {"name", "lat", "lon"} <= fields.keys():
+            raise ValueError(f"{path}: CSV gazetteer needs name, lat and lon columns")
+        for row in reader:
+            try:
+                lat, lon = float(row[fields["lat"]]), float(row[fields["lon"]])
+                population = int(row.get(fields.get("population", ""), "") or 0)
+            except (TypeError, ValueError):
+                continue
+            name = (row[fields["name"]] or "").strip()
+            if name:
+                kind = (row.get(fields.get("kind", ""), "") or "").strip() or _address_key("P", "", population)
+                yield name, lat, lon, kind, (row.get(fields.get("country", ""), "") or "").strip()
+
+
+class Gazetteer:
+    """
+    Nearest-place index over a fixed list of named points.
+
+    Points are stored as 3D unit vectors in flat arrays, permuted into
+    KD-tree order (each range's median is its node), so the tree needs no
+    per-node objects. reverse() has the same shape as NominatimClient.reverse
+    and can be passed to get_place_name as its client.
+    """
+
+    def __init__(
+        self,
+        places: list[tuple[str, float, float, str, str]],
+        max_distance_km: float = DEFAULT_MAX_DISTANCE_KM,
+    ):
+        self.max_distance_km = max_distance_km
+        order = list(range(len(places)))
+        vectors = [_unit_vector(p[1], p[2]) for p in places]
+        self._axes = array("b", bytes(len(places)))
+        self._build(order, vectors, 0, len(order))
+        self._xyz = [array("d", (vectors[i][axis] for i in order)) for axis in range(3)]
+        self._lats = array("d", (places[i][1] for i in order))
+        self._lons = array("d", (places[i][2] for i in order))
+        self._names = [places[i][0] for i in order]
+        self._kinds = [places[i][3] for i in order]
+        self._countries = [places[i][4] for i in order]
+
+    @classmethod
+    def load(cls, path: str | Path, max_distance_km: float = DEFAULT_MAX_DISTANCE_KM) -> "Gazetteer":
+        """
+        Load a GeoNames dump (tab-separated, e.g. cities500.txt) or a CSV with
+        a header row containing name, lat, lon and optionally country,
+        population and kind (a Nominatim address field such as suburb).
+        """
+        path = Path(path)
+        if not path.is_file():
+            raise FileNotFoundError(f"Gazetteer file not found: {path}")
+        reader = _read_csv if path.suffix.lower() == ".csv" else _read_geonames
+        places = list(reader(path))
+        if not places:
+            raise ValueError(f"{path}: no places found")
+        return cls(places, max_distance_km)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _build(self, order: list[int], vectors: list, lo: int, hi: int) -> None:
+        # Axes cycle x, y, z by depth; points on a sphere spread over all three
+        stack = [(lo, hi, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= 1:
+                continue
+            order[lo:hi] = sorted(order[lo:hi], key=lambda i: vectors[i][axis])
+            mid = (lo + hi) // 2
+            self._axes[mid] = axis
+            stack.append((lo, mid, (axis + 1) % 3))
+            stack.append((mid + 1, hi, (axis + 1) % 3))
+
+    def nearest(self, lat: float, lon: float) -> Optional[tuple[int, float]]:
+        """Return (position, distance_km) of the closest place, or None if empty."""
+        if not self._names:
+            return None
+        q = _unit_vector(lat, lon)
+        xs, ys, zs = self._xyz
+        coords = self._xyz
+        axes = self._axes
+        best, best_d2 = -1, math.inf
+        stack = [(0, len(self._names), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if bound >= best_d2:
+                continue
+            while lo < hi:
+                mid = (lo + hi) // 2
+                dx, dy, dz = q[0] - xs[mid], q[1] - ys[mid], q[2] - zs[mid]
+                d2 = dx * dx + dy * dy + dz * dz
+                if d2 < best_d2:
+                    best, best_d2 = mid, d2
+                axis = axes[mid]
+                diff = q[axis] - coords[axis][mid]
+                if diff < 0:
+                    stack.append((mid + 1, hi, diff * diff))
+                    hi = mid
+                else:
+                    stack.append((lo, mid, diff * diff))
+                    lo = mid + 1
+        chord = math.sqrt(best_d2)
+        return best, 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_KM
+
+    def reverse(self, lat: float, lon: float) -> dict:
+        """
+        Nominatim-style /reverse result for the nearest place. Raises
+        GeocodeError if no place is within max_distance_km.
+        """
+        found = self.nearest(lat, lon)
+        if found is None or found[1] > self.max_distance_km:
+            raise GeocodeError(f"no gazetteer place within {self.max_distance_km} km")
+        i = found[0]
+        address = {self._kinds[i]: self._names[i]}
+        if self._countries[i]:
+            address["country_code"] = self._countries[i].lower()
+        return {
+            "lat": str(self._lats[i]),
+            "lon": str(self._lons[i]),
+            "display_name": ", ".join(filter(None, [self._names[i], self._countries[i]])),
+            "address": address,
+        }
+
+    def close(self) -> None:
+        """Nothing to release; present so a Gazetteer can stand in for a NominatimClient."""
+
+    def __enter__(self) -> "Gazetteer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
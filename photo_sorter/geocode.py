@@ -7,25 +7,36 @@ Copyright (c) 2026 Benjoe Vidal
 Licensed under the MIT License.
 """
 
-import json
+import functools
+import logging
 import re
-import time
+import threading
 from pathlib import Path
 from typing import Optional
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 
-try:
-    from unidecode import unidecode as _unidecode
-except ImportError:
-    def _unidecode(s: str) -> str:
-        return "".join(c for c in s if ord(c) < 128)
+from .geocode_cache import GeocodeCache, SqliteGeocodeCache, open_geocode_cache
+from .geocode_client import GeocodeError, NominatimClient
+from .gazetteer import Gazetteer
+
+
+@functools.cache
+def _transliterator():
+    # Unidecode if installed (imported on first use), else drop non-ASCII
+    try:
+        from unidecode import unidecode
+    except ImportError:
+        return lambda s: "".join(c for c in s if ord(c) < 128)
+    return unidecode
+
+
+def _unidecode(s: str) -> str:
+    return _transliterator()(s)
+
 
 # Cache key format: "lat,lon" rounded to 3 decimals (~100m)
 COORD_PRECISION = 3
-# Nominatim requires 1 request per second; we throttle
-NOMINATIM_DELAY_SEC = 1.1
-USER_AGENT = "PhotoSorter/1.0 (local photo organizer)"
+# Approximate km per degree of latitude (cache key cell -> nearest() radius)
+_KM_PER_DEG = 111.195
 
 
 def _cache_key(lat: float, lon: float, precision: Optional[int] = None) -> str:
@@ -165,7 +176,8 @@ def cluster_precision_from_radius_km(radius_km: float) -> int:
 def cluster_key(lat: float, lon: float, radius_km: float) -> tuple[float, float]:
     """
     Return (lat_center, lon_center) so that all points within roughly radius_km
-    of each other get the same key. Used to put nearby photos in the same folder.
+    of each other get the same key. Points near a rounding boundary can land in
+    different keys; clustering.cluster_points groups by true distance instead.
     """
     p = cluster_precision_from_radius_km(radius_km)
     return (round(lat, p), round(lon, p))
@@ -180,150 +192,147 @@ def sanitize_folder_name(name: str) -> str:
     return out or "Unknown"
 
 
-def _load_cache(cache_path: Path) -> dict[str, str]:
-    """Load cache from JSON file. Return dict mapping cache_key -> place_name."""
-    if not cache_path.exists():
-        return {}
-    try:
-        data = json.loads(cache_path.read_text(encoding="utf-8"))
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
+# Client used when get_place_name is not given one (public server, 1 req/s)
+_default_client: Optional[NominatimClient] = None
+_default_client_lock = threading.Lock()
 
 
-def _save_cache(cache_path: Path, cache: dict[str, str]) -> None:
-    """Write cache to JSON file."""
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    cache_path.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+def default_client() -> NominatimClient:
+    """Return the shared client for the configured Nominatim server (see configured_base_url)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = NominatimClient()
+        return _default_client
 
 
-def _fetch_nominatim(lat: float, lon: float) -> tuple[Optional[str], Optional[dict]]:
+def _fetch_nominatim(
+    lat: float, lon: float, client: Optional[NominatimClient | Gazetteer] = None
+) -> tuple[Optional[str], Optional[dict]]:
     """
     Query Nominatim (OSM) for reverse geocoding. Returns (place_name, address_dict) or (None, None).
-    Tries to extract a good place name from address components, falling back to display_name.
-    Also returns the address dict so caller can check village/suburb as fallback.
-    Respects rate limit (caller should throttle).
+    The client (default: public server) handles rate limiting and retries; a
+    Gazetteer answers the same query offline.
     """
-    url = (
-        "https://nominatim.openstreetmap.org/reverse"
-        f"?lat={lat}&lon={lon}&format=json&addressdetails=1"
-    )
-    req = Request(url, headers={"User-Agent": USER_AGENT})
     try:
-        with urlopen(req, timeout=15) as resp:
-            status = resp.getcode()
-            if status != 200:
-                return None, None
-            data = json.loads(resp.read().decode("utf-8"))
-            if not isinstance(data, dict):
-                return None, None
-            
-            # Check for error in response
-            if "error" in data:
-                return None, None
-            
-            address = data.get("address", {})
-            
-            # Try to get a meaningful place name from address components
-            if isinstance(address, dict):
-                # Prefer: tourist attraction, landmark, building
-                for key in ["tourism", "landmark", "building", "attraction", "amenity"]:
-                    if key in address and address[key]:
-                        name = str(address[key])
-                        city = address.get("city") or address.get("town") or address.get("village") or address.get("county")
-                        if city and name != city:
-                            return f"{name}, {city}", address
-                        return name, address
-                
-                # Collect suburb and village first (user preference)
-                suburb_name = None
-                village_name = None
-                for key in ["suburb", "village"]:
-                    if key in address and address[key]:
-                        name = str(address[key]).strip()
-                        if not name or (name.isdigit() and len(name) <= 5):
-                            continue
-                        if key == "suburb":
-                            suburb_name = name
-                        elif key == "village":
-                            village_name = name
-                
-                # Collect town and city_district 
-                town_name = None
-                city_district_name = None
-                for key in ["town", "city_district"]:
-                    if key in address and address[key]:
-                        name = str(address[key]).strip()
-                        if not name or (name.isdigit() and len(name) <= 5):
-                            continue
-                        if key == "town":
-                            town_name = name
-                        elif key == "city_district":
-                            city_district_name = name
-                
-                # Priority: suburb > village > (town/city_district only if NOT Chinese, or if no suburb/village)
-                # If town/city_district has Chinese, prefer English suburb/village instead
-                if suburb_name:
-                    # Check if suburb has Chinese - if so, prefer village if it's English
-                    if _has_chinese_characters(suburb_name) and village_name and not _has_chinese_characters(village_name):
-                        return village_name, address
-                    return suburb_name, address
-                
-                if village_name:
-                    return village_name, address
-                
-                # Use town/city_district, but prefer English over Chinese
-                if town_name:
-                    # If town has Chinese and we have English city_district, prefer city_district
-                    if _has_chinese_characters(town_name) and city_district_name and not _has_chinese_characters(city_district_name):
-                        return city_district_name, address
-                    return town_name, address
-                
-                if city_district_name:
-                    return city_district_name, address
-                
-                # Fallback: neighbourhood, city, county, etc.
-                for key in ["neighbourhood", "city", "county", "municipality", "state"]:
-                    if key in address and address[key]:
-                        name = str(address[key]).strip()
-                        if not name:
-                            continue
-                        if name.isdigit() and len(name) <= 5:
-                            continue  # skip postal code
-                        return name, address, address
-            
-            # Last resort: use display_name (skip if it's only numbers/postal)
-            display_name = data.get("display_name", "")
-            if display_name:
-                # Check if display_name is just a postal code or mostly numbers
-                parts = display_name.split(",")
-                # Take first meaningful part (not just numbers)
-                for part in parts:
-                    part = part.strip()
-                    if part and not (part.isdigit() and len(part) <= 5):
-                        return display_name, address  # Return full display_name if we found a non-numeric part
-                # If all parts are numeric/short, return None to trigger fallback
-                return None, address
-            
-            return None, address
-    except URLError as e:
-        # Network error (no connection, DNS, etc.)
-        import logging
-        logging.getLogger(__name__).debug("Nominatim network error for (%.4f, %.4f): %s", lat, lon, e.reason if getattr(e, "reason", None) else e)
-        return None, None
-    except HTTPError as e:
-        # HTTP error (e.g. 429 rate limit, 503 service unavailable)
-        import logging
-        logging.getLogger(__name__).debug("Nominatim HTTP %s for (%.4f, %.4f)", e.code, lat, lon)
-        return None, None
-    except (OSError, json.JSONDecodeError, Exception) as e:
-        import logging
+        data = (client or default_client()).reverse(lat, lon)
+    except GeocodeError as e:
         logging.getLogger(__name__).debug("Nominatim error for (%.4f, %.4f): %s", lat, lon, e)
         return None, None
+    return _parse_nominatim(data)
 
 
-# Module-level throttle: last request time
-_last_request_time: float = 0
+def _parse_nominatim(data: dict) -> tuple[Optional[str], Optional[dict]]:
+    """
+    Pick a place name from a Nominatim /reverse response. Returns (place_name, address_dict).
+    Tries to extract a good place name from address components, falling back to display_name.
+    Also returns the address dict so caller can check village/suburb as fallback.
+    """
+    # Check for error in response
+    if "error" in data:
+        return None, None
+    
+    address = data.get("address", {})
+    
+    # Try to get a meaningful place name from address components
+    if isinstance(address, dict):
+        # Prefer: tourist attraction, landmark, building
+        for key in ["tourism", "landmark", "building", "attraction", "amenity"]:
+            if key in address and address[key]:
+                name = str(address[key])
+                city = address.get("city") or address.get("town") or address.get("village") or address.get("county")
+                if city and name != city:
+                    return f"{name}, {city}", address
+                return name, address
+        
+        # Collect suburb and village first (user preference)
+        suburb_name = None
+        village_name = None
+        for key in ["suburb", "village"]:
+            if key in address and address[key]:
+                name = str(address[key]).strip()
+                if not name or (name.isdigit() and len(name) <= 5):
+                    continue
+                if key == "suburb":
+                    suburb_name = name
+                elif key == "village":
+                    village_name = name
+        
+        # Collect town and city_district 
+        town_name = None
+        city_district_name = None
+        for key in ["town", "city_district"]:
+            if key in address and address[key]:
+                name = str(address[key]).strip()
+                if not name or (name.isdigit() and len(name) <= 5):
+                    continue
+                if key == "town":
+                    town_name = name
+                elif key == "city_district":
+                    city_district_name = name
+        
+        # Priority: suburb > village > (town/city_district only if NOT Chinese, or if no suburb/village)
+        # If town/city_district has Chinese, prefer English suburb/village instead
+        if suburb_name:
+            # Check if suburb has Chinese - if so, prefer village if it's English
+            if _has_chinese_characters(suburb_name) and village_name and not _has_chinese_characters(village_name):
+                return village_name, address
+            return suburb_name, address
+        
+        if village_name:
+            return village_name, address
+        
+        # Use town/city_district, but prefer English over Chinese
+        if town_name:
+            # If town has Chinese and we have English city_district, prefer city_district
+            if _has_chinese_characters(town_name) and city_district_name and not _has_chinese_characters(city_district_name):
+                return city_district_name, address
+            return town_name, address
+        
+        if city_district_name:
+            return city_district_name, address
+        
+        # Fallback: neighbourhood, city, county, etc.
+        for key in ["neighbourhood", "city", "county", "municipality", "state"]:
+            if key in address and address[key]:
+                name = str(address[key]).strip()
+                if not name:
+                    continue
+                if name.isdigit() and len(name) <= 5:
+                    continue  # skip postal code
+                return name, address
+    
+    # Last resort: use display_name (skip if it's only numbers/postal)
+    display_name = data.get("display_name", "")
+    if display_name:
+        # Check if display_name is just a postal code or mostly numbers
+        parts = display_name.split(",")
+        # Take first meaningful part (not just numbers)
+        for part in parts:
+            part = part.strip()
+            if part and not (part.isdigit() and len(part) <= 5):
+                return display_name, address  # Return full display_name if we found a non-numeric part
+        # If all parts are numeric/short, return None to trigger fallback
+        return None, address
+    
+    return None, address
+
+
+def _usable_cached_name(raw: str, single_word_english: bool) -> Optional[str]:
+    """
+    Folder name for a cached raw name, or None if the cached value should not
+    be used: coordinate fallbacks from a failed geocode run, postal codes, or
+    names that do not convert to a single English word.
+    """
+    raw_stripped = raw.strip()
+    if raw_stripped.startswith("Lat") and "Lon" in raw_stripped:
+        return None
+    if raw_stripped.isdigit() and 3 <= len(raw_stripped) <= 6:
+        return None
+    converted = to_single_word_english(raw) if single_word_english else sanitize_folder_name(raw)
+    if converted != "Unknown" or not single_word_english:
+        return converted
+    return None
 
 
 def get_place_name(
@@ -333,61 +342,84 @@ def get_place_name(
     use_network: bool = True,
     single_word_english: bool = False,
     cache_precision: Optional[int] = None,
+    cache: Optional[GeocodeCache | SqliteGeocodeCache] = None,
+    client: Optional[NominatimClient | Gazetteer] = None,
 ) -> str:
     """
     Get a human-readable place name for (lat, lon).
 
-    - If cache_path is set and the key is in the cache, return cached name.
-    - If use_network is True and cache misses, query Nominatim (rate-limited),
-      cache the result, and return it.
+    - If a cache is given (or cache_path is set) and the key is in the cache,
+      return the cached name. A SQLite cache also answers for the nearest
+      cached place within half a key cell (~55 m at the default precision).
+    - If use_network is True and cache misses, query Nominatim through client
+      (default: the public server at 1 request/s), cache the result, and
+      return it. Safe to call from several threads with a shared cache and client.
+      Pass a Gazetteer as client to resolve names offline from a local file.
     - Otherwise return a coordinate-based fallback.
 
+    Pass an open cache (see open_geocode_cache) when resolving many locations
+    so the cache file is read once; with only cache_path the cache is opened
+    and flushed for this single call.
+
     If single_word_english is True, the result is converted to PascalCase ASCII
     (e.g. UPDiliman, TIPQC). cache_precision can be used when grouping
     by cluster (e.g. 1 for ~11 km) so the same cache key is used for the cluster.
     """
+    if cache is None and cache_path is not None:
+        with open_geocode_cache(cache_path) as own_cache:
+            return get_place_name(
+                lat,
+                lon,
+                use_network=use_network,
+                single_word_english=single_word_english,
+                cache_precision=cache_precision,
+                cache=own_cache,
+                client=client,
+            )
+
     key = _cache_key(lat, lon, cache_precision)
+    address_dict: Optional[dict] = None
+
+    def _remember(value: str) -> None:
+        # Store the raw name with the query coordinates (SQLite store keeps them for nearest())
+        if cache is not None:
+            cache.set(
+                key,
+                value,
+                lat=lat,
+                lon=lon,
+                precision=COORD_PRECISION if cache_precision is None else cache_precision,
+                address=address_dict,
+            )
+
     fallback = f"{round(lat, COORD_PRECISION)}, {round(lon, COORD_PRECISION)}"
     if single_word_english:
         fallback = f"Lat{round(lat, 2)}Lon{round(lon, 2)}".replace(".", "_").replace("-", "_")
 
-    if cache_path is not None:
-        cache = _load_cache(cache_path)
-        if key in cache:
-            raw = cache[key]
-            # Validate cached value - reject postal codes and coordinate-style fallbacks
-            if raw and isinstance(raw, str):
-                raw_stripped = raw.strip()
-                # Reject if it looks like a coordinate fallback (from a failed geocode run)
-                if raw_stripped.startswith("Lat") and "Lon" in raw_stripped:
-                    cache.pop(key, None)
-                    _save_cache(cache_path, cache)
-                elif raw_stripped.isdigit() and 3 <= len(raw_stripped) <= 6:
-                    cache.pop(key, None)
-                    _save_cache(cache_path, cache)
-                else:
-                    # Valid cached value, use it
-                    converted = to_single_word_english(raw) if single_word_english else sanitize_folder_name(raw)
-                    if converted != "Unknown" or not single_word_english:
-                        return converted
-                    cache.pop(key, None)
-                    _save_cache(cache_path, cache)
+    if cache is not None:
+        raw = cache.get(key)
+        if raw and isinstance(raw, str):
+            converted = _usable_cached_name(raw, single_word_english)
+            if converted is not None:
+                return converted
+            cache.pop(key)
+        nearest = getattr(cache, "nearest", None)
+        if nearest is not None:
+            # Reuse a place cached just across the key's rounding boundary
+            p = COORD_PRECISION if cache_precision is None else cache_precision
+            hit = nearest(lat, lon, _KM_PER_DEG * 10.0 ** -p / 2)
+            if hit is not None:
+                converted = _usable_cached_name(hit[0], single_word_english)
+                if converted is not None:
+                    return converted
 
     if not use_network:
         return fallback
 
-    # Rate limit
-    global _last_request_time
-    elapsed = time.monotonic() - _last_request_time
-    if elapsed < NOMINATIM_DELAY_SEC:
-        time.sleep(NOMINATIM_DELAY_SEC - elapsed)
-    _last_request_time = time.monotonic()
-
-    import logging
     _log = logging.getLogger(__name__)
     _log.debug("Fetching place name for (%.4f, %.4f) from Nominatim...", lat, lon)
 
-    name, address_dict = _fetch_nominatim(lat, lon)
+    name, address_dict = _fetch_nominatim(lat, lon, client)
     if name:
         if single_word_english:
             converted = to_single_word_english(name)
@@ -396,10 +428,7 @@ def get_place_name(
                 fallback_name = _name_to_safe_folder(name)
                 if fallback_name != "Unknown":
                     _log.debug("Used fallback folder name for (%.4f, %.4f): %s (raw: %s)", lat, lon, fallback_name, name[:60])
-                    if cache_path is not None:
-                        cache = _load_cache(cache_path)
-                        cache[key] = name
-                        _save_cache(cache_path, cache)
+                    _remember(name)
                     return fallback_name
                 
                 # If conversion failed and name has Chinese characters, check village/suburb from address
@@ -412,19 +441,13 @@ def get_place_name(
                                 fallback_converted = to_single_word_english(fallback_value)
                                 if fallback_converted != "Unknown":
                                     _log.debug("Used %s '%s' instead of Chinese name for (%.4f, %.4f)", fallback_key, fallback_converted, lat, lon)
-                                    if cache_path is not None:
-                                        cache = _load_cache(cache_path)
-                                        cache[key] = fallback_value
-                                        _save_cache(cache_path, cache)
+                                    _remember(fallback_value)
                                     return fallback_converted
                                 # Even if conversion fails, try the safe folder fallback
                                 safe_fallback = _name_to_safe_folder(fallback_value)
                                 if safe_fallback != "Unknown":
                                     _log.debug("Used %s '%s' (safe fallback) instead of Chinese name for (%.4f, %.4f)", fallback_key, safe_fallback, lat, lon)
-                                    if cache_path is not None:
-                                        cache = _load_cache(cache_path)
-                                        cache[key] = fallback_value
-                                        _save_cache(cache_path, cache)
+                                    _remember(fallback_value)
                                     return safe_fallback
                 
                 # Show what unidecode produces for debugging
@@ -436,17 +459,11 @@ def get_place_name(
                     lat, lon
                 )
                 return fallback
-            if cache_path is not None:
-                cache = _load_cache(cache_path)
-                cache[key] = name
-                _save_cache(cache_path, cache)
+            _remember(name)
             _log.debug("  -> %s", converted)
             return converted
         else:
-            if cache_path is not None:
-                cache = _load_cache(cache_path)
-                cache[key] = name
-                _save_cache(cache_path, cache)
+            _remember(name)
             _log.debug("  -> %s", name)
             return sanitize_folder_name(name)
     
@@ -460,17 +477,11 @@ def get_place_name(
                         converted = to_single_word_english(fallback_value)
                         if converted != "Unknown":
                             _log.debug("Used %s '%s' as fallback for (%.4f, %.4f)", fallback_key, converted, lat, lon)
-                            if cache_path is not None:
-                                cache = _load_cache(cache_path)
-                                cache[key] = fallback_value
-                                _save_cache(cache_path, cache)
+                            _remember(fallback_value)
                             return converted
                     else:
                         _log.debug("Used %s '%s' as fallback for (%.4f, %.4f)", fallback_key, fallback_value, lat, lon)
-                        if cache_path is not None:
-                            cache = _load_cache(cache_path)
-                            cache[key] = fallback_value
-                            _save_cache(cache_path, cache)
+                        _remember(fallback_value)
                         return sanitize_folder_name(fallback_value)
 
     _log.warning("Could not get place name for (%.4f, %.4f). Check internet. Using coordinate name.", lat, lon)
@@ -0,0 +1,344 @@
+"""
+Persistent geocode cache: loaded once per run, served from memory and written
+back in batches so large caches are not re-read and re-written per lookup.
+An optional SQLite store keeps very large caches on disk with indexed lookups.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .location_matcher import haversine_km
+
+# Number of changed entries after which the cache is written to disk
+DEFAULT_FLUSH_EVERY = 100
+# File suffixes that select the SQLite store instead of JSON
+SQLITE_SUFFIXES = {".sqlite", ".sqlite3", ".db"}
+# Approximate km per degree of latitude (for radius -> degree windows)
+_KM_PER_DEG = 111.195
+# Side of the grid cells nearest() probes, in degrees (~1.1 km of latitude)
+CELL_DEG = 0.01
+_LAT_CELLS = int(round(180 / CELL_DEG))
+_LON_CELLS = int(round(360 / CELL_DEG))
+
+
+def _cell_row_col(lat: float, lon: float) -> tuple[int, int]:
+    row = min(_LAT_CELLS - 1, max(0, math.floor((lat + 90.0) / CELL_DEG)))
+    col = math.floor((lon + 180.0) / CELL_DEG) % _LON_CELLS
+    return row, col
+
+
+def cell_id(lat: float, lon: float) -> int:
+    """Grid cell containing (lat, lon); cells of one latitude row have consecutive ids."""
+    row, col = _cell_row_col(lat, lon)
+    return row * _LON_CELLS + col
+
+
+def _load_cache(cache_path: Path) -> dict[str, str]:
+    """Load cache from JSON file. Return dict mapping cache_key -> place_name."""
+    if not cache_path.exists():
+        return {}
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_cache(cache_path: Path, cache: dict[str, str]) -> None:
+    """
+    Write cache to JSON file atomically: write a temp file in the same folder,
+    then rename it over the old file so a crash never leaves a truncated cache.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=cache_path.name + ".", suffix=".tmp", dir=cache_path.parent
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, cache_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class GeocodeCache:
+    """
+    JSON-file geocode cache kept in memory.
+
+    The file is read once when the cache is created. Lookups are dict lookups;
+    changes are counted and written back with flush() (also done automatically
+    every flush_every changes). Call flush() or close() at the end of a run.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str | Path, flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.path = Path(path)
+        self.flush_every = max(1, int(flush_every))
+        self._lock = threading.RLock()
+        self._data: dict[str, str] = _load_cache(self.path)
+        self._dirty = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached raw place name for key, or None."""
+        return self._data.get(key)
+
+    def set(self, key: str, name: str, **details) -> None:
+        """Store the raw place name for key. Extra details are ignored by the JSON store."""
+        with self._lock:
+            if self._data.get(key) == name:
+                return
+            self._data[key] = name
+            self._mark_dirty()
+
+    def pop(self, key: str) -> Optional[str]:
+        """Remove key (e.g. a rejected value) and return the old value."""
+        with self._lock:
+            if key not in self._data:
+                return None
+            value = self._data.pop(key)
+            self._mark_dirty()
+        return value
+
+    def _mark_dirty(self) -> None:
+        # Caller holds the lock
+        self._dirty += 1
+        if self._dirty >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending changes to disk (no-op if nothing changed)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            _save_cache(self.path, self._data)
+            self._dirty = 0
+
+    def close(self) -> None:
+        """Flush pending changes."""
+        self.flush()
+
+    def __enter__(self) -> "GeocodeCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SqliteGeocodeCache:
+    """
+    SQLite-backed geocode cache (stdlib sqlite3).
+
+    Same interface as GeocodeCache, but nothing is parsed up front: lookups hit
+    the primary key, writes are committed in batches of flush_every, and each
+    row also keeps lat/lon, precision, the Nominatim address and a timestamp.
+    Each row is filed under the CELL_DEG grid cell holding its coordinates,
+    and the index on that cell lets nearest() read only the cells around a
+    point (3x3 for radii up to a cell). WAL mode allows concurrent readers.
+    """
+
+    def __init__(self, path: str | Path, flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.path = Path(path)
+        self.flush_every = max(1, int(flush_every))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass  # e.g. network filesystems without shared memory; default journal still works
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS places ("
+            " key TEXT PRIMARY KEY,"
+            " lat REAL,"
+            " lon REAL,"
+            " precision INTEGER,"
+            " name TEXT NOT NULL,"
+            " address TEXT,"
+            " updated REAL NOT NULL,"
+            " cell INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(places)")}
+        if "cell" not in columns:
+            # Cache written before rows were filed by cell
+            self._conn.execute("ALTER TABLE places ADD COLUMN cell INTEGER")
+            self._conn.execute("DROP INDEX IF EXISTS places_lat_lon")
+            rows = self._conn.execute(
+                "SELECT key, lat, lon FROM places WHERE lat IS NOT NULL AND lon IS NOT NULL"
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE places SET cell = ? WHERE key = ?",
+                [(cell_id(lat, lon), key) for key, lat, lon in rows],
+            )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS places_cell ON places (cell)")
+        self._conn.commit()
+        self._dirty = 0
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached raw place name for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT name FROM places WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(
+        self,
+        key: str,
+        name: str,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        precision: Optional[int] = None,
+        address: Optional[dict] = None,
+    ) -> None:
+        """Store the raw place name for key, with coordinates and address when known."""
+        if lat is None or lon is None:
+            lat, lon = _coords_from_key(key)
+        address_json = json.dumps(address, ensure_ascii=False) if address else None
+        cell = cell_id(lat, lon) if lat is not None and lon is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places (key, lat, lon, precision, name, address, updated, cell)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, lat, lon, precision, name, address_json, time.time(), cell),
+            )
+            self._mark_dirty()
+
+    def pop(self, key: str) -> Optional[str]:
+        """Remove key (e.g. a rejected value) and return the old value."""
+        value = self.get(key)
+        if value is None:
+            return None
+        with self._lock:
+            self._conn.execute("DELETE FROM places WHERE key = ?", (key,))
+            self._mark_dirty()
+        return value
+
+    def address(self, key: str) -> Optional[dict]:
+        """Return the stored Nominatim address dict for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT address FROM places WHERE key = ?", (key,)).fetchone()
+        if not row or not row[0]:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def nearest(self, lat: float, lon: float, radius_km: float) -> Optional[tuple[str, float]]:
+        """
+        Return (name, distance_km) of the closest cached place within radius_km
+        of (lat, lon), or None. Reads only the grid cells the radius touches:
+        one indexed range of cell ids per latitude row.
+        """
+        dlat = radius_km / _KM_PER_DEG
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+        dlon = min(180.0, radius_km / (_KM_PER_DEG * max(cos_lat, 1e-6)))
+        row_min = _cell_row_col(lat - dlat, lon)[0]
+        row_max = _cell_row_col(lat + dlat, lon)[0]
+        col_min = math.floor((lon - dlon + 180.0) / CELL_DEG)
+        col_max = math.floor((lon + dlon + 180.0) / CELL_DEG)
+        if col_max - col_min + 1 >= _LON_CELLS:
+            col_ranges = [(0, _LON_CELLS - 1)]
+        elif col_min < 0:  # wraps across the antimeridian
+            col_ranges = [(0, col_max), (col_min + _LON_CELLS, _LON_CELLS - 1)]
+        elif col_max >= _LON_CELLS:
+            col_ranges = [(col_min, _LON_CELLS - 1), (0, col_max - _LON_CELLS)]
+        else:
+            col_ranges = [(col_min, col_max)]
+
+        best: Optional[tuple[str, float]] = None
+        with self._lock:
+            for row in range(row_min, row_max + 1):
+                for first, last in col_ranges:
+                    rows = self._conn.execute(
+                        "SELECT name, lat, lon FROM places WHERE cell BETWEEN ? AND ?",
+                        (row * _LON_CELLS + first, row * _LON_CELLS + last),
+                    )
+                    for name, row_lat, row_lon in rows:
+                        d = haversine_km(lat, lon, row_lat, row_lon)
+                        if d <= radius_km and (best is None or d < best[1]):
+                            best = (name, d)
+        return best
+
+    def import_json(self, json_path: str | Path) -> int:
+        """Copy entries from a JSON geocode cache file. Returns the number imported."""
+        count = 0
+        for key, name in _load_cache(Path(json_path)).items():
+            if isinstance(name, str) and name:
+                self.set(key, name)
+                count += 1
+        self.flush()
+        return count
+
+    def _mark_dirty(self) -> None:
+        # Caller holds the lock
+        self._dirty += 1
+        if self._dirty >= self.flush_every:
+            self._conn.commit()
+            self._dirty = 0
+
+    def flush(self) -> None:
+        """Commit pending changes."""
+        with self._lock:
+            if self._dirty:
+                self._conn.commit()
+                self._dirty = 0
+
+    def close(self) -> None:
+        """Commit pending changes and close the database."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "SqliteGeocodeCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _coords_from_key(key: str) -> tuple[Optional[float], Optional[float]]:
+    """Parse a "lat,lon" cache key back into floats (None, None if not parseable)."""
+    try:
+        lat_s, lon_s = key.split(",", 1)
+        return float(lat_s), float(lon_s)
+    except ValueError:
+        return None, None
+
+
+def open_geocode_cache(path: str | Path, flush_every: int = DEFAULT_FLUSH_EVERY):
+    """
+    Open the geocode cache at path: SQLite for .sqlite/.sqlite3/.db files,
+    otherwise the JSON cache.
+    """
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_SUFFIXES:
+        return SqliteGeocodeCache(path, flush_every=flush_every)
+    return GeocodeCache(path, flush_every=flush_every)
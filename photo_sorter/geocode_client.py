@@ -0,0 +1,208 @@
+"""
+HTTP client for Nominatim reverse geocoding: configurable server, token-bucket
+rate limiting, retries with backoff on 429/503 and keep-alive connections, so
+many lookups can run in parallel against a server that allows it.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlencode, urlsplit
+
+if TYPE_CHECKING:
+    import http.client
+
+# Public Nominatim server (usage policy: at most 1 request per second)
+DEFAULT_BASE_URL = "https://nominatim.openstreetmap.org"
+# Environment variable that replaces DEFAULT_BASE_URL (e.g. a local server or test stub)
+URL_ENV_VAR = "PHOTO_SORTER_NOMINATIM_URL"
+# Seconds between requests to the public server; we stay a little under 1/s
+NOMINATIM_DELAY_SEC = 1.1
+USER_AGENT = "PhotoSorter/1.0 (local photo organizer)"
+DEFAULT_TIMEOUT_SEC = 15.0
+DEFAULT_RETRIES = 3
+# Statuses that mean "slow down / try again later"
+RETRY_STATUSES = {429, 502, 503, 504}
+# Backoff before retry n is BACKOFF_BASE_SEC * 2**n, at most BACKOFF_MAX_SEC
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+
+log = logging.getLogger(__name__)
+
+
+def configured_base_url() -> str:
+    """The server to use when none is given: $PHOTO_SORTER_NOMINATIM_URL, else the public server."""
+    return os.environ.get(URL_ENV_VAR, "").strip() or DEFAULT_BASE_URL
+
+
+class GeocodeError(Exception):
+    """A reverse geocoding request failed (after any retries)."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: on average `rate` acquisitions per second, with
+    up to `burst` allowed back to back. rate <= 0 means no limit.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now; callers that must wait sleep outside the lock
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class NominatimClient:
+    """
+    Reverse geocoding client for a Nominatim server at base_url (default:
+    configured_base_url()).
+
+    Every request (including retries) takes a token from a TokenBucket(rate,
+    burst). Each thread keeps its own persistent HTTP connection, so a pool
+    of threads can share one client. Responses with a status in
+    RETRY_STATUSES, and connection errors, are retried up to `retries` times
+    with exponential backoff (or the server's Retry-After, if given).
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        rate: float = 1 / NOMINATIM_DELAY_SEC,
+        burst: int = 1,
+        timeout: float = DEFAULT_TIMEOUT_SEC,
+        retries: int = DEFAULT_RETRIES,
+        user_agent: str = USER_AGENT,
+    ):
+        base_url = base_url or configured_base_url()
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Geocoding URL must be http(s)://host[:port][/path], got {base_url!r}")
+        self.base_url = base_url
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path.rstrip("/")
+        self.bucket = TokenBucket(rate, burst)
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.user_agent = user_agent
+        self._local = threading.local()
+        self._connections: list["http.client.HTTPConnection"] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> "http.client.HTTPConnection":
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import http.client  # not needed by runs that never geocode online
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conn = cls(self._host, self._port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _drop_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+
+    def _request(self, path: str) -> tuple[int, dict, bytes]:
+        """One GET on this thread's connection. Returns (status, headers, body)."""
+        import http.client
+
+        conn = self._connection()
+        try:
+            conn.request("GET", path, headers={"User-Agent": self.user_agent, "Accept": "application/json"})
+            resp = conn.getresponse()
+            body = resp.read()
+        except (OSError, http.client.HTTPException):
+            self._drop_connection()  # reconnect on the next attempt
+            raise
+        if resp.will_close:
+            self._drop_connection()
+        return resp.status, dict(resp.getheaders()), body
+
+    def reverse(self, lat: float, lon: float) -> dict:
+        """
+        Return the decoded JSON of /reverse for (lat, lon). Raises GeocodeError
+        when the server keeps failing or returns something other than a JSON object.
+        """
+        import http.client
+
+        query = urlencode({"lat": lat, "lon": lon, "format": "json", "addressdetails": 1})
+        path = f"{self._path}/reverse?{query}"
+        error = "no attempt made"
+        retry_after: Optional[str] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self._backoff(attempt - 1, retry_after))
+                retry_after = None
+            self.bucket.acquire()
+            try:
+                status, headers, body = self._request(path)
+            except (OSError, http.client.HTTPException) as e:
+                error = f"network error: {e}"
+                log.debug("Nominatim %s for (%.4f, %.4f), attempt %d", error, lat, lon, attempt + 1)
+                continue
+            if status in RETRY_STATUSES:
+                error = f"HTTP {status}"
+                retry_after = headers.get("Retry-After") or headers.get("retry-after")
+                log.debug("Nominatim HTTP %s for (%.4f, %.4f), attempt %d", status, lat, lon, attempt + 1)
+                continue
+            if status != 200:
+                raise GeocodeError(f"HTTP {status}")
+            try:
+                data = json.loads(body.decode("utf-8"))
+            except ValueError as e:
+                raise GeocodeError(f"invalid JSON: {e}") from e
+            if not isinstance(data, dict):
+                raise GeocodeError("unexpected response (not a JSON object)")
+            return data
+        raise GeocodeError(error)
+
+    @staticmethod
+    def _backoff(retry: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(BACKOFF_MAX_SEC, max(0.0, float(retry_after)))
+            except ValueError:
+                pass  # HTTP-date form: fall back to exponential backoff
+        return min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** retry)
+
+    def close(self) -> None:
+        """Close all open connections."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def __enter__(self) -> "NominatimClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
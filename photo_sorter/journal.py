@@ -0,0 +1,200 @@
+"""
+Write-ahead journal for copy/move runs: each operation is recorded before it
+runs and marked done after, so an interrupted run can finish what it started
+and skip everything already sorted (without re-reading EXIF).
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .file_ops import move_file, place_file
+
+# Records written between automatic fsyncs; also the number of operations
+# the CLI journals before one fsync and then runs as a batch
+DEFAULT_FSYNC_EVERY = 100
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class JournalOp:
+    """One planned operation: put source at dest by action (copy, move or link)."""
+    seq: int
+    source: str
+    dest: str
+    action: str
+    gps: Optional[tuple[float, float]] = None
+    link_mode: str = "copy"
+    original: Optional[str] = None  # for "link": file to hard-link to
+    remove_source: bool = False  # for "link" in move runs
+
+
+def _key(path: str | Path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class Journal:
+    """
+    Append-only JSONL journal of operations.
+
+    Each line is {"op": "plan", ...JournalOp fields} written before an
+    operation starts, or {"op": "done", "seq": n} once it has finished.
+    Records are fsynced in groups: every fsync_every records, on sync() and
+    on close. Callers begin() a batch of operations, sync() once, and only
+    then start them, so every operation that touches the output has its
+    plan on disk.
+    Opening an existing journal loads it: completed() then answers for
+    sources whose operation finished, and recover() finishes operations
+    that were started but not marked done.
+    """
+
+    def __init__(self, path: str | Path, fsync_every: int = DEFAULT_FSYNC_EVERY):
+        self.path = Path(path)
+        self.fsync_every = max(1, int(fsync_every))
+        self._done: dict[str, JournalOp] = {}  # source key -> finished op
+        self._pending: dict[int, JournalOp] = {}
+        self._dests: set[str] = set()  # dest keys of all journaled operations
+        self._seq = 0
+        self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    kind = record.pop("op")
+                    if kind == "plan":
+                        if record.get("gps") is not None:
+                            record["gps"] = tuple(record["gps"])
+                        op = JournalOp(**record)
+                        self._pending[op.seq] = op
+                        self._dests.add(_key(op.dest))
+                        self._seq = max(self._seq, op.seq)
+                    elif kind == "done":
+                        op = self._pending.pop(record["seq"], None)
+                        if op is not None:
+                            self._done[_key(op.source)] = op
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn last line after a crash
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def completed(self, source: str | Path) -> Optional[JournalOp]:
+        """The finished operation for source, or None."""
+        return self._done.get(_key(source))
+
+    def owns(self, dest: str | Path) -> bool:
+        """True if a journaled operation writes to dest."""
+        return _key(dest) in self._dests
+
+    def pending(self) -> list[JournalOp]:
+        """Operations that were started but not marked done, in order."""
+        return [self._pending[seq] for seq in sorted(self._pending)]
+
+    def _append(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def begin(
+        self,
+        source: str | Path,
+        dest: str | Path,
+        action: str,
+        gps: Optional[tuple[float, float]] = None,
+        link_mode: str = "copy",
+        original: Optional[str | Path] = None,
+        remove_source: bool = False,
+    ) -> JournalOp:
+        """
+        Record an operation that is about to run and return it. The record is
+        durable once sync() returns; call it before starting the operation.
+        """
+        self._seq += 1
+        op = JournalOp(
+            self._seq, str(os.path.abspath(source)), str(os.path.abspath(dest)), action,
+            tuple(gps) if gps is not None else None, link_mode,
+            str(original) if original is not None else None, remove_source,
+        )
+        self._pending[op.seq] = op
+        self._dests.add(_key(op.dest))
+        record = {"op": "plan", **op.__dict__}
+        self._append(record)
+        return op
+
+    def finish(self, op: JournalOp) -> None:
+        """Mark op as done."""
+        self._pending.pop(op.seq, None)
+        self._done[_key(op.source)] = op
+        self._append({"op": "done", "seq": op.seq})
+
+    def recover(self) -> int:
+        """
+        Finish operations left pending by an interrupted run: moves are
+        completed (or recognised as already done), copies and links are
+        redone over whatever partial file is at the destination. Operations
+        whose source no longer exists are dropped. Returns the number finished.
+        """
+        finished = 0
+        for op in self.pending():
+            source, dest = Path(op.source), Path(op.dest)
+            try:
+                if op.action == "move" and not source.exists():
+                    if not dest.exists():
+                        log.warning("Journal: %s is neither at its source nor at %s", source, dest)
+                        self._pending.pop(op.seq)
+                        continue
+                elif op.action == "move":
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    move_file(source, dest)
+                elif op.action == "link":
+                    place_file(Path(op.original), dest, "hardlink", replace=dest.exists())
+                    if op.remove_source and source.exists():
+                        source.unlink()
+                elif source.exists():
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    place_file(source, dest, op.link_mode, replace=dest.exists())
+                else:
+                    if dest.exists() and dest.stat().st_size == 0:
+                        dest.unlink()  # placeholder for a copy that never happened
+                    self._pending.pop(op.seq)
+                    continue
+            except OSError as e:
+                log.warning("Journal: could not finish %s -> %s: %s", source, dest, e)
+                continue
+            self.finish(op)
+            finished += 1
+        self.sync()
+        return finished
+
+    def sync(self) -> None:
+        """Flush and fsync pending records."""
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        self.sync()
+        self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -6,10 +6,29 @@ Licensed under the MIT License.
 """
 
 import math
-from typing import Optional
+from typing import Optional, Sequence
 
 from .config import BoundsLocation, LocationDef, PointLocation, SorterConfig
 
+# Optional NumPy for vectorised batch matching, imported by the first
+# match_batch() (importing it takes longer than the rest of the CLI's startup).
+# _HAS_NUMPY is None until then.
+np = None
+_HAS_NUMPY: Optional[bool] = None
+
+
+def _load_numpy() -> bool:
+    """Import NumPy into np if it is installed; returns whether it is."""
+    global np, _HAS_NUMPY
+    if _HAS_NUMPY is None:
+        try:
+            import numpy
+        except ImportError:
+            _HAS_NUMPY = False
+        else:
+            np, _HAS_NUMPY = numpy, True
+    return _HAS_NUMPY
+
 
 def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -77,3 +96,214 @@ def match_location(
                 best_name = loc.name
 
     return best_name
+
+
+# Km per degree of latitude for the Earth radius used by haversine_km
+_KM_PER_DEG = 6371.0 * math.pi / 180.0
+# A location covering more grid cells than this is checked for every query instead
+_MAX_CELLS_PER_LOCATION = 4096
+# Above this many locations the grid beats a dense photos x locations matrix (measured)
+_NUMPY_MAX_LOCATIONS = 32
+# Max photos x locations elements per NumPy block (bounds memory use)
+_NUMPY_BLOCK_ELEMENTS = 1 << 20
+# Relative widening of each point's search window so rounding never drops a match
+_WINDOW_MARGIN = 1e-6
+
+
+class LocationIndex:
+    """
+    Grid index over config.locations, built once, answering the same question
+    as match_location() without a linear pass over every location.
+
+    Each bounding box and each point's radius circle is registered in the
+    lat/lon grid cells it overlaps (locations covering huge areas, or a pole,
+    are kept in a short list checked for every query). A query looks at one
+    cell, so its cost depends on how many locations overlap that spot, not on
+    the size of the config. Results are identical to match_location(): the
+    first bounding box (in config order) containing the point wins, otherwise
+    the nearest point location within its radius (earliest on ties).
+    """
+
+    def __init__(self, config: SorterConfig, cell_deg: Optional[float] = None):
+        self.config = config
+        self.locations: list[LocationDef] = list(config.locations)
+        if cell_deg is None:
+            cell_deg = self._default_cell_deg(self.locations)
+        self.cell_deg = cell_deg
+        # cell -> ([bounds indices], [point indices]), each in config order
+        self._cells: dict[tuple[int, int], tuple[list[int], list[int]]] = {}
+        self._global_bounds: list[int] = []
+        self._global_points: list[int] = []
+        self._arrays = None  # NumPy copies of the locations, built on first match_batch
+        for idx, loc in enumerate(self.locations):
+            if isinstance(loc, BoundsLocation):
+                self._add_bounds(idx, loc)
+            elif isinstance(loc, PointLocation):
+                self._add_point(idx, loc)
+
+    @staticmethod
+    def _default_cell_deg(locations: list[LocationDef]) -> float:
+        """Cell size ~ the typical point diameter, clamped to 0.005..1 degrees."""
+        radii = sorted(loc.radius_km for loc in locations if isinstance(loc, PointLocation))
+        if not radii:
+            return 0.1
+        median = radii[len(radii) // 2]
+        return min(1.0, max(0.005, 2 * median / _KM_PER_DEG))
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _register(self, idx: int, kind: int, lat_min: float, lat_max: float,
+                  lon_ranges: list[tuple[float, float]]) -> bool:
+        """Add idx to every cell in the ranges. Returns False if that would be too many cells."""
+        i0, i1 = math.floor(lat_min / self.cell_deg), math.floor(lat_max / self.cell_deg)
+        spans = [
+            (math.floor(lo / self.cell_deg), math.floor(hi / self.cell_deg))
+            for lo, hi in lon_ranges
+        ]
+        n_cells = (i1 - i0 + 1) * sum(j1 - j0 + 1 for j0, j1 in spans)
+        if n_cells > _MAX_CELLS_PER_LOCATION:
+            return False
+        for i in range(i0, i1 + 1):
+            for j0, j1 in spans:
+                for j in range(j0, j1 + 1):
+                    self._cells.setdefault((i, j), ([], []))[kind].append(idx)
+        return True
+
+    def _add_bounds(self, idx: int, loc: BoundsLocation) -> None:
+        if loc.min_lat > loc.max_lat or loc.min_lon > loc.max_lon:
+            return  # empty box: point_in_bounds can never be true
+        if not self._register(idx, 0, loc.min_lat, loc.max_lat, [(loc.min_lon, loc.max_lon)]):
+            self._global_bounds.append(idx)
+
+    def _add_point(self, idx: int, loc: PointLocation) -> None:
+        # Angular radius; the circle lies within lat +- dlat and lon +- dlon
+        delta = max(0.0, loc.radius_km) / 6371.0 * (1 + _WINDOW_MARGIN) + 1e-12
+        dlat = math.degrees(delta)
+        cos_lat = math.cos(math.radians(loc.lat))
+        if abs(loc.lat) + dlat >= 90.0 or math.sin(delta) >= cos_lat or delta >= math.pi / 2:
+            self._global_points.append(idx)  # circle reaches a pole
+            return
+        dlon = math.degrees(math.asin(math.sin(delta) / cos_lat)) * (1 + _WINDOW_MARGIN) + 1e-9
+        # Register the longitude window and its copies shifted by 360 degrees,
+        # clipped to [-180, 180], so circles crossing the antimeridian are found
+        lon_ranges = []
+        for shift in (-360.0, 0.0, 360.0):
+            lo = max(-180.0, loc.lon - dlon + shift)
+            hi = min(180.0, loc.lon + dlon + shift)
+            if lo <= hi:
+                lon_ranges.append((lo, hi))
+        if not lon_ranges or not self._register(idx, 1, loc.lat - dlat, loc.lat + dlat, lon_ranges):
+            self._global_points.append(idx)
+
+    def match(self, lat: float, lon: float) -> Optional[str]:
+        """Return the matching location name for (lat, lon), or None (see match_location)."""
+        if not self.locations:
+            return None
+        if not -180.0 <= lon <= 180.0:
+            return match_location(lat, lon, self.config)
+
+        bounds_idx, point_idx = self._cells.get(self._cell(lat, lon), ((), ()))
+
+        best_bounds: Optional[int] = None
+        for candidates in (bounds_idx, self._global_bounds):
+            for idx in candidates:
+                if best_bounds is not None and idx >= best_bounds:
+                    break  # lists are in config order
+                if point_in_bounds(lat, lon, self.locations[idx]):
+                    best_bounds = idx
+                    break
+        if best_bounds is not None:
+            return self.locations[best_bounds].name
+
+        best: Optional[tuple[float, int]] = None
+        for candidates in (point_idx, self._global_points):
+            for idx in candidates:
+                matches, dist = match_point_location(lat, lon, self.locations[idx])
+                if matches and (best is None or (dist, idx) < best):
+                    best = (dist, idx)
+        return self.locations[best[1]].name if best is not None else None
+
+    def match_batch(self, lats: Sequence[float], lons: Sequence[float]) -> list[Optional[str]]:
+        """
+        Match many coordinates at once; same result as calling match() for each.
+
+        With NumPy installed (and a config small enough that a dense distance
+        matrix beats the grid) containment and haversine distances are computed
+        in vectorised blocks; otherwise each point goes through the grid.
+        """
+        if len(lats) != len(lons):
+            raise ValueError("lats and lons must have the same length")
+        if not self.locations or len(lats) == 0:
+            return [None] * len(lats)
+        if len(self.locations) > _NUMPY_MAX_LOCATIONS or not _load_numpy():
+            return [self.match(lat, lon) for lat, lon in zip(lats, lons)]
+        indices = self._match_batch_numpy(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+        return [self.locations[i].name if i >= 0 else None for i in indices.tolist()]
+
+    def _numpy_arrays(self):
+        if self._arrays is None:
+            bounds = [i for i, loc in enumerate(self.locations) if isinstance(loc, BoundsLocation)]
+            points = [i for i, loc in enumerate(self.locations) if isinstance(loc, PointLocation)]
+            locs = self.locations
+            self._arrays = (
+                np.array(bounds, dtype=np.int64),
+                np.array([[locs[i].min_lat, locs[i].max_lat, locs[i].min_lon, locs[i].max_lon] for i in bounds],
+                         dtype=float).reshape(-1, 4),
+                np.array(points, dtype=np.int64),
+                np.array([[locs[i].lat, locs[i].lon, locs[i].radius_km] for i in points],
+                         dtype=float).reshape(-1, 3),
+            )
+        return self._arrays
+
+    def _match_batch_numpy(self, lat, lon):
+        """Return an array of location indices (-1 = no match) for coordinate arrays."""
+        bounds_idx, bounds, points_idx, points = self._numpy_arrays()
+        result = np.full(lat.shape[0], -1, dtype=np.int64)
+
+        # Bounds: first box in config order containing the point
+        if len(bounds_idx):
+            step = max(1, _NUMPY_BLOCK_ELEMENTS // len(bounds_idx))
+            for start in range(0, lat.shape[0], step):
+                la = lat[start:start + step, None]
+                lo = lon[start:start + step, None]
+                inside = (
+                    (bounds[:, 0] <= la) & (la <= bounds[:, 1])
+                    & (bounds[:, 2] <= lo) & (lo <= bounds[:, 3])
+                )
+                hit = inside.any(axis=1)
+                first = inside.argmax(axis=1)
+                result[start:start + step][hit] = bounds_idx[first[hit]]
+
+        # Points: nearest within radius for rows without a bounds match
+        if len(points_idx):
+            rows = np.flatnonzero(result < 0)
+            step = max(1, _NUMPY_BLOCK_ELEMENTS // len(points_idx))
+            phi2 = np.radians(points[:, 0])
+            for start in range(0, rows.shape[0], step):
+                r = rows[start:start + step]
+                la = lat[r, None]
+                lo = lon[r, None]
+                # Same formula and operation order as haversine_km
+                dphi = np.radians(points[:, 0] - la)
+                dlam = np.radians(points[:, 1] - lo)
+                a = np.sin(dphi / 2) ** 2 + np.cos(np.radians(la)) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+                d = 6371.0 * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+                d[d > points[:, 2]] = np.inf
+                best = d.argmin(axis=1)  # first index on ties, like the linear scan
+                ok = np.isfinite(d[np.arange(r.shape[0]), best])
+                result[r[ok]] = points_idx[best[ok]]
+        return result
+
+
+def match_locations_batch(
+    lats: Sequence[float], lons: Sequence[float], config: SorterConfig
+) -> list[Optional[str]]:
+    """
+    Match arrays of coordinates to configured locations in one call.
+    Returns one location name (or None) per coordinate, as match_location would.
+    Uses NumPy when installed, otherwise a pure-Python grid index.
+    To match several batches against the same config, build a LocationIndex
+    once and call its match_batch().
+    """
+    return LocationIndex(config).match_batch(lats, lons)
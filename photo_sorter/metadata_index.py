@@ -0,0 +1,154 @@
+"""
+Persistent per-source metadata index (SQLite) so re-runs skip files that have
+not changed since they were last processed: their GPS coordinates and chosen
+destination are remembered instead of re-reading EXIF.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Number of changed rows after which the index is committed
+DEFAULT_FLUSH_EVERY = 1000
+
+# (size, mtime in ns, inode) identifying one version of a file
+FileSignature = tuple[int, int, int]
+
+
+@dataclass
+class IndexEntry:
+    """What a previous run learned about an unchanged file."""
+    gps: Optional[tuple[float, float]]
+    destination: Optional[str]
+
+
+def file_signature(path: str | Path) -> FileSignature:
+    """Return (size, mtime_ns, inode) for path. Raises OSError if it cannot be stat'ed."""
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _key(path: str | Path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class MetadataIndex:
+    """
+    SQLite table keyed by absolute source path, storing size, mtime and inode
+    plus the extracted GPS (or "no GPS") and the destination of the last copy.
+
+    lookup() returns the stored entry only if the file's signature still
+    matches, so new or modified files are always re-read. The inode is only
+    compared when both sides have one (some filesystems report 0). Safe to
+    share between threads.
+
+    reader_version identifies what the GPS reader can decode. When it is
+    higher than the version the index was written with, "no GPS" entries
+    are dropped so those files are read again.
+    """
+
+    def __init__(self, path: str | Path, flush_every: int = DEFAULT_FLUSH_EVERY, reader_version: int = 0):
+        self.path = Path(path)
+        self.flush_every = max(1, int(flush_every))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER,"
+            " has_gps INTEGER NOT NULL,"
+            " lat REAL,"
+            " lon REAL,"
+            " destination TEXT,"
+            " updated REAL NOT NULL)"
+        )
+        (stored_version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if stored_version < reader_version:
+            self._conn.execute("DELETE FROM files WHERE has_gps = 0")
+            self._conn.execute(f"PRAGMA user_version = {int(reader_version)}")
+        self._conn.commit()
+        self._dirty = 0
+
+    def lookup(self, path: str | Path, signature: FileSignature) -> Optional[IndexEntry]:
+        """Return the stored entry for path if the file is unchanged, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, has_gps, lat, lon, destination FROM files WHERE path = ?",
+                (_key(path),),
+            ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, inode, has_gps, lat, lon, destination = row
+        if (size, mtime_ns) != signature[:2]:
+            return None
+        if inode and signature[2] and inode != signature[2]:
+            return None
+        gps = (lat, lon) if has_gps else None
+        return IndexEntry(gps=gps, destination=destination)
+
+    def record(
+        self,
+        path: str | Path,
+        signature: FileSignature,
+        gps: Optional[tuple[float, float]],
+        destination: Optional[str | Path] = None,
+    ) -> None:
+        """Remember the GPS (None = no GPS) and destination for this version of path."""
+        lat, lon = gps if gps is not None else (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files"
+                " (path, size, mtime_ns, inode, has_gps, lat, lon, destination, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    _key(path),
+                    signature[0],
+                    signature[1],
+                    signature[2],
+                    1 if gps is not None else 0,
+                    lat,
+                    lon,
+                    str(destination) if destination is not None else None,
+                    time.time(),
+                ),
+            )
+            self._dirty += 1
+            if self._dirty >= self.flush_every:
+                self.flush()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def flush(self) -> None:
+        """Commit pending changes."""
+        with self._lock:
+            if self._dirty:
+                self._conn.commit()
+                self._dirty = 0
+
+    def close(self) -> None:
+        """Commit pending changes and close the database."""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def __enter__(self) -> "MetadataIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
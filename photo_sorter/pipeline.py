@@ -0,0 +1,177 @@
+"""
+Staged pipeline: a source iterable feeds a chain of stages, each running on
+its own thread(s), connected by bounded queues. Reading, parsing, geocoding
+and writing overlap, and memory stays flat because a full queue makes the
+stage before it wait.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+# Items waiting between two stages
+DEFAULT_QUEUE_SIZE = 256
+# How often a blocked stage checks whether the pipeline was stopped
+_POLL_SEC = 0.1
+
+_END = object()
+
+
+class _Failure:
+    """An exception raised by the source or a stage, passed down to the consumer."""
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline: func(item) -> result, run on `workers` threads."""
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Group items into lists of up to size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Pipeline:
+    """
+    Runs source through stages and yields the last stage's results.
+
+    The source is iterated on its own thread and each stage on its own
+    thread (with a pool of `workers` threads when workers > 1). Results keep
+    source order at every stage. Each queue holds at most queue_size items,
+    so a slow stage holds back the ones before it instead of letting work
+    pile up in memory.
+
+    An exception from the source or a stage is re-raised by the iteration.
+    Leaving the loop early, or close(), stops all threads.
+    """
+
+    def __init__(self, source: Iterable, stages: Sequence[Stage] = (), queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = max(1, int(queue_size))
+        self._stop = threading.Event()
+        queues = [queue.Queue(self.queue_size) for _ in range(len(stages) + 1)]
+        self._output = queues[-1]
+        self._threads = [threading.Thread(target=self._feed, args=(source, queues[0]), name="pipeline-source", daemon=True)]
+        for stage, inbox, outbox in zip(stages, queues, queues[1:]):
+            self._threads.append(
+                threading.Thread(target=self._work, args=(stage, inbox, outbox), name=f"pipeline-{stage.name}", daemon=True)
+            )
+        self._started = False
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # Wait for room in q; False if the pipeline was stopped meanwhile
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SEC)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SEC)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _feed(self, source: Iterable, outbox: queue.Queue) -> None:
+        try:
+            for item in source:
+                if not self._put(outbox, item):
+                    return
+        except BaseException as e:
+            self._put(outbox, _Failure(e))
+            return
+        self._put(outbox, _END)
+
+    def _work(self, stage: Stage, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        if stage.workers <= 1:
+            while True:
+                item = self._get(inbox)
+                if item is _END or isinstance(item, _Failure):
+                    self._put(outbox, item)
+                    return
+                try:
+                    result = stage.func(item)
+                except BaseException as e:
+                    self._put(outbox, _Failure(e))
+                    return
+                if not self._put(outbox, result):
+                    return
+
+        # Bounded window of in-flight items; results are passed on in order
+        pool = ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix=f"pipeline-{stage.name}")
+        pending: deque[Future] = deque()
+
+        def pass_on(future: Future) -> bool:
+            try:
+                return self._put(outbox, future.result())
+            except BaseException as e:
+                self._put(outbox, _Failure(e))
+                return False
+
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _END or isinstance(item, _Failure):
+                    while pending:
+                        if not pass_on(pending.popleft()):
+                            return
+                    self._put(outbox, item)
+                    return
+                pending.append(pool.submit(stage.func, item))
+                while len(pending) >= stage.workers * 2:
+                    if not pass_on(pending.popleft()):
+                        return
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def __iter__(self) -> Iterator:
+        if not self._started:
+            self._started = True
+            for thread in self._threads:
+                thread.start()
+        try:
+            while True:
+                item = self._get(self._output)
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop all stages and wait for their threads to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join()
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
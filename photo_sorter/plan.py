@@ -0,0 +1,182 @@
+"""
+Dry-run plans: write every copy/move a run would make to a JSONL file, and
+apply such a plan later (on this or another machine) with parallel I/O.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .file_ops import CopyStats, DestinationRegistry, copy_image, ensure_directory, move_image
+
+# Plan actions: copy (with a link mode), move, or hard-link to an earlier destination
+PLAN_ACTIONS = ("copy", "move", "link")
+# Plan lines written between flushes
+DEFAULT_FLUSH_EVERY = 1000
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class PlanEntry:
+    """One planned operation: put source into folder under filename."""
+    source: str
+    folder: str
+    filename: str
+    action: str = "copy"
+    link_mode: str = "copy"
+    original: Optional[str] = None  # for "link": destination of the first copy
+    remove_source: bool = False  # for "link" in move runs
+
+    def to_json(self) -> str:
+        record = {"source": self.source, "folder": self.folder, "filename": self.filename, "action": self.action}
+        if self.action == "copy" and self.link_mode != "copy":
+            record["link_mode"] = self.link_mode
+        if self.action == "link":
+            record["original"] = self.original
+            record["remove_source"] = self.remove_source
+        return json.dumps(record, ensure_ascii=False)
+
+
+class PlanWriter:
+    """Append plan entries to a JSONL file as they are decided."""
+
+    def __init__(self, path: str | Path, flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.path = Path(path)
+        self.flush_every = max(1, int(flush_every))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, entry: PlanEntry) -> None:
+        self._file.write(entry.to_json() + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "PlanWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_plan(path: str | Path) -> Iterator[PlanEntry]:
+    """Yield the entries of a plan file. Raises ValueError on a malformed line."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                entry = PlanEntry(
+                    source=record["source"],
+                    folder=record["folder"],
+                    filename=record["filename"],
+                    action=record.get("action", "copy"),
+                    link_mode=record.get("link_mode", "copy"),
+                    original=record.get("original"),
+                    remove_source=bool(record.get("remove_source", False)),
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"{path}:{line_no}: invalid plan entry: {e}") from e
+            if entry.action not in PLAN_ACTIONS:
+                raise ValueError(f"{path}:{line_no}: unknown action {entry.action!r}")
+            yield entry
+
+
+def apply_entry(
+    entry: PlanEntry,
+    registry: Optional[DestinationRegistry] = None,
+    stats: Optional[CopyStats] = None,
+    dest_exists: bool = False,
+) -> Path:
+    """Carry out one plan entry and return the destination path."""
+    folder = Path(entry.folder)
+    if entry.action == "move":
+        return move_image(
+            Path(entry.source), folder, dest_filename=entry.filename, registry=registry, dest_exists=dest_exists
+        )
+    if entry.action == "link":
+        dest_path = copy_image(
+            Path(entry.original), folder, dest_filename=entry.filename,
+            link_mode="hardlink", stats=stats, registry=registry, dest_exists=dest_exists,
+        )
+        if entry.remove_source:
+            os.unlink(entry.source)
+        return dest_path
+    return copy_image(
+        Path(entry.source), folder, dest_filename=entry.filename,
+        link_mode=entry.link_mode, stats=stats, registry=registry, dest_exists=dest_exists,
+    )
+
+
+def apply_plan(plan_path: str | Path, workers: int = 1) -> dict:
+    """
+    Execute a plan file. Copies and moves run on `workers` threads (a
+    bounded window, so the plan is streamed, not loaded); links to earlier
+    destinations run afterwards, once their originals exist. Each destination
+    folder is created once, the first time the plan names it. Filenames come
+    from the plan; if one was taken since planning, "(n)" is added as usual.
+
+    Returns a summary dict: total, applied, bytes_copied, errors (list of
+    (source, error_message)).
+    """
+    workers = max(1, int(workers))
+    registry = DestinationRegistry()
+    stats = CopyStats()
+    errors: list[tuple[str, str]] = []
+    applied = 0
+    total = 0
+    links: list[PlanEntry] = []
+    created_dirs: set[str] = set()
+
+    def finish(entry: PlanEntry, result) -> None:
+        # result() returns the destination or raises the entry's error
+        nonlocal applied
+        try:
+            result()
+            applied += 1
+        except Exception as e:
+            errors.append((entry.source, str(e)))
+            log.debug("Error applying %s: %s", entry.source, e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque[tuple[PlanEntry, Callable[[], Path]]] = deque()
+        for entry in read_plan(plan_path):
+            total += 1
+            if entry.folder not in created_dirs:
+                try:
+                    ensure_directory(entry.folder)
+                except OSError as e:
+                    errors.append((entry.source, str(e)))
+                    continue
+                created_dirs.add(entry.folder)
+            if entry.action == "link":
+                links.append(entry)
+                continue
+            pending.append((entry, pool.submit(apply_entry, entry, registry, stats, True).result))
+            if len(pending) >= workers * 4:
+                finish(*pending.popleft())
+        while pending:
+            finish(*pending.popleft())
+    for entry in links:
+        finish(entry, lambda entry=entry: apply_entry(entry, registry, stats, True))
+
+    return {
+        "total": total,
+        "applied": applied,
+        "bytes_copied": stats.bytes,
+        "errors": errors,
+    }
@@ -0,0 +1,70 @@
+"""
+Stream image files from a directory tree with os.scandir, so processing can
+start before the walk finishes and memory does not grow with the file count.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .exif_reader import IMAGE_EXTENSIONS
+
+
+def _norm(path: str | Path) -> str:
+    """Normalised absolute path string for comparing directories."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class ImageScan:
+    """
+    Lazy, recursive scan of root for files with a supported image extension.
+
+    Iterating yields Paths as they are found (directories are listed in name
+    order, files before subdirectories, so the order is stable between runs).
+    Names are filtered by extension before any stat, and DirEntry's cached
+    type information avoids a stat per entry on most platforms. Symlinked
+    directories are not followed.
+
+    found counts the images yielded so far and complete turns True once the
+    walk has finished, so callers can show a progress total that is refined
+    as the walk goes on. exclude() skips a directory (e.g. the output folder
+    when it lives inside the input tree) if the walk has not reached it yet.
+    """
+
+    def __init__(self, root: str | Path, exclude: Iterable[str | Path] = ()):
+        self.root = Path(root)
+        self.found = 0
+        self.complete = False
+        self._excluded = {_norm(p) for p in exclude}
+
+    def exclude(self, directory: str | Path) -> None:
+        """Do not descend into directory (or yield files from it) from now on."""
+        self._excluded.add(_norm(directory))
+
+    def __iter__(self) -> Iterator[Path]:
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            if _norm(directory) in self._excluded:
+                continue
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue  # unreadable directory: skip it, like rglob does
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS and entry.is_file():
+                        self.found += 1
+                        yield Path(entry.path)
+                except OSError:
+                    continue
+            stack.extend(reversed(subdirs))
+        self.complete = True
+
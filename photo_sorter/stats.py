@@ -0,0 +1,213 @@
+"""
+Per-stage timing and throughput for a run: wall and CPU time, items and
+bytes for scanning, EXIF reading, matching, geocoding and writing, plus
+plain counters (e.g. geocode cache hits), so a slow run can be traced to
+disk, CPU or the geocoding server.
+
+Copyright (c) 2026 Benjoe Vidal
+Licensed under the MIT License.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+
+class StageStats:
+    """
+    Totals for one stage. wall and cpu are summed over all items (so with
+    several threads, wall can exceed the stage's elapsed time); elapsed runs
+    from the first item's start to the last item's end. Safe to share
+    between threads.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        items: int = 1,
+        wall: float = 0.0,
+        cpu: float = 0.0,
+        bytes_read: int = 0,
+        bytes_written: int = 0,
+        end: Optional[float] = None,
+    ) -> None:
+        """Record work that took wall seconds (cpu of them on the CPU) and finished at end (perf_counter)."""
+        end = time.perf_counter() if end is None else end
+        with self._lock:
+            self.items += items
+            self.wall += wall
+            self.cpu += cpu
+            self.bytes_read += bytes_read
+            self.bytes_written += bytes_written
+            if self._first is None or end - wall < self._first:
+                self._first = end - wall
+            if self._last is None or end > self._last:
+                self._last = end
+
+    @property
+    def elapsed(self) -> float:
+        return self._last - self._first if self._first is not None else 0.0
+
+    @property
+    def rate(self) -> float:
+        """Items per second over the elapsed time."""
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "wall_seconds": round(self.wall, 6),
+            "cpu_seconds": round(self.cpu, 6),
+            "elapsed_seconds": round(self.elapsed, 6),
+            "items_per_second": round(self.rate, 3),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class _Timing:
+    """Context manager that adds one timed piece of work to a StageStats."""
+    __slots__ = ("stage", "items", "bytes_read", "bytes_written", "_wall", "_cpu")
+
+    def __init__(self, stage: StageStats, items: int = 1):
+        self.stage = stage
+        self.items = items
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def __enter__(self) -> "_Timing":
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter()
+        self.stage.add(
+            self.items, end - self._wall, time.thread_time() - self._cpu,
+            self.bytes_read, self.bytes_written, end,
+        )
+
+
+class _NoTiming:
+    """Stand-in for _Timing when stats are off; byte counts set on it are ignored."""
+    bytes_read = 0
+    bytes_written = 0
+
+    def __enter__(self) -> "_NoTiming":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NO_TIMING = _NoTiming()
+
+
+class RunStats:
+    """
+    Stage timings and counters for one run. With enabled=False every method
+    is a cheap no-op, so callers can time unconditionally.
+
+    CPU time is measured per thread (time.thread_time); work done in worker
+    processes reports its own CPU time back to the caller.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: dict[str, StageStats] = {}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._stopped: Optional[tuple[float, float]] = None
+
+    def stage(self, name: str) -> Optional[StageStats]:
+        """The StageStats for name (created on first use), or None when disabled."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats(name)
+            return self.stages[name]
+
+    def timed(self, name: str, items: int = 1):
+        """Context manager timing one piece of work in stage name; set bytes_read/bytes_written on it."""
+        if not self.enabled:
+            return _NO_TIMING
+        return _Timing(self.stage(name), items)
+
+    def timed_iter(self, name: str, items: Iterable) -> Iterator:
+        """Yield from items, timing each step of the iteration in stage name."""
+        if not self.enabled:
+            yield from items
+            return
+        stage = self.stage(name)
+        iterator = iter(items)
+        while True:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            end = time.perf_counter()
+            stage.add(1, end - wall, time.thread_time() - cpu, end=end)
+            yield item
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add n to counter name."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self) -> None:
+        """Stop the run's clocks; to_dict() reports the run up to this point from now on."""
+        if self._stopped is None:
+            self._stopped = (time.perf_counter(), time.process_time())
+
+    def to_dict(self) -> dict:
+        wall, cpu = self._stopped or (time.perf_counter(), time.process_time())
+        return {
+            "wall_seconds": round(wall - self._started, 6),
+            "cpu_seconds": round(cpu - self._cpu_started, 6),
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def write_json(self, path: str | Path) -> None:
+        """Write to_dict() to path as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+
+class TimedGeocoder:
+    """
+    Wraps a geocoding client (NominatimClient or Gazetteer) so that each
+    reverse() call, i.e. each cache miss, is timed in a stage.
+    """
+
+    def __init__(self, client, stage: StageStats):
+        self.client = client
+        self.stage = stage
+
+    def reverse(self, lat: float, lon: float) -> dict:
+        with _Timing(self.stage):
+            return self.client.reverse(lat, lon)
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,58 @@
+"""Tests for the benchmark corpus generator and Nominatim stub."""
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, random_points, write_corpus
+from benchmarks.nominatim_stub import ADDRESS_SHAPES, NominatimStub, StubConfig, place_name, reverse_response
+from photo_sorter.exif_reader import get_gps_from_image
+from photo_sorter.geocode import _parse_nominatim, get_place_name
+from photo_sorter.geocode_client import NominatimClient
+
+
+@pytest.mark.parametrize("fmt", ["jpeg", "heif", "tiff", "png"])
+@pytest.mark.parametrize("thumbnail_bytes", [0, 2000])
+def test_corpus_gps_round_trips(tmp_path, fmt, thumbnail_bytes):
+    spec = CorpusSpec(
+        count=20, formats={fmt: 1.0}, no_gps=0, corrupt=0, duplicates=0, thumbnail_bytes=thumbnail_bytes, seed=3
+    )
+    paths = write_corpus(tmp_path, spec)
+    points = random_points(spec.count, spec.clusters, spec.spread_km, spec.seed)
+    for path, (lat, lon) in zip(paths, points):
+        got = get_gps_from_image(path)
+        assert got == pytest.approx((lat, lon), abs=1e-5)
+        assert path.stat().st_size >= spec.file_bytes
+
+
+def test_corpus_is_reproducible(tmp_path):
+    spec = CorpusSpec(count=50, duplicates=0.3, no_gps=0.2, corrupt=0.1)
+    first = [p.read_bytes() for p in write_corpus(tmp_path / "a", spec)]
+    second = [p.read_bytes() for p in write_corpus(tmp_path / "b", spec)]
+    assert first == second
+    assert len(set(first)) < len(first)  # some duplicates
+
+
+def test_stub_answers_reverse():
+    with NominatimStub() as stub, NominatimClient(stub.url, rate=0) as client:
+        name = get_place_name(25.03, 121.56, single_word_english=True, client=client)
+    assert name == place_name(25.03, 121.56)
+    assert stub.requests == 1
+
+
+def test_stub_errors_are_retried():
+    config = StubConfig(error_rate=0.5, seed=1)
+    with NominatimStub(config=config) as stub, NominatimClient(stub.url, rate=0, retries=10) as client:
+        names = [get_place_name(lat, 121.5, single_word_english=True, client=client) for lat in range(10, 20)]
+    assert names == [place_name(lat, 121.5) for lat in range(10, 20)]
+    assert stub.errors > 0
+    assert stub.requests == 10 + stub.errors
+
+
+@pytest.mark.parametrize("shape", [s for s in ADDRESS_SHAPES if s != "mixed"])
+def test_stub_address_shapes(shape):
+    name, _address = _parse_nominatim(reverse_response(25.03, 121.56, shape))
+    if shape == "empty":
+        assert name is None
+    elif shape == "postcode":
+        assert name.endswith("County")  # the postcode is skipped
+    else:
+        assert place_name(25.03, 121.56) in name
@@ -0,0 +1,360 @@
+"""Tests for the run() orchestration (no network)."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from photo_sorter.cli import run
+from photo_sorter.config import PointLocation, SorterConfig
+
+piexif = pytest.importorskip("piexif")
+
+
+def _write_gps_jpeg(path: Path, lat: float, lon: float) -> None:
+    from PIL import Image
+
+    def rational(value):
+        return ((int(value), 1), (int(value * 60) % 60, 1), (int(round(value * 360000)) % 6000, 100))
+
+    gps_ifd = {
+        piexif.GPSIFD.GPSLatitudeRef: b"N",
+        piexif.GPSIFD.GPSLatitude: rational(lat),
+        piexif.GPSIFD.GPSLongitudeRef: b"E",
+        piexif.GPSIFD.GPSLongitude: rational(lon),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (8, 8)).save(path, "JPEG", exif=piexif.dump({"GPS": gps_ifd}))
+
+
+def _make_photos(root: Path) -> None:
+    _write_gps_jpeg(root / "taipei1.jpg", 25.0339, 121.5645)
+    _write_gps_jpeg(root / "sub" / "taipei2.jpg", 25.0340, 121.5646)
+    _write_gps_jpeg(root / "sub" / "shifen.jpg", 25.0426, 121.7762)
+    (root / "no_gps.jpg").write_bytes(b"\xff\xd8\xff\xd9")
+    (root / "notes.txt").write_text("not an image")
+
+
+def _tree(root: Path) -> list[str]:
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*") if p.is_file())
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_run_auto_mode_coordinates(tmp_path, workers):
+    _make_photos(tmp_path / "in")
+    summary = run(tmp_path / "in", tmp_path / "out", SorterConfig(), workers=workers)
+    assert summary["total"] == 4
+    assert summary["sorted"] == 4
+    assert summary["skipped_no_gps"] == 1
+    assert summary["bytes_copied"] > 0
+    assert summary["errors"] == []
+    assert _tree(tmp_path / "out") == [
+        "Lat25_0Lon121_6/taipei1.jpg",
+        "Lat25_0Lon121_6/taipei2.jpg",
+        "Lat25_0Lon121_8/shifen.jpg",
+        "Skipped/no_gps.jpg",
+    ]
+
+
+def test_run_creates_each_folder_once(tmp_path, monkeypatch):
+    import photo_sorter.cli as cli
+
+    _make_photos(tmp_path / "in")
+    created = []
+    real_ensure = cli.ensure_directory
+    monkeypatch.setattr(cli, "ensure_directory", lambda d: created.append(d) or real_ensure(d))
+    summary = run(tmp_path / "in", tmp_path / "out", SorterConfig())
+    assert summary["sorted"] == 4
+    assert sorted(p.name for p in created) == ["Lat25_0Lon121_6", "Lat25_0Lon121_8", "Skipped"]
+
+
+def test_run_config_mode_move(tmp_path):
+    _make_photos(tmp_path / "in")
+    config = SorterConfig(locations=[PointLocation("Taipei City", 25.0339, 121.5645, radius_km=0.5)])
+    summary = run(tmp_path / "in", tmp_path / "out", config, move=True, workers=2)
+    assert summary["total"] == 4
+    assert summary["sorted"] == 4
+    assert _tree(tmp_path / "out") == [
+        "Skipped/no_gps.jpg",
+        "TaipeiCity/taipei1.jpg",
+        "TaipeiCity/taipei2.jpg",
+        "Uncategorized/shifen.jpg",
+    ]
+    assert _tree(tmp_path / "in") == ["notes.txt"]
+
+
+def test_run_empty_input(tmp_path):
+    (tmp_path / "in").mkdir()
+    summary = run(tmp_path / "in", tmp_path / "out", SorterConfig())
+    assert summary["total"] == 0
+    assert summary["errors"] == []
+
+
+def test_run_output_inside_input_is_not_rescanned(tmp_path):
+    _make_photos(tmp_path)
+    config = SorterConfig(locations=[PointLocation("Taipei City", 25.0339, 121.5645, radius_km=0.5)])
+    summary = run(tmp_path, tmp_path / "sorted", config)
+    assert summary["total"] == 4
+    assert summary["sorted"] == 4
+    assert _tree(tmp_path / "sorted") == [
+        "Skipped/no_gps.jpg",
+        "TaipeiCity/taipei1.jpg",
+        "TaipeiCity/taipei2.jpg",
+        "Uncategorized/shifen.jpg",
+    ]
+
+
+def test_run_with_index_skips_unchanged_files(tmp_path, monkeypatch):
+    _make_photos(tmp_path / "in")
+    index_path = tmp_path / "index.sqlite"
+    first = run(tmp_path / "in", tmp_path / "out", SorterConfig(), index_path=index_path)
+    assert first["sorted"] == 4
+    assert first["unchanged"] == 0
+
+    import photo_sorter.exif_reader as exif_reader
+
+    def fail(path):
+        raise AssertionError(f"EXIF re-read for unchanged file {path}")
+
+    monkeypatch.setattr(exif_reader, "get_gps_from_image", fail)
+    second = run(tmp_path / "in", tmp_path / "out", SorterConfig(), index_path=index_path, workers=2)
+    assert second["errors"] == []
+    assert second["sorted"] == 4
+    assert second["unchanged"] == 4
+    assert len(_tree(tmp_path / "out")) == 4  # no "(1)" duplicates
+
+
+def test_run_auto_mode_with_gazetteer(tmp_path):
+    _make_photos(tmp_path / "in")
+    gazetteer = tmp_path / "places.csv"
+    gazetteer.write_text("name,lat,lon\nTaipei,25.0478,121.5319\nShifen,25.0426,121.7762\n", encoding="utf-8")
+    summary = run(
+        tmp_path / "in",
+        tmp_path / "out",
+        SorterConfig(),
+        geocode=True,
+        geocode_cache_path=tmp_path / "cache.json",
+        gazetteer_path=gazetteer,
+    )
+    assert summary["errors"] == []
+    assert _tree(tmp_path / "out") == [
+        "Shifen/shifen.jpg",
+        "Skipped/no_gps.jpg",
+        "Taipei/taipei1.jpg",
+        "Taipei/taipei2.jpg",
+    ]
+
+
+def test_run_stats(tmp_path):
+    import json
+
+    _make_photos(tmp_path / "in")
+    gazetteer = tmp_path / "places.csv"
+    gazetteer.write_text("name,lat,lon\nTaipei,25.0478,121.5319\nShifen,25.0426,121.7762\n", encoding="utf-8")
+    kwargs = dict(geocode=True, geocode_cache_path=tmp_path / "cache.json", gazetteer_path=gazetteer)
+    assert "stats" not in run(tmp_path / "in", tmp_path / "out1", SorterConfig(), **kwargs)
+    summary = run(tmp_path / "in", tmp_path / "out2", SorterConfig(), stats_path=tmp_path / "stats.json", **kwargs)
+    stats = summary["stats"]
+    assert json.loads((tmp_path / "stats.json").read_text()) == stats
+    stages = stats["stages"]
+    assert stages["scan"]["items"] == 4
+    assert stages["exif"]["items"] == 4
+    assert stages["geocode"]["items"] == 2
+    assert stages["write"]["items"] == 4
+    assert stages["write"]["bytes_written"] == summary["bytes_copied"]
+    images = sum(p.stat().st_size for p in (tmp_path / "in").rglob("*.jpg"))
+    assert stages["scan"]["bytes_read"] == 0
+    assert 0 < stages["exif"]["bytes_read"] <= images
+    # The first run filled the cache
+    assert stats["counters"] == {"geocode_cache_hits": 2, "geocode_cache_misses": 0}
+
+    kwargs["geocode_cache_path"] = tmp_path / "fresh.json"
+    stats = run(tmp_path / "in", tmp_path / "out3", SorterConfig(), collect_stats=True, **kwargs)["stats"]
+    assert stats["stages"]["geocode_gazetteer"]["items"] == 2
+    assert "geocode_network" not in stats["stages"]
+    assert stats["counters"] == {"geocode_cache_hits": 0, "geocode_cache_misses": 2}
+
+
+@pytest.mark.parametrize("dedup", ["skip", "hardlink"])
+def test_run_dedup(tmp_path, dedup):
+    _make_photos(tmp_path / "in")
+    (tmp_path / "in" / "backup").mkdir()
+    (tmp_path / "in" / "backup" / "taipei1.jpg").write_bytes((tmp_path / "in" / "taipei1.jpg").read_bytes())
+    summary = run(tmp_path / "in", tmp_path / "out", SorterConfig(), dedup=dedup)
+    assert summary["errors"] == []
+    assert summary["duplicates"] == 1
+    out = tmp_path / "out" / "Lat25_0Lon121_6"
+    if dedup == "skip":
+        assert sorted(p.name for p in out.iterdir()) == ["taipei1.jpg", "taipei2.jpg"]
+    else:
+        assert sorted(p.name for p in out.iterdir()) == ["taipei1 (1).jpg", "taipei1.jpg", "taipei2.jpg"]
+        assert (out / "taipei1 (1).jpg").stat().st_ino == (out / "taipei1.jpg").stat().st_ino
+
+
+def test_plan_then_apply(tmp_path):
+    from photo_sorter.cli import main
+
+    _make_photos(tmp_path / "in")
+    (tmp_path / "in" / "again").mkdir()
+    (tmp_path / "in" / "again" / "taipei1.jpg").write_bytes((tmp_path / "in" / "taipei1.jpg").read_bytes())
+    plan = tmp_path / "plan.jsonl"
+    summary = run(tmp_path / "in", tmp_path / "out", SorterConfig(), plan_path=plan, dedup="hardlink")
+    assert summary["planned"] == 5
+    assert summary["duplicates"] == 1
+    assert not (tmp_path / "out").exists() or _tree(tmp_path / "out") == []
+    assert main(["--apply", str(plan), "--workers", "2"]) == 0
+    assert _tree(tmp_path / "out") == [
+        "Lat25_0Lon121_6/taipei1 (1).jpg",
+        "Lat25_0Lon121_6/taipei1.jpg",
+        "Lat25_0Lon121_6/taipei2.jpg",
+        "Lat25_0Lon121_8/shifen.jpg",
+        "Skipped/no_gps.jpg",
+    ]
+    out = tmp_path / "out" / "Lat25_0Lon121_6"
+    assert (out / "taipei1 (1).jpg").stat().st_ino == (out / "taipei1.jpg").stat().st_ino
+    assert len(_tree(tmp_path / "in")) == 6  # copies only
+
+
+def test_plan_with_index_links_to_earlier_run(tmp_path):
+    from photo_sorter.cli import main
+
+    _write_gps_jpeg(tmp_path / "in" / "a.jpg", 25.0339, 121.5645)
+    index = tmp_path / "index.sqlite"
+    run(tmp_path / "in", tmp_path / "out", SorterConfig(), index_path=index)
+    (tmp_path / "in" / "c.jpg").write_bytes((tmp_path / "in" / "a.jpg").read_bytes())
+    plan = tmp_path / "plan.jsonl"
+    summary = run(tmp_path / "in", tmp_path / "out", SorterConfig(), index_path=index, plan_path=plan, dedup="hardlink")
+    assert summary["errors"] == []
+    assert summary["duplicates"] == 1
+    assert summary["planned"] == 1
+    assert main(["--apply", str(plan)]) == 0
+    out = tmp_path / "out" / "Lat25_0Lon121_6"
+    assert (out / "c.jpg").stat().st_ino == (out / "a.jpg").stat().st_ino
+
+
+def test_auto_mode_folder_survives_new_photos(tmp_path):
+    _write_gps_jpeg(tmp_path / "in" / "a.jpg", 25.030, 121.560)
+    _write_gps_jpeg(tmp_path / "in" / "b.jpg", 25.040, 121.565)
+    index = tmp_path / "index.sqlite"
+    run(tmp_path / "in", tmp_path / "out", SorterConfig(), index_path=index)
+    assert _tree(tmp_path / "out") == ["Lat25_0Lon121_6/a.jpg", "Lat25_0Lon121_6/b.jpg"]
+    _write_gps_jpeg(tmp_path / "in" / "c.jpg", 25.080, 121.600)  # north of the cluster
+    _write_gps_jpeg(tmp_path / "in" / "d.jpg", 24.945, 121.560)  # new lowest member, in another grid cell
+    summary = run(tmp_path / "in", tmp_path / "out", SorterConfig(), index_path=index)
+    assert summary["unchanged"] == 2
+    assert _tree(tmp_path / "out") == [f"Lat25_0Lon121_6/{name}.jpg" for name in "abcd"]
+
+
+def test_main_requires_input_without_apply(capsys):
+    from photo_sorter.cli import main
+
+    with pytest.raises(SystemExit):
+        main(["--output", "out"])
+
+
+def test_run_with_journal_resumes(tmp_path, monkeypatch):
+    _make_photos(tmp_path / "in")
+    journal = tmp_path / "journal.jsonl"
+    first = run(tmp_path / "in", tmp_path / "out", SorterConfig(), journal_path=journal)
+    assert first["sorted"] == 4
+    assert first["resumed"] == 0
+
+    import photo_sorter.exif_reader as exif_reader
+
+    def fail(path):
+        raise AssertionError(f"EXIF re-read for completed file {path}")
+
+    monkeypatch.setattr(exif_reader, "get_gps_from_image", fail)
+    second = run(tmp_path / "in", tmp_path / "out", SorterConfig(), journal_path=journal)
+    assert second["errors"] == []
+    assert second["resumed"] == 4
+    assert len(_tree(tmp_path / "out")) == 4
+
+
+@pytest.mark.parametrize("dedup", ["skip", "hardlink"])
+def test_run_with_journal_dedup_and_move(tmp_path, dedup):
+    _make_photos(tmp_path / "in")
+    for name in ("a", "b"):
+        (tmp_path / "in" / name).mkdir()
+        (tmp_path / "in" / name / "taipei1.jpg").write_bytes((tmp_path / "in" / "taipei1.jpg").read_bytes())
+    summary = run(
+        tmp_path / "in", tmp_path / "out", SorterConfig(), move=True, dedup=dedup,
+        journal_path=tmp_path / "journal.jsonl",
+    )
+    assert summary["errors"] == []
+    assert summary["duplicates"] == 2
+    out = tmp_path / "out" / "Lat25_0Lon121_6"
+    if dedup == "skip":
+        assert sorted(p.name for p in out.iterdir()) == ["taipei1.jpg", "taipei2.jpg"]
+        assert _tree(tmp_path / "in") == ["a/taipei1.jpg", "b/taipei1.jpg", "notes.txt"]
+    else:
+        names = ["taipei1 (1).jpg", "taipei1 (2).jpg", "taipei1.jpg", "taipei2.jpg"]
+        assert sorted(p.name for p in out.iterdir()) == names
+        assert len({(out / name).stat().st_ino for name in names[:3]}) == 1
+        assert _tree(tmp_path / "in") == ["notes.txt"]
+
+
+# Imported on first use only; none is needed for --help or a JPEG-only run
+LAZY_MODULES = ("PIL", "pillow_heif", "piexif", "numpy", "yaml", "unidecode", "http.client", "multiprocessing")
+
+
+def _modules_loaded_by(code: str) -> list[str]:
+    script = code + "\nimport sys\nprint('loaded:', *(m for m in %r if m in sys.modules))" % (LAZY_MODULES,)
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return out.stdout.splitlines()[-1].split()[1:]
+
+
+def test_help_does_not_import_optional_modules():
+    code = "from photo_sorter.cli import main\ntry:\n    main(['--help'])\nexcept SystemExit:\n    pass"
+    assert _modules_loaded_by(code) == []
+
+
+def test_jpeg_run_does_not_import_optional_modules(tmp_path):
+    _write_gps_jpeg(tmp_path / "in" / "a.jpg", 25.0339, 121.5645)
+    code = f"from photo_sorter.cli import main\nmain(['-i', {str(tmp_path / 'in')!r}, '-o', {str(tmp_path / 'out')!r}, '--no-geocode'])"
+    assert _modules_loaded_by(code) == []
+    assert len(list((tmp_path / "out").rglob("a.jpg"))) == 1
+
+
+# Die mid-way through the 10th copy, leaving a partial file behind
+CRASH_IN_COPY = (
+    "import photo_sorter.file_ops as file_ops\n"
+    "calls = []\n"
+    "copy_file = file_ops.copy_file\n"
+    "def crash(source, dest_path, stats=None):\n"
+    "    calls.append(source)\n"
+    "    if len(calls) == 10:\n"
+    "        with open(dest_path, 'wb') as f:\n"
+    "            f.write(source.read_bytes()[:7])\n"
+    "        os._exit(3)\n"
+    "    return copy_file(source, dest_path, stats)\n"
+    "file_ops.copy_file = crash\n"
+)
+# Die before the first batch is fsynced: names are claimed but nothing is journaled
+CRASH_BEFORE_SYNC = (
+    "import photo_sorter.journal as journal\n"
+    "journal.Journal.sync = lambda self: os._exit(3)\n"
+)
+
+
+@pytest.mark.parametrize("crash", [CRASH_IN_COPY, CRASH_BEFORE_SYNC], ids=["in_copy", "before_sync"])
+def test_journal_resumes_after_crash(tmp_path, crash):
+    for i in range(24):
+        _write_gps_jpeg(tmp_path / "in" / f"x{i:02d}.jpg", 25.0339, 121.5645)
+    journal = tmp_path / "journal.jsonl"
+    args = ["-i", str(tmp_path / "in"), "-o", str(tmp_path / "out"), "--no-geocode", "--journal", str(journal)]
+    script = "import os\n" + crash + f"from photo_sorter.cli import main\nmain({args!r})\n"
+    crashed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert crashed.returncode == 3
+    if crash is CRASH_IN_COPY:
+        assert len(journal.read_text().splitlines()) >= 24  # every plan was synced before copying
+
+    from photo_sorter.cli import main
+
+    main(args)
+    out = tmp_path / "out"
+    sorted_files = [p for p in out.rglob("*") if p.is_file()]
+    assert sorted(p.name for p in sorted_files) == [f"x{i:02d}.jpg" for i in range(24)]
+    for p in sorted_files:
+        assert p.read_bytes() == (tmp_path / "in" / p.name).read_bytes()
@@ -0,0 +1,83 @@
+"""Tests for distance-based clustering."""
+
+import random
+
+from photo_sorter.clustering import cluster_points
+from photo_sorter.location_matcher import haversine_km
+
+
+def _groups(points, keys):
+    groups = {}
+    for point, key in zip(points, keys):
+        groups.setdefault(key, set()).add(point)
+    return sorted(sorted(g) for g in groups.values())
+
+
+def _brute_force_groups(points, radius_km):
+    parent = list(range(len(points)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i, a in enumerate(points):
+        for j in range(i + 1, len(points)):
+            b = points[j]
+            if haversine_km(a[0], a[1], b[0], b[1]) <= radius_km:
+                parent[find(j)] = find(i)
+    groups = {}
+    for i, point in enumerate(points):
+        groups.setdefault(find(i), set()).add(point)
+    return sorted(sorted(g) for g in groups.values())
+
+
+def test_nearby_points_across_rounding_boundary_share_a_cluster():
+    # 25.049 and 25.051 round to different 0.1° grid cells but are ~220 m apart
+    keys = cluster_points([(25.049, 121.5), (25.051, 121.5)], radius_km=10)
+    assert keys[0] == keys[1]
+
+
+def test_far_points_are_separate_and_chains_are_joined():
+    points = [(0.0, 0.0), (0.0, 0.08), (0.0, 0.16), (0.0, 1.0)]
+    keys = cluster_points(points, radius_km=10)  # 0.08° ≈ 8.9 km
+    assert keys[0] == keys[1] == keys[2]
+    assert keys[3] != keys[0]
+
+
+def test_keys_do_not_depend_on_input_order():
+    rng = random.Random(1)
+    points = [(25 + rng.uniform(-0.5, 0.5), 121 + rng.uniform(-0.5, 0.5)) for _ in range(200)]
+    keys = dict(zip(points, cluster_points(points, radius_km=3)))
+    shuffled = points[:]
+    rng.shuffle(shuffled)
+    assert dict(zip(shuffled, cluster_points(shuffled, radius_km=3))) == keys
+
+
+def test_matches_brute_force_single_linkage():
+    rng = random.Random(7)
+    points = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(50)]
+    for lat, lon in list(points):
+        for _ in range(3):
+            points.append((lat + rng.uniform(-0.1, 0.1), lon + rng.uniform(-0.1, 0.1)))
+    for radius in (1.0, 5.0, 25.0):
+        assert _groups(points, cluster_points(points, radius)) == _brute_force_groups(points, radius)
+
+
+def test_antimeridian_and_pole():
+    points = [(10.0, 179.99), (10.0, -179.99), (89.999, 0.0), (89.999, 180.0)]
+    keys = cluster_points(points, radius_km=5)
+    assert keys[0] == keys[1] == (10.0, -179.99)  # lowest member
+    assert keys[2] == keys[3]
+    assert keys[0] != keys[2]
+
+
+def test_key_stays_when_points_join_to_the_north():
+    points = [(25.030, 121.560), (25.040, 121.565)]
+    key = cluster_points(points, radius_km=10)[0]
+    assert key == (25.030, 121.560)
+    assert cluster_points(points + [(25.080, 121.600)], radius_km=10) == [key] * 3
+
+
+def test_empty_input():
+    assert cluster_points([], radius_km=10) == []
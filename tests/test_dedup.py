@@ -0,0 +1,78 @@
+"""Tests for duplicate detection (size, partial hash, full hash)."""
+
+import os
+
+import photo_sorter.dedup as dedup
+from photo_sorter.dedup import PARTIAL_BYTES, DuplicateFinder
+
+
+def test_finds_identical_content(tmp_path):
+    a = tmp_path / "a.jpg"
+    b = tmp_path / "b.jpg"
+    c = tmp_path / "c.jpg"
+    a.write_bytes(b"photo" * 1000)
+    b.write_bytes(b"photo" * 1000)
+    c.write_bytes(b"other" * 1000)  # same size, different content
+    finder = DuplicateFinder()
+    assert finder.find(a) is None
+    finder.add(a, tmp_path / "a.jpg")
+    assert finder.find(c) is None
+    finder.add(c)
+    assert finder.find(b) == a
+
+
+def test_unique_sizes_are_not_hashed(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(dedup, "partial_hash", lambda *args: calls.append(args) or b"")
+    finder = DuplicateFinder()
+    for i in range(5):
+        path = tmp_path / f"{i}.jpg"
+        path.write_bytes(b"x" * (i + 1))
+        assert finder.find(path) is None
+        finder.add(path)
+    assert calls == []
+
+
+def test_large_files_differing_in_the_middle(tmp_path):
+    size = 4 * PARTIAL_BYTES
+    data = bytearray(os.urandom(size))
+    a = tmp_path / "a.jpg"
+    a.write_bytes(bytes(data))
+    data[size // 2] ^= 0xFF
+    b = tmp_path / "b.jpg"
+    b.write_bytes(bytes(data))  # same size, same first/last 64 KB
+    finder = DuplicateFinder()
+    finder.find(a)
+    finder.add(a)
+    assert finder.find(b) is None
+    finder.add(b)
+    c = tmp_path / "c.jpg"
+    c.write_bytes(bytes(data))
+    assert finder.find(c) == b
+
+
+def test_location_after_move(tmp_path):
+    src = tmp_path / "a.jpg"
+    src.write_bytes(b"same")
+    finder = DuplicateFinder()
+    assert finder.find(src) is None
+    moved = tmp_path / "sorted.jpg"
+    src.rename(moved)
+    finder.add(src, moved)
+    dup = tmp_path / "b.jpg"
+    dup.write_bytes(b"same")
+    assert finder.find(dup) == moved
+
+
+def test_relocate_after_add(tmp_path):
+    src = tmp_path / "a.jpg"
+    src.write_bytes(b"same")
+    finder = DuplicateFinder()
+    assert finder.find(src) is None
+    finder.add(src)  # still at its source for now
+    moved = tmp_path / "sorted.jpg"
+    src.rename(moved)
+    finder.relocate(src, moved)
+    dup = tmp_path / "b.jpg"
+    dup.write_bytes(b"same")
+    assert finder.find(dup) == moved
@@ -0,0 +1,217 @@
+"""Tests for the header-only EXIF GPS walker."""
+
+import io
+import struct
+
+import pytest
+
+from photo_sorter.exif_gps import ExifFormatError, read_heif_gps, read_jpeg_gps, read_png_gps, read_tiff_gps, sniff_format
+from photo_sorter.exif_reader import get_gps_from_image
+
+
+def _little_endian_tiff_with_gps() -> bytes:
+    """Build a minimal little-endian TIFF: IFD0 with a GPS pointer, GPS IFD with 4 tags."""
+    ifd0_offset = 8
+    gps_offset = ifd0_offset + 2 + 12 + 4
+    data_offset = gps_offset + 2 + 4 * 12 + 4
+    lat = struct.pack("<6I", 25, 1, 2, 1, 2, 1)
+    lon = struct.pack("<6I", 121, 1, 33, 1, 52, 1)
+    out = b"II" + struct.pack("<HI", 42, ifd0_offset)
+    out += struct.pack("<H", 1) + struct.pack("<HHII", 0x8825, 4, 1, gps_offset) + struct.pack("<I", 0)
+    out += struct.pack("<H", 4)
+    out += struct.pack("<HHI", 1, 2, 2) + b"N\x00\x00\x00"
+    out += struct.pack("<HHII", 2, 5, 3, data_offset)
+    out += struct.pack("<HHI", 3, 2, 2) + b"W\x00\x00\x00"
+    out += struct.pack("<HHII", 4, 5, 3, data_offset + 24)
+    out += struct.pack("<I", 0)
+    return out + lat + lon
+
+
+class _CountingReader(io.BytesIO):
+    """BytesIO that records how many bytes were read."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, n=-1):
+        chunk = super().read(n)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_read_tiff_gps_little_endian():
+    gps = read_tiff_gps(io.BytesIO(_little_endian_tiff_with_gps()))
+    assert gps[1] == b"N"
+    assert gps[2] == ((25, 1), (2, 1), (2, 1))
+    assert gps[3] == b"W"
+    assert gps[4] == ((121, 1), (33, 1), (52, 1))
+
+
+def test_tiff_file_via_get_gps(tmp_path):
+    path = tmp_path / "photo.tif"
+    path.write_bytes(_little_endian_tiff_with_gps())
+    lat, lon = get_gps_from_image(path)
+    assert abs(lat - 25.0339) < 0.01
+    assert abs(lon + 121.5645) < 0.01
+
+
+def test_read_jpeg_gps_reads_only_header(tmp_path):
+    piexif = pytest.importorskip("piexif")
+    from PIL import Image
+
+    exif_bytes = piexif.dump({
+        "GPS": {
+            piexif.GPSIFD.GPSLatitudeRef: b"S",
+            piexif.GPSIFD.GPSLatitude: ((33, 1), (52, 1), (0, 1)),
+            piexif.GPSIFD.GPSLongitudeRef: b"E",
+            piexif.GPSIFD.GPSLongitude: ((151, 1), (12, 1), (30, 1)),
+        },
+    })
+    buf = io.BytesIO()
+    noise = Image.effect_noise((512, 512), 64).convert("RGB")
+    noise.save(buf, "JPEG", exif=exif_bytes, quality=95)
+    data = buf.getvalue()
+
+    reader = _CountingReader(data)
+    gps = read_jpeg_gps(reader)
+    assert gps[1] == b"S"
+    assert gps[4] == ((151, 1), (12, 1), (30, 1))
+    assert reader.bytes_read < 1024 < len(data)
+
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(data)
+    lat, lon = get_gps_from_image(path)
+    assert abs(lat + 33.8667) < 0.01
+    assert abs(lon - 151.2083) < 0.01
+
+
+def test_read_jpeg_gps_no_exif():
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, "JPEG")
+    assert read_jpeg_gps(io.BytesIO(buf.getvalue())) is None
+
+
+def test_read_jpeg_gps_rejects_garbage():
+    with pytest.raises(ExifFormatError):
+        read_jpeg_gps(io.BytesIO(b"not a jpeg"))
+    with pytest.raises(ExifFormatError):
+        # Exif segment whose TIFF header is cut off
+        read_jpeg_gps(io.BytesIO(b"\xff\xd8\xff\xe1\x00\x10Exif\x00\x00II"))
+
+
+def test_corrupt_jpeg_falls_back_without_error(tmp_path):
+    path = tmp_path / "broken.jpg"
+    path.write_bytes(b"\xff\xd8\xff\xe1\x00\x10Exif\x00\x00II*\x00")
+    assert get_gps_from_image(path) is None
+
+
+def _box(kind: bytes, payload: bytes, version: int = None) -> bytes:
+    if version is not None:  # full box
+        payload = struct.pack(">I", version << 24) + payload
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def _heif_with_exif(in_idat: bool = False, with_exif: bool = True) -> bytes:
+    """A HEIF laid out like an iPhone HEIC: ftyp, meta (iinf, iloc), mdat with the image and the Exif item."""
+    exif_item = struct.pack(">I", 6) + b"Exif\x00\x00" + _little_endian_tiff_with_gps()
+    image = b"\x00" * 64  # stands in for the coded image
+    items = [(1, b"hvc1")] + ([(2, b"Exif")] if with_exif else [])
+    infe = b"".join(_box(b"infe", struct.pack(">HH4s", i, 0, t) + b"\x00", version=2) for i, t in items)
+    iinf = _box(b"iinf", struct.pack(">H", len(items)) + infe, version=0)
+    ftyp = _box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+
+    def build(image_offset: int, exif_offset: int) -> bytes:
+        def entry(item_id, method, offset, length):
+            return struct.pack(">HHHHII", item_id, method, 0, 1, offset, length)
+
+        entries = entry(1, 0, image_offset, len(image))
+        if with_exif:
+            entries += entry(2, 1 if in_idat else 0, exif_offset, len(exif_item))
+        iloc = _box(b"iloc", bytes([0x44, 0x00]) + struct.pack(">H", len(items)) + entries, version=1)
+        idat = _box(b"idat", exif_item) if in_idat else b""
+        meta = _box(b"meta", _box(b"hdlr", b"\x00" * 4 + b"pict" + b"\x00" * 13, version=0) + iinf + iloc + idat, version=0)
+        mdat = _box(b"mdat", image + (b"" if in_idat else exif_item))
+        return ftyp + meta + mdat
+
+    draft = build(0, 0)  # same size, so the real offsets can be computed from it
+    image_offset = len(draft) - len(_box(b"mdat", image + (b"" if in_idat else exif_item))) + 8
+    return build(image_offset, 0 if in_idat else image_offset + len(image))
+
+
+@pytest.mark.parametrize("in_idat", [False, True])
+def test_read_heif_gps(in_idat):
+    gps = read_heif_gps(io.BytesIO(_heif_with_exif(in_idat=in_idat)))
+    assert gps[1] == b"N"
+    assert gps[4] == ((121, 1), (33, 1), (52, 1))
+
+
+def test_heic_file_via_get_gps(tmp_path):
+    path = tmp_path / "IMG_0001.HEIC"
+    path.write_bytes(_heif_with_exif())
+    lat, lon = get_gps_from_image(path)
+    assert abs(lat - 25.0339) < 0.01
+    assert abs(lon + 121.5645) < 0.01
+
+
+def test_read_heif_gps_without_exif_item():
+    assert read_heif_gps(io.BytesIO(_heif_with_exif(with_exif=False))) is None
+
+
+def test_read_heif_gps_rejects_garbage():
+    with pytest.raises(ExifFormatError):
+        read_heif_gps(io.BytesIO(b"\xff\xd8\xff\xd9"))
+    with pytest.raises(ExifFormatError):
+        read_heif_gps(io.BytesIO(_heif_with_exif()[:200]))  # cut inside meta
+
+
+def _png(exif: bytes = None, raw_profile: bool = False) -> bytes:
+    from PIL import Image
+    from PIL.PngImagePlugin import PngInfo
+
+    info = PngInfo()
+    if raw_profile:  # ImageMagick's hex-encoded text chunk
+        info.add_text("Raw profile type exif", f"\nexif\n{len(exif):8d}\n{exif.hex()}\n")
+        exif = None
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, "PNG", pnginfo=info, **({"exif": exif} if exif else {}))
+    return buf.getvalue()
+
+
+def test_read_png_gps():
+    data = _png(_little_endian_tiff_with_gps())
+    assert b"eXIf" in data
+    gps = read_png_gps(io.BytesIO(data))
+    assert gps[1] == b"N"
+    assert gps[2] == ((25, 1), (2, 1), (2, 1))
+    assert read_png_gps(io.BytesIO(_png())) is None
+    with pytest.raises(ExifFormatError):
+        read_png_gps(io.BytesIO(b"\xff\xd8\xff\xd9"))
+
+
+def test_png_file_via_get_gps(tmp_path):
+    path = tmp_path / "screenshot.png"
+    path.write_bytes(_png(_little_endian_tiff_with_gps()))
+    lat, lon = get_gps_from_image(path)
+    assert abs(lat - 25.0339) < 0.01
+    assert abs(lon + 121.5645) < 0.01
+
+
+def test_pillow_fallback_reads_gps(tmp_path):
+    # The walker hands Exif in a PNG text chunk over to Pillow
+    path = tmp_path / "magick.png"
+    path.write_bytes(_png(_little_endian_tiff_with_gps(), raw_profile=True))
+    with pytest.raises(ExifFormatError):
+        read_png_gps(io.BytesIO(path.read_bytes()))
+    lat, lon = get_gps_from_image(path)
+    assert abs(lat - 25.0339) < 0.01
+    assert abs(lon + 121.5645) < 0.01
+
+
+def test_format_is_sniffed_not_guessed_from_suffix(tmp_path):
+    path = tmp_path / "really_a_tiff.jpg"
+    path.write_bytes(_little_endian_tiff_with_gps())
+    assert sniff_format(path.read_bytes()[:12]) == "tiff"
+    assert get_gps_from_image(path) is not None
@@ -8,6 +8,7 @@ import pytest
 from photo_sorter.exif_reader import (
     get_gps_from_image,
     is_image_file,
+    iter_gps_from_images,
     IMAGE_EXTENSIONS,
 )
 
@@ -77,3 +78,38 @@ def test_get_gps_with_embedded_gps(tmp_path):
     lat, lon = result
     assert abs(lat - 25.0339) < 0.01
     assert abs(lon - 121.5645) < 0.01
+
+
+def _write_gps_jpeg(path, lat_deg):
+    import piexif
+    from PIL import Image
+
+    gps_ifd = {
+        piexif.GPSIFD.GPSLatitudeRef: b"N",
+        piexif.GPSIFD.GPSLatitude: ((lat_deg, 1), (0, 1), (0, 1)),
+        piexif.GPSIFD.GPSLongitudeRef: b"E",
+        piexif.GPSIFD.GPSLongitude: ((121, 1), (0, 1), (0, 1)),
+    }
+    Image.new("RGB", (8, 8)).save(path, "JPEG", exif=piexif.dump({"GPS": gps_ifd}))
+
+
+@pytest.mark.parametrize("workers,use_processes", [(1, False), (4, False), (2, True)])
+def test_iter_gps_from_images_keeps_order(tmp_path, workers, use_processes):
+    pytest.importorskip("piexif")
+    paths = []
+    for i in range(40):
+        p = tmp_path / f"img{i:02d}.jpg"
+        if i % 5 == 0:
+            p.write_bytes(b"not really a jpeg")
+        else:
+            _write_gps_jpeg(p, i)
+        paths.append(p)
+
+    results = list(iter_gps_from_images(iter(paths), workers=workers, use_processes=use_processes))
+    assert [r[0] for r in results] == paths
+    for i, (path, gps, error) in enumerate(results):
+        assert error is None
+        if i % 5 == 0:
+            assert gps is None
+        else:
+            assert abs(gps[0] - i) < 1e-9
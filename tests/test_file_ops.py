@@ -1,11 +1,18 @@
 """Tests for file operations (copy, move, unique path)."""
 
+import errno
+import os
 from pathlib import Path
 
 import pytest
 
 from photo_sorter.file_ops import (
+    LINK_MODES,
+    CopyStats,
+    DestinationRegistry,
+    copy_file,
     ensure_directory,
+    place_file,
     unique_destination_path,
     copy_image,
     move_image,
@@ -67,3 +74,182 @@ def test_move_image(tmp_path):
     assert result == dest_dir / "img.jpg"
     assert result.read_text() == "content"
     assert not (src / "img.jpg").exists()
+
+
+def test_dest_exists_skips_mkdir(tmp_path):
+    src = tmp_path / "img.jpg"
+    src.write_text("content")
+    with pytest.raises(FileNotFoundError):
+        copy_image(src, tmp_path / "missing", dest_exists=True)
+    (tmp_path / "out").mkdir()
+    assert copy_image(src, tmp_path / "out", dest_exists=True).read_text() == "content"
+    assert move_image(src, tmp_path / "out", dest_exists=True) == tmp_path / "out" / "img (1).jpg"
+
+
+@pytest.mark.parametrize("link_mode", LINK_MODES)
+def test_copy_image_link_modes(tmp_path, link_mode):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "img.jpg").write_text("content")
+    result = copy_image(src / "img.jpg", tmp_path / "out", link_mode=link_mode)
+    assert result == tmp_path / "out" / "img.jpg"
+    assert result.read_text() == "content"
+    assert (src / "img.jpg").read_text() == "content"
+
+
+def test_place_file_hardlink_and_symlink(tmp_path):
+    src = tmp_path / "img.jpg"
+    src.write_text("content")
+    assert place_file(src, tmp_path / "hard.jpg", "hardlink") == "hardlink"
+    assert (tmp_path / "hard.jpg").stat().st_ino == src.stat().st_ino
+    if place_file(src, tmp_path / "soft.jpg", "symlink") == "symlink":
+        assert (tmp_path / "soft.jpg").is_symlink()
+        assert (tmp_path / "soft.jpg").resolve() == src.resolve()
+
+
+def test_place_file_reflink_falls_back_to_copy(tmp_path):
+    src = tmp_path / "img.jpg"
+    src.write_text("content")
+    used = place_file(src, tmp_path / "clone.jpg", "reflink")
+    assert used in ("reflink", "copy")  # copy on filesystems without reflinks
+    assert (tmp_path / "clone.jpg").read_text() == "content"
+    assert (tmp_path / "clone.jpg").stat().st_ino != src.stat().st_ino
+
+
+def test_place_file_does_not_overwrite(tmp_path):
+    src = tmp_path / "img.jpg"
+    src.write_text("new")
+    (tmp_path / "taken.jpg").write_text("old")
+    with pytest.raises(FileExistsError):
+        place_file(src, tmp_path / "taken.jpg", "hardlink")
+    assert (tmp_path / "taken.jpg").read_text() == "old"
+    with pytest.raises(ValueError):
+        place_file(src, tmp_path / "x.jpg", "clone")
+
+
+def test_copy_file_copies_data_and_metadata(tmp_path, monkeypatch):
+    import photo_sorter.file_ops as file_ops
+
+    monkeypatch.setattr(file_ops, "COPY_CHUNK_SIZE", 4096)  # several kernel calls
+    src = tmp_path / "big.jpg"
+    data = bytes(range(256)) * 100
+    src.write_bytes(data)
+    os.utime(src, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+    stats = CopyStats()
+    assert copy_file(src, tmp_path / "copy.jpg", stats) == len(data)
+    assert (tmp_path / "copy.jpg").read_bytes() == data
+    assert (tmp_path / "copy.jpg").stat().st_mtime_ns == src.stat().st_mtime_ns
+    assert (stats.files, stats.bytes) == (1, len(data))
+    assert stats.rate > 0
+
+
+def test_copy_file_falls_back_without_kernel_copy(tmp_path, monkeypatch):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    monkeypatch.setattr(os, "sendfile", unsupported, raising=False)
+    src = tmp_path / "img.jpg"
+    src.write_bytes(b"x" * 10_000)
+    assert copy_file(src, tmp_path / "copy.jpg") == 10_000
+    assert (tmp_path / "copy.jpg").read_bytes() == b"x" * 10_000
+
+
+def test_copy_file_when_kernel_copy_returns_nothing(tmp_path, monkeypatch):
+    # overlayfs / FUSE: the call "succeeds" without copying anything
+    monkeypatch.setattr(os, "copy_file_range", lambda *args: 0, raising=False)
+    monkeypatch.setattr(os, "sendfile", lambda *args: 0, raising=False)
+    src = tmp_path / "img.jpg"
+    src.write_bytes(b"x" * 10_000)
+    assert copy_file(src, tmp_path / "copy.jpg") == 10_000
+    assert (tmp_path / "copy.jpg").read_bytes() == b"x" * 10_000
+
+
+@pytest.mark.skipif(not hasattr(os, "copy_file_range"), reason="needs os.copy_file_range")
+def test_copy_file_redoes_short_kernel_copy(tmp_path, monkeypatch):
+    real = os.copy_file_range
+    calls = []
+
+    def stop_early(src_fd, dst_fd, count):
+        calls.append(count)
+        return real(src_fd, dst_fd, 4096) if len(calls) == 1 else 0
+
+    monkeypatch.setattr(os, "copy_file_range", stop_early)
+    monkeypatch.setattr(os, "sendfile", lambda *args: 0, raising=False)
+    src = tmp_path / "img.jpg"
+    src.write_bytes(bytes(range(256)) * 100)
+    assert copy_file(src, tmp_path / "copy.jpg") == 25_600
+    assert (tmp_path / "copy.jpg").read_bytes() == src.read_bytes()
+
+
+def test_registry_claims_smallest_free_name(tmp_path):
+    (tmp_path / "IMG_0001.JPG").write_text("a")
+    (tmp_path / "IMG_0001 (1).JPG").write_text("b")
+    (tmp_path / "IMG_0001 (3).JPG").write_text("c")
+    registry = DestinationRegistry()
+    assert registry.claim(tmp_path, "IMG_0001.JPG") == tmp_path / "IMG_0001 (2).JPG"
+    assert registry.claim(tmp_path, "IMG_0001.JPG") == tmp_path / "IMG_0001 (4).JPG"
+    assert registry.claim(tmp_path, "other.jpg") == tmp_path / "other.jpg"
+    assert (tmp_path / "IMG_0001 (2).JPG").read_bytes() == b""  # placeholder
+    # A file created behind the registry's back is not overwritten
+    (tmp_path / "IMG_0001 (5).JPG").write_text("d")
+    assert registry.claim(tmp_path, "IMG_0001.JPG") == tmp_path / "IMG_0001 (6).JPG"
+
+
+def test_registry_lists_each_folder_once(tmp_path, monkeypatch):
+    import photo_sorter.file_ops as file_ops
+
+    calls = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(file_ops.os, "scandir", lambda p: calls.append(p) or real_scandir(p))
+    registry = DestinationRegistry()
+    for _ in range(20):
+        registry.claim(tmp_path, "IMG.jpg")
+    assert len(calls) == 1
+    assert len(list(tmp_path.iterdir())) == 20
+
+
+def test_registry_concurrent_claims_are_unique(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    registry = DestinationRegistry()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(pool.map(lambda _: registry.claim(tmp_path, "IMG.jpg"), range(100)))
+    assert len(set(paths)) == 100
+
+
+@pytest.mark.parametrize("link_mode", LINK_MODES)
+def test_copy_and_move_with_registry(tmp_path, link_mode):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "img.jpg").write_text("v1")
+    (src / "move.jpg").write_text("v2")
+    dest_dir = tmp_path / "out"
+    dest_dir.mkdir()
+    (dest_dir / "img.jpg").write_text("existing")
+    registry = DestinationRegistry()
+    copied = copy_image(src / "img.jpg", dest_dir, dest_filename="img.jpg", link_mode=link_mode, registry=registry)
+    assert copied == dest_dir / "img (1).jpg"
+    assert copied.read_text() == "v1"
+    moved = move_image(src / "move.jpg", dest_dir, dest_filename="img.jpg", registry=registry)
+    assert moved == dest_dir / "img (2).jpg"
+    assert moved.read_text() == "v2"
+    assert sorted(p.name for p in dest_dir.iterdir()) == ["img (1).jpg", "img (2).jpg", "img.jpg"]
+
+
+def test_registry_releases_name_on_failure(tmp_path):
+    registry = DestinationRegistry()
+    with pytest.raises(FileNotFoundError):
+        copy_image(tmp_path / "missing.jpg", tmp_path / "out", registry=registry)
+    assert list((tmp_path / "out").iterdir()) == []
+    (tmp_path / "missing.jpg").write_text("x")
+    assert copy_image(tmp_path / "missing.jpg", tmp_path / "out", registry=registry) == tmp_path / "out" / "missing.jpg"
+
+
+def test_registry_reuses_accepted_placeholders(tmp_path):
+    (tmp_path / "IMG.jpg").write_bytes(b"")  # left by an interrupted run
+    (tmp_path / "IMG (1).jpg").write_bytes(b"")  # owned by someone else
+    (tmp_path / "IMG (2).jpg").write_text("data")
+    registry = DestinationRegistry(reusable=lambda p: p.name == "IMG.jpg")
+    assert registry.claim(tmp_path, "IMG.jpg") == tmp_path / "IMG.jpg"
+    assert registry.claim(tmp_path, "IMG.jpg") == tmp_path / "IMG (3).jpg"
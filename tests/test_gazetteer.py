@@ -0,0 +1,74 @@
+"""Tests for the offline gazetteer (KD-tree nearest place)."""
+
+import math
+import random
+
+import pytest
+
+from photo_sorter.gazetteer import Gazetteer
+from photo_sorter.geocode import get_place_name
+from photo_sorter.geocode_client import GeocodeError
+from photo_sorter.location_matcher import haversine_km
+
+
+def _geonames_row(geonameid, name, lat, lon, feature_class="P", feature_code="PPL", country="TW", population=0):
+    cols = [str(geonameid), name, name, "", str(lat), str(lon), feature_class, feature_code, country]
+    cols += ["", "", "", "", "", str(population), "", "0", "Asia/Taipei", "2020-01-01"]
+    return "\t".join(cols)
+
+
+def test_load_geonames_and_reverse(tmp_path):
+    path = tmp_path / "cities500.txt"
+    path.write_text(
+        "\n".join([
+            _geonames_row(1, "Taipei", 25.0478, 121.5319, population=2_700_000),
+            _geonames_row(2, "Shifen", 25.0426, 121.7762, feature_code="PPLX"),
+            _geonames_row(3, "Yehliu Geopark", 25.2066, 121.6900, feature_class="L", feature_code="PRK"),
+        ]) + "\n",
+        encoding="utf-8",
+    )
+    gazetteer = Gazetteer.load(path)
+    assert len(gazetteer) == 3
+    result = gazetteer.reverse(25.0339, 121.5645)
+    assert result["address"] == {"city": "Taipei", "country_code": "tw"}
+    assert gazetteer.reverse(25.04, 121.78)["address"]["suburb"] == "Shifen"
+    assert gazetteer.reverse(25.2, 121.69)["address"]["tourism"] == "Yehliu Geopark"
+    with pytest.raises(GeocodeError):
+        gazetteer.reverse(0.0, 0.0)  # nothing within max_distance_km
+
+
+def test_load_csv(tmp_path):
+    path = tmp_path / "places.csv"
+    path.write_text("Name,Lat,Lon,Kind\nLuneta Park,14.5831,120.9794,tourism\nBinondo,14.6000,120.9750,\n", encoding="utf-8")
+    gazetteer = Gazetteer.load(path)
+    assert gazetteer.reverse(14.583, 120.979)["address"] == {"tourism": "Luneta Park"}
+    assert gazetteer.reverse(14.601, 120.975)["address"] == {"village": "Binondo"}
+
+    bad = tmp_path / "bad.csv"
+    bad.write_text("title,x,y\nfoo,1,2\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        Gazetteer.load(bad)
+    with pytest.raises(FileNotFoundError):
+        Gazetteer.load(tmp_path / "missing.csv")
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(3)
+    places = [
+        (f"p{i}", math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180), "city", "")
+        for i in range(500)
+    ]
+    gazetteer = Gazetteer(places)
+    for _ in range(200):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        _pos, distance = gazetteer.nearest(lat, lon)
+        expected = min(haversine_km(lat, lon, p[1], p[2]) for p in places)
+        assert distance == pytest.approx(expected, abs=1e-6)
+
+
+def test_get_place_name_with_gazetteer(tmp_path):
+    gazetteer = Gazetteer([("Jiufen", 25.1097, 121.8452, "village", "TW")])
+    name = get_place_name(25.11, 121.84, cache_path=tmp_path / "cache.json", single_word_english=True, client=gazetteer)
+    assert name == "Jiufen"
+    # Cached like a Nominatim result
+    assert get_place_name(25.11, 121.84, cache_path=tmp_path / "cache.json", use_network=False) == "Jiufen"
@@ -0,0 +1,164 @@
+"""Tests for the geocode cache stores (JSON and SQLite)."""
+
+import json
+import sqlite3
+
+from photo_sorter.geocode import get_place_name
+from photo_sorter.geocode_cache import GeocodeCache, SqliteGeocodeCache, open_geocode_cache
+
+
+def test_geocode_cache_load_and_get(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"25.0,121.6": "Taipei"}), encoding="utf-8")
+    cache = GeocodeCache(path)
+    assert "25.0,121.6" in cache
+    assert cache.get("25.0,121.6") == "Taipei"
+    assert cache.get("missing") is None
+    assert len(cache) == 1
+
+
+def test_geocode_cache_missing_or_corrupt_file(tmp_path):
+    assert len(GeocodeCache(tmp_path / "nope.json")) == 0
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json", encoding="utf-8")
+    assert len(GeocodeCache(bad)) == 0
+
+
+def test_geocode_cache_batches_writes(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = GeocodeCache(path, flush_every=3)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert not path.exists()  # still buffered
+    cache.set("c", "C")
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": "A", "b": "B", "c": "C"}
+    cache.pop("a")
+    cache.close()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"b": "B", "c": "C"}
+    # No temp files left behind
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_geocode_cache_unchanged_value_not_dirty(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"a": "A"}), encoding="utf-8")
+    mtime = path.stat().st_mtime_ns
+    with GeocodeCache(path) as cache:
+        cache.set("a", "A")
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_get_place_name_uses_cache_object(tmp_path):
+    cache = GeocodeCache(tmp_path / "cache.json")
+    cache.set("25.0,121.6", "Taipei City")
+    name = get_place_name(25.03, 121.56, cache=cache, use_network=False, cache_precision=1)
+    assert name == "Taipei City"
+    name_sw = get_place_name(
+        25.03, 121.56, cache=cache, use_network=False, single_word_english=True, cache_precision=1
+    )
+    assert name_sw == "TaipeiCity"
+
+
+def test_get_place_name_drops_bad_cached_value(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"25.0,121.6": "Lat25_03Lon121_56"}), encoding="utf-8")
+    name = get_place_name(
+        25.03, 121.56, cache_path=path, use_network=False, single_word_english=True, cache_precision=1
+    )
+    assert name == "Lat25_03Lon121_56"
+    assert json.loads(path.read_text(encoding="utf-8")) == {}
+
+
+def test_sqlite_cache_roundtrip(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with SqliteGeocodeCache(path) as cache:
+        cache.set("25.034,121.565", "Taipei 101", lat=25.0339, lon=121.5645, precision=3,
+                  address={"tourism": "Taipei 101", "city": "Taipei"})
+        assert cache.get("25.034,121.565") == "Taipei 101"
+    # Reopen: data persisted
+    with SqliteGeocodeCache(path) as cache:
+        assert "25.034,121.565" in cache
+        assert len(cache) == 1
+        assert cache.address("25.034,121.565") == {"tourism": "Taipei 101", "city": "Taipei"}
+        assert cache.pop("25.034,121.565") == "Taipei 101"
+        assert cache.get("25.034,121.565") is None
+
+
+def test_sqlite_cache_nearest(tmp_path):
+    with SqliteGeocodeCache(tmp_path / "cache.db") as cache:
+        cache.set("a", "Taipei101", lat=25.0339, lon=121.5645)
+        cache.set("b", "Shifen", lat=25.0426, lon=121.7762)
+        cache.set("c", "Dateline", lat=0.0, lon=179.999)
+        name, dist = cache.nearest(25.035, 121.566, radius_km=1.0)
+        assert name == "Taipei101"
+        assert dist < 0.5
+        assert cache.nearest(25.5, 121.5, radius_km=1.0) is None
+        # Window wraps across the antimeridian
+        assert cache.nearest(0.0, -179.999, radius_km=1.0)[0] == "Dateline"
+
+
+def test_sqlite_cache_nearest_reads_only_nearby_cells(tmp_path):
+    with SqliteGeocodeCache(tmp_path / "cache.db") as cache:
+        cache.set("a", "Taipei101", lat=25.0339, lon=121.5645)
+        cache.set("b", "SameLatitude", lat=25.0339, lon=-60.0)
+        plan = cache._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT name, lat, lon FROM places WHERE cell BETWEEN ? AND ?", (0, 1)
+        ).fetchall()
+        assert "places_cell" in " ".join(str(row[-1]) for row in plan)
+        # A radius spanning several cells in each direction
+        assert cache.nearest(25.06, 121.59, radius_km=5.0)[0] == "Taipei101"
+
+
+def test_sqlite_cache_upgrades_old_schema(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE places (key TEXT PRIMARY KEY, lat REAL, lon REAL, precision INTEGER,"
+        " name TEXT NOT NULL, address TEXT, updated REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX places_lat_lon ON places (lat, lon)")
+    conn.execute("INSERT INTO places VALUES ('25.034,121.565', 25.034, 121.565, 3, 'Taipei 101', NULL, 0)")
+    conn.commit()
+    conn.close()
+    with SqliteGeocodeCache(path) as cache:
+        assert cache.get("25.034,121.565") == "Taipei 101"
+        assert cache.nearest(25.0341, 121.5651, radius_km=0.1)[0] == "Taipei 101"
+
+
+def test_get_place_name_uses_nearest_cached_place(tmp_path):
+    calls = []
+
+    class Client:
+        def reverse(self, lat, lon):
+            calls.append((lat, lon))
+            return {"display_name": "Elsewhere"}
+
+    with SqliteGeocodeCache(tmp_path / "cache.sqlite") as cache:
+        cache.set("25.034,121.565", "Taipei 101", lat=25.0345, lon=121.5645)
+        # Rounds to another key, but is ~10 m from the cached place
+        name = get_place_name(25.0346, 121.5644, cache=cache, client=Client())
+        assert name == "Taipei 101"
+        assert calls == []
+        assert get_place_name(25.2, 121.9, cache=cache, client=Client()) == "Elsewhere"
+        assert len(calls) == 1
+
+
+def test_sqlite_cache_import_json(tmp_path):
+    json_path = tmp_path / "cache.json"
+    json_path.write_text(json.dumps({"25.0,121.6": "Taipei", "bad": ""}), encoding="utf-8")
+    with SqliteGeocodeCache(tmp_path / "cache.sqlite") as cache:
+        assert cache.import_json(json_path) == 1
+        assert cache.nearest(25.0, 121.6, radius_km=0.1)[0] == "Taipei"
+
+
+def test_open_geocode_cache_by_suffix(tmp_path):
+    with open_geocode_cache(tmp_path / "c.sqlite") as cache:
+        assert isinstance(cache, SqliteGeocodeCache)
+    with open_geocode_cache(tmp_path / "c.json") as cache:
+        assert isinstance(cache, GeocodeCache)
+
+
+def test_get_place_name_with_sqlite_cache(tmp_path):
+    with SqliteGeocodeCache(tmp_path / "cache.sqlite") as cache:
+        cache.set("25.0,121.6", "Taipei City")
+        assert get_place_name(25.03, 121.56, cache=cache, use_network=False, cache_precision=1) == "Taipei City"
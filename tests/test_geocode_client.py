@@ -0,0 +1,130 @@
+"""Tests for the Nominatim client (local HTTP server, no internet)."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import photo_sorter.geocode_client as geocode_client
+from photo_sorter.geocode import get_place_name
+from photo_sorter.geocode_cache import GeocodeCache
+from photo_sorter.geocode_client import GeocodeError, NominatimClient, TokenBucket
+
+
+@pytest.fixture
+def server():
+    """Fake Nominatim: answers /reverse; the first `fail` requests get `fail_status`."""
+    state = {"fail": 0, "fail_status": 503, "requests": 0, "connections": 0, "paths": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            state["connections"] += 1
+
+        def do_GET(self):
+            state["requests"] += 1
+            state["paths"].append(self.path)
+            if state["fail"] > 0:
+                state["fail"] -= 1
+                self.send_response(state["fail_status"])
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            query = parse_qs(urlsplit(self.path).query)
+            body = json.dumps({
+                "address": {"suburb": "Place " + "ABCDEFGHIJ"[int(float(query["lat"][0])) % 10]},
+                "display_name": "somewhere",
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_address[1]}/nominatim"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_reverse_reuses_connection(server):
+    with NominatimClient(server["url"], rate=0) as client:
+        for i in range(3):
+            data = client.reverse(20.0 + i, 121.5)
+            assert data["address"]["suburb"] == "Place " + "ABC"[i]
+    assert server["requests"] == 3
+    assert server["connections"] == 1
+    assert server["paths"][0].startswith("/nominatim/reverse?")
+
+
+def test_reverse_retries_on_503_and_429(server, monkeypatch):
+    monkeypatch.setattr(geocode_client, "BACKOFF_BASE_SEC", 0.0)
+    server["fail"] = 2
+    with NominatimClient(server["url"], rate=0, retries=2) as client:
+        assert client.reverse(1.0, 2.0)["address"]["suburb"] == "Place B"
+    server["fail"], server["fail_status"] = 3, 429
+    with NominatimClient(server["url"], rate=0, retries=2) as client:
+        with pytest.raises(GeocodeError, match="429"):
+            client.reverse(1.0, 2.0)
+
+
+def test_reverse_connection_refused():
+    with NominatimClient("http://127.0.0.1:9", rate=0, retries=0, timeout=2) as client:
+        with pytest.raises(GeocodeError):
+            client.reverse(0.0, 0.0)
+
+
+def test_invalid_base_url():
+    with pytest.raises(ValueError):
+        NominatimClient("nominatim.example.org")
+
+
+def test_token_bucket_rate_and_burst():
+    bucket = TokenBucket(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05  # burst goes through at once
+    for _ in range(10):
+        bucket.acquire()
+    assert time.monotonic() - start >= 10 / 50 * 0.9
+
+
+def test_get_place_name_concurrently_with_shared_cache(server, tmp_path):
+    cache = GeocodeCache(tmp_path / "cache.json")
+    with NominatimClient(server["url"], rate=0) as client:
+        threads = [
+            threading.Thread(
+                target=get_place_name,
+                args=(10.0 + i, 20.0),
+                kwargs={"cache": cache, "client": client, "single_word_english": True},
+            )
+            for i in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    cache.close()
+    assert len(cache) == 8
+    assert get_place_name(10.0, 20.0, cache=cache, use_network=False, single_word_english=True) == "PlaceA"
+
+
+def test_base_url_from_environment(monkeypatch):
+    monkeypatch.setenv(geocode_client.URL_ENV_VAR, "http://127.0.0.1:8080/nominatim")
+    assert NominatimClient().base_url == "http://127.0.0.1:8080/nominatim"
+    assert NominatimClient("http://other:1").base_url == "http://other:1"
+    monkeypatch.delenv(geocode_client.URL_ENV_VAR)
+    assert NominatimClient().base_url == geocode_client.DEFAULT_BASE_URL
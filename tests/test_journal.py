@@ -0,0 +1,55 @@
+"""Tests for the write-ahead journal."""
+
+from photo_sorter.journal import Journal
+
+
+def test_begin_finish_and_reload(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path, fsync_every=2) as journal:
+        op = journal.begin(tmp_path / "a.jpg", tmp_path / "out" / "a.jpg", "copy", (25.0, 121.5))
+        journal.finish(op)
+        journal.begin(tmp_path / "b.jpg", tmp_path / "out" / "b.jpg", "move")
+    reloaded = Journal(path)
+    done = reloaded.completed(tmp_path / "a.jpg")
+    assert done.dest == str(tmp_path / "out" / "a.jpg")
+    assert done.gps == (25.0, 121.5)
+    assert reloaded.completed(tmp_path / "b.jpg") is None
+    assert [op.source for op in reloaded.pending()] == [str(tmp_path / "b.jpg")]
+    reloaded.close()
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path) as journal:
+        journal.finish(journal.begin(tmp_path / "a.jpg", tmp_path / "x.jpg", "copy"))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "plan", "seq": 2, "sou')
+    with Journal(path) as journal:
+        assert len(journal) == 1
+        assert journal.pending() == []
+
+
+def test_recover_finishes_interrupted_operations(tmp_path):
+    src = tmp_path / "in"
+    out = tmp_path / "out"
+    src.mkdir()
+    out.mkdir()
+    for name in ("move_me.jpg", "copy_me.jpg"):
+        (src / name).write_text(name)
+    (out / "move_me.jpg").write_bytes(b"")  # placeholder claimed before the crash
+    (out / "copy_me.jpg").write_text("cop")  # partial copy
+    (out / "moved.jpg").write_text("moved")  # moved, but not marked done
+    path = tmp_path / "journal.jsonl"
+    with Journal(path) as journal:
+        journal.begin(src / "move_me.jpg", out / "move_me.jpg", "move")
+        journal.begin(src / "copy_me.jpg", out / "copy_me.jpg", "copy")
+        journal.begin(src / "moved.jpg", out / "moved.jpg", "move")
+        journal.begin(src / "gone.jpg", out / "gone.jpg", "copy")
+    with Journal(path) as journal:
+        assert journal.recover() == 3
+        assert journal.pending() == []
+        assert journal.completed(src / "moved.jpg") is not None
+    assert (out / "move_me.jpg").read_text() == "move_me.jpg"
+    assert not (src / "move_me.jpg").exists()
+    assert (out / "copy_me.jpg").read_text() == "copy_me.jpg"
+    assert not (out / "gone.jpg").exists()
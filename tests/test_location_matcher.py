@@ -12,6 +12,8 @@ from photo_sorter.location_matcher import (
     point_in_bounds,
     match_point_location,
     match_location,
+    LocationIndex,
+    match_locations_batch,
 )
 
 
@@ -88,3 +90,87 @@ def test_match_location_nearest_point_wins():
     # Closer to B
     result = match_location(25.0345, 121.565, config)
     assert result == "B"
+
+
+def _random_config(rng, n):
+    locations = []
+    for i in range(n):
+        lat = rng.uniform(-89.5, 89.5)
+        lon = rng.uniform(-180, 180)
+        if rng.random() < 0.3:
+            dlat, dlon = rng.uniform(0, 2), rng.uniform(0, 2)
+            locations.append(BoundsLocation(f"B{i}", lat - dlat, lat + dlat, lon - dlon, lon + dlon))
+        else:
+            locations.append(PointLocation(f"P{i}", lat, lon, radius_km=rng.choice([0.5, 5, 50, 300])))
+    return SorterConfig(locations=locations)
+
+
+def test_location_index_matches_linear_scan():
+    import random
+
+    rng = random.Random(1234)
+    config = _random_config(rng, 300)
+    # Duplicate a point to exercise "earliest wins" on equal distance
+    first_point = next(loc for loc in config.locations if isinstance(loc, PointLocation))
+    config.locations.append(PointLocation("Dup", first_point.lat, first_point.lon, 300))
+    index = LocationIndex(config)
+    queries = []
+    for loc in config.locations:
+        if isinstance(loc, PointLocation):
+            queries.append((loc.lat, loc.lon))
+            queries.append((min(90, loc.lat + rng.uniform(-1, 1)), max(-180, min(180, loc.lon + rng.uniform(-1, 1)))))
+        else:
+            queries.append((loc.min_lat, loc.max_lon))
+    queries += [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(2000)]
+    for lat, lon in queries:
+        assert index.match(lat, lon) == match_location(lat, lon, config), (lat, lon)
+
+
+def test_location_index_antimeridian_and_poles():
+    config = SorterConfig(
+        locations=[
+            PointLocation("Fiji", -17.0, 179.99, radius_km=20),
+            PointLocation("NorthPole", 89.9, 0.0, radius_km=50),
+            BoundsLocation("World", -90, 90, -180, 180),
+        ]
+    )
+    index = LocationIndex(config)
+    assert index.match(-17.0, -179.99) == "World"  # first bounds still wins
+    config.locations.pop()
+    index = LocationIndex(config)
+    assert index.match(-17.0, -179.99) == "Fiji"
+    assert index.match(89.95, 120.0) == "NorthPole"
+    assert index.match(0.0, 0.0) is None
+
+
+def test_location_index_empty_config():
+    assert LocationIndex(SorterConfig(locations=[])).match(25.0, 121.0) is None
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_match_locations_batch(monkeypatch, use_numpy):
+    import random
+
+    import photo_sorter.location_matcher as lm
+
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(lm, "_HAS_NUMPY", False)
+    rng = random.Random(99)
+    config = _random_config(rng, 20)
+    lats = [rng.uniform(-90, 90) for _ in range(500)]
+    lons = [rng.uniform(-180, 180) for _ in range(500)]
+    for loc in config.locations:
+        if isinstance(loc, PointLocation):
+            lats.append(loc.lat)
+            lons.append(loc.lon)
+    expected = [match_location(lat, lon, config) for lat, lon in zip(lats, lons)]
+    assert any(expected)
+    assert match_locations_batch(lats, lons, config) == expected
+    assert match_locations_batch([], [], config) == []
+
+
+def test_match_locations_batch_length_mismatch():
+    with pytest.raises(ValueError):
+        match_locations_batch([1.0], [], SorterConfig(locations=[PointLocation("A", 0, 0)]))
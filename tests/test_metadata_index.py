@@ -0,0 +1,63 @@
+"""Tests for the per-source metadata index."""
+
+import os
+
+from photo_sorter.metadata_index import MetadataIndex, file_signature
+
+
+def test_metadata_index_roundtrip(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"abc")
+    sig = file_signature(photo)
+    db = tmp_path / "index.sqlite"
+    with MetadataIndex(db) as index:
+        assert index.lookup(photo, sig) is None
+        index.record(photo, sig, (25.0, 121.5), tmp_path / "out" / "a.jpg")
+    with MetadataIndex(db) as index:
+        entry = index.lookup(photo, sig)
+        assert entry.gps == (25.0, 121.5)
+        assert entry.destination == str(tmp_path / "out" / "a.jpg")
+        assert len(index) == 1
+
+
+def test_metadata_index_no_gps_entry(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"abc")
+    sig = file_signature(photo)
+    with MetadataIndex(tmp_path / "index.sqlite") as index:
+        index.record(photo, sig, None)
+        entry = index.lookup(photo, sig)
+        assert entry is not None
+        assert entry.gps is None
+        assert entry.destination is None
+
+
+def test_metadata_index_detects_changes(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"abc")
+    sig = file_signature(photo)
+    with MetadataIndex(tmp_path / "index.sqlite") as index:
+        index.record(photo, sig, (1.0, 2.0))
+        # Size changed
+        assert index.lookup(photo, (sig[0] + 1, sig[1], sig[2])) is None
+        # mtime changed
+        os.utime(photo, ns=(sig[1] + 10**9, sig[1] + 10**9))
+        assert index.lookup(photo, file_signature(photo)) is None
+        # Inode changed (file replaced); unknown inode (0) is not compared
+        assert index.lookup(photo, (sig[0], sig[1], sig[2] + 1)) is None
+        assert index.lookup(photo, (sig[0], sig[1], 0)) is not None
+
+
+def test_newer_reader_rereads_no_gps_files(tmp_path):
+    with_gps, without_gps = tmp_path / "a.jpg", tmp_path / "b.heic"
+    with_gps.write_bytes(b"abc")
+    without_gps.write_bytes(b"def")
+    db = tmp_path / "index.sqlite"
+    with MetadataIndex(db, reader_version=1) as index:
+        index.record(with_gps, file_signature(with_gps), (25.0, 121.5))
+        index.record(without_gps, file_signature(without_gps), None)
+    with MetadataIndex(db, reader_version=1) as index:
+        assert index.lookup(without_gps, file_signature(without_gps)) is not None
+    with MetadataIndex(db, reader_version=2) as index:
+        assert index.lookup(with_gps, file_signature(with_gps)).gps == (25.0, 121.5)
+        assert index.lookup(without_gps, file_signature(without_gps)) is None
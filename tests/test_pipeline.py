@@ -0,0 +1,74 @@
+"""Tests for the staged pipeline."""
+
+import threading
+import time
+
+import pytest
+
+from photo_sorter.pipeline import Pipeline, Stage, batched
+
+
+def test_stages_keep_source_order():
+    def slow_square(x):
+        time.sleep(0.001 * (x % 3))
+        return x * x
+
+    stages = [Stage("square", slow_square, workers=4), Stage("inc", lambda x: x + 1)]
+    assert list(Pipeline(range(100), stages, queue_size=8)) == [x * x + 1 for x in range(100)]
+
+
+def test_source_only():
+    assert list(Pipeline(iter("abc"))) == ["a", "b", "c"]
+
+
+def test_stage_error_is_raised():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("three")
+        return x
+
+    seen = []
+    with pytest.raises(ValueError, match="three"):
+        for x in Pipeline(range(10), [Stage("check", fail_on_three, workers=2)]):
+            seen.append(x)
+    assert seen == [0, 1, 2]
+
+
+def test_source_error_is_raised():
+    def source():
+        yield 1
+        raise OSError("disk gone")
+
+    with pytest.raises(OSError, match="disk gone"):
+        list(Pipeline(source(), [Stage("id", lambda x: x)]))
+
+
+def test_backpressure_bounds_work_in_flight():
+    produced = []
+
+    def source():
+        for i in range(10_000):
+            produced.append(i)
+            yield i
+
+    pipeline = Pipeline(source(), [Stage("id", lambda x: x, workers=2)], queue_size=4)
+    results = iter(pipeline)
+    assert next(results) == 0
+    time.sleep(0.2)
+    # Two queues of 4, a window of 4 in the stage, one item being put
+    assert len(produced) < 20
+    pipeline.close()
+
+
+def test_leaving_early_stops_threads():
+    before = threading.active_count()
+    with Pipeline(range(10_000), [Stage("id", lambda x: x, workers=3)], queue_size=2) as pipeline:
+        for x in pipeline:
+            if x == 5:
+                break
+    assert threading.active_count() == before
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
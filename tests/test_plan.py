@@ -0,0 +1,52 @@
+"""Tests for plan files (write, read, apply)."""
+
+import pytest
+
+from photo_sorter.plan import PlanEntry, PlanWriter, apply_plan, read_plan
+
+
+def test_plan_round_trip(tmp_path):
+    entries = [
+        PlanEntry("/in/a.jpg", "/out/Taipei", "a.jpg"),
+        PlanEntry("/in/b.jpg", "/out/Taipei", "a (1).jpg", action="copy", link_mode="hardlink"),
+        PlanEntry("/in/c.jpg", "/out/Skipped", "c.jpg", action="move"),
+        PlanEntry("/in/d.jpg", "/out/Taipei", "d.jpg", action="link", original="/out/Taipei/a.jpg", remove_source=True),
+    ]
+    with PlanWriter(tmp_path / "plan.jsonl") as writer:
+        for entry in entries:
+            writer.write(entry)
+    assert writer.count == 4
+    assert list(read_plan(tmp_path / "plan.jsonl")) == entries
+
+
+def test_read_plan_rejects_bad_lines(tmp_path):
+    path = tmp_path / "plan.jsonl"
+    path.write_text('{"source": "a", "folder": "b"}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="plan.jsonl:1"):
+        list(read_plan(path))
+    path.write_text('{"source": "a", "folder": "b", "filename": "c", "action": "delete"}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="unknown action"):
+        list(read_plan(path))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_apply_plan(tmp_path, workers):
+    src = tmp_path / "in"
+    src.mkdir()
+    for name in ("a.jpg", "b.jpg", "c.jpg"):
+        (src / name).write_text(name)
+    out = tmp_path / "out"
+    with PlanWriter(tmp_path / "plan.jsonl") as writer:
+        writer.write(PlanEntry(str(src / "a.jpg"), str(out / "X"), "a.jpg"))
+        writer.write(PlanEntry(str(src / "b.jpg"), str(out / "X"), "a (1).jpg", action="move"))
+        writer.write(PlanEntry(str(src / "c.jpg"), str(out / "Y"), "c.jpg", action="link", original=str(out / "X" / "a.jpg")))
+        writer.write(PlanEntry(str(src / "missing.jpg"), str(out / "Y"), "missing.jpg"))
+    summary = apply_plan(tmp_path / "plan.jsonl", workers=workers)
+    assert summary["total"] == 4
+    assert summary["applied"] == 3
+    assert [source for source, _err in summary["errors"]] == [str(src / "missing.jpg")]
+    assert (out / "X" / "a.jpg").read_text() == "a.jpg"
+    assert (out / "X" / "a (1).jpg").read_text() == "b.jpg"
+    assert not (src / "b.jpg").exists()
+    assert (out / "Y" / "c.jpg").stat().st_ino == (out / "X" / "a.jpg").stat().st_ino
+    assert not (out / "Y" / "missing.jpg").exists()
@@ -0,0 +1,49 @@
+"""Tests for the streaming image scanner."""
+
+from pathlib import Path
+
+from photo_sorter.scanner import ImageScan
+
+
+def _touch(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x")
+
+
+def test_image_scan_filters_and_orders(tmp_path):
+    for rel in ["b.jpg", "a.PNG", "notes.txt", "z/c.heic", "y/d.tif", "y/deeper/e.jpeg", "y/f.doc"]:
+        _touch(tmp_path / rel)
+    (tmp_path / "dir.jpg").mkdir()  # a directory with an image-like name is not a file
+
+    scan = ImageScan(tmp_path)
+    assert scan.found == 0 and not scan.complete
+    found = [p.relative_to(tmp_path).as_posix() for p in scan]
+    assert found == ["a.PNG", "b.jpg", "y/d.tif", "y/deeper/e.jpeg", "z/c.heic"]
+    assert scan.found == 5
+    assert scan.complete
+
+
+def test_image_scan_is_lazy(tmp_path):
+    for i in range(3):
+        _touch(tmp_path / f"{i}.jpg")
+    scan = ImageScan(tmp_path)
+    it = iter(scan)
+    next(it)
+    assert scan.found == 1
+    assert not scan.complete
+
+
+def test_image_scan_exclude(tmp_path):
+    _touch(tmp_path / "a.jpg")
+    _touch(tmp_path / "out" / "b.jpg")
+    _touch(tmp_path / "later" / "c.jpg")
+    scan = ImageScan(tmp_path, exclude=[tmp_path / "out"])
+    found = []
+    for p in scan:
+        found.append(p.name)
+        scan.exclude(tmp_path / "later")  # excluded before the walk reaches it
+    assert found == ["a.jpg"]
+
+
+def test_image_scan_missing_root(tmp_path):
+    assert list(ImageScan(tmp_path / "missing")) == []
@@ -0,0 +1,53 @@
+"""Tests for run statistics."""
+
+import json
+
+from photo_sorter.stats import RunStats, StageStats, TimedGeocoder
+
+
+def test_stage_stats_totals():
+    stage = StageStats("write")
+    stage.add(2, wall=0.5, cpu=0.1, bytes_written=100, end=10.0)
+    stage.add(1, wall=0.5, cpu=0.2, bytes_read=7, end=12.0)
+    assert (stage.items, stage.bytes_read, stage.bytes_written) == (3, 7, 100)
+    assert stage.wall == 1.0
+    assert stage.elapsed == 2.5  # 9.5 .. 12.0
+    assert stage.rate == 3 / 2.5
+
+
+def test_timed_and_counters(tmp_path):
+    stats = RunStats()
+    with stats.timed("copy") as timing:
+        timing.bytes_written = 42
+    assert list(stats.timed_iter("scan", "abc")) == ["a", "b", "c"]
+    stats.count("hits")
+    stats.count("hits", 2)
+    result = stats.to_dict()
+    assert result["stages"]["copy"]["items"] == 1
+    assert result["stages"]["copy"]["bytes_written"] == 42
+    assert result["stages"]["scan"]["items"] == 3
+    assert result["counters"] == {"hits": 3}
+    stats.write_json(tmp_path / "stats.json")
+    assert json.loads((tmp_path / "stats.json").read_text())["counters"] == {"hits": 3}
+
+
+def test_disabled_stats_record_nothing():
+    stats = RunStats(enabled=False)
+    with stats.timed("copy") as timing:
+        timing.bytes_written = 42
+    assert list(stats.timed_iter("scan", [1, 2])) == [1, 2]
+    stats.count("hits")
+    assert stats.stage("copy") is None
+    assert stats.to_dict()["stages"] == {}
+    assert stats.to_dict()["counters"] == {}
+
+
+def test_timed_geocoder_counts_lookups():
+    class Client:
+        def reverse(self, lat, lon):
+            return {"lat": lat}
+
+    stage = StageStats("geocode_network")
+    client = TimedGeocoder(Client(), stage)
+    assert client.reverse(1.0, 2.0) == {"lat": 1.0}
+    assert stage.items == 1